@@ -0,0 +1,156 @@
+import os
+import threading
+import time
+
+
+class CacheManager:
+    """
+    Keeps a cache directory (e.g. the Omniverse cache) below a size budget from a background thread.
+    The directory is rescanned every `interval` seconds. When it exceeds `max_size_mb`, or holds files older than
+    `max_age_hours`, the least recently used files are evicted until it is back below `target_ratio` of the budget.
+    Files used within the last `min_age` seconds are never evicted, so textures of samples in flight stay put.
+    """
+
+    def __init__(self, path, max_size_mb=20000, max_age_hours=None, target_ratio=0.8, interval=60.0, min_age=300.0):
+        self.path = os.path.expanduser(str(path))
+        self.max_size_mb = max_size_mb
+        self.max_age_hours = max_age_hours
+        self.target_ratio = target_ratio
+        self.interval = interval
+        self.min_age = min_age
+
+        self._thread = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+        # Last scan
+        self.size_bytes = 0
+        self.n_files = 0
+
+        # Telemetry
+        self.scans = 0
+        self.scan_time = 0.0
+        self.evicted_files = 0
+        self.evicted_bytes = 0
+
+    @property
+    def size_mb(self):
+        return self.size_bytes / (1024 * 1024)
+
+    def _walk(self, directory):
+        """Yields (path, size, last use) of every file below `directory`"""
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return
+
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from self._walk(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    st = entry.stat(follow_symlinks=False)
+                    # atime is not updated on noatime mounts, so fall back to the modification time
+                    yield entry.path, st.st_size, max(st.st_atime, st.st_mtime)
+            except OSError:
+                # Removed while scanning
+                continue
+
+    def scan(self):
+        """Rescans the cache; returns its files as (path, size, last use)"""
+        t0 = time.perf_counter()
+        files = list(self._walk(self.path))
+
+        with self._lock:
+            self.size_bytes = sum(size for _, size, _ in files)
+            self.n_files = len(files)
+            self.scans += 1
+            self.scan_time += time.perf_counter() - t0
+
+        return files
+
+    def evict(self, files):
+        """Evicts expired files, then least recently used files while over budget; returns the bytes freed"""
+        now = time.time()
+        budget = self.max_size_mb * 1024 * 1024
+        target = budget * self.target_ratio
+        max_age = self.max_age_hours * 3600 if self.max_age_hours else None
+
+        total = sum(size for _, size, _ in files)
+        over_budget = total > budget
+        freed = 0
+
+        # Oldest use first
+        for path, size, last_use in sorted(files, key=lambda f: f[2]):
+            age = now - last_use
+            if age < self.min_age:
+                break
+
+            # Files are sorted by last use, so once one is neither expired nor needed for the budget, none are
+            expired = max_age is not None and age > max_age
+            if not expired and not (over_budget and total - freed > target):
+                break
+
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+
+            freed += size
+            with self._lock:
+                self.evicted_files += 1
+                self.evicted_bytes += size
+
+        if freed:
+            with self._lock:
+                self.size_bytes = max(0, self.size_bytes - freed)
+            print(f"Cache {self.path}: evicted {freed / (1024 * 1024):.0f} MB, {self.size_mb:.0f} MB left")
+
+        return freed
+
+    def run_once(self):
+        return self.evict(self.scan())
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"ERROR! Cache management of {self.path} failed: {e}")
+
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self):
+        """Starts the background thread (once)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="cache-manager", daemon=True)
+        self._thread.start()
+
+    def request_scan(self):
+        """Wakes the background thread for an early rescan"""
+        self._wake.set()
+
+    def stop(self, timeout=5.0):
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "size_mb": self.size_mb,
+                "files": self.n_files,
+                "scans": self.scans,
+                "mean_scan_time": self.scan_time / self.scans if self.scans else 0.0,
+                "evicted_files": self.evicted_files,
+                "evicted_mb": self.evicted_bytes / (1024 * 1024),
+            }
@@ -6,6 +6,8 @@ from omni.kit.viewport.utility import get_active_viewport, get_active_viewport_w
 from pxr import Usd, UsdGeom, Gf, CameraUtil
 import math
 
+from .handlesuite import resolve_attribute, resolve_prim
+
 
 class CameraSuite:
     """
@@ -80,8 +82,8 @@ class CameraSuite:
         viewport_window = get_active_viewport()
 
         # Set Camera properties: FOV, Resolution, Position, Rotation
-        cam_prim = stage.GetPrimAtPath(cam_path)
-        focal_length = cam_prim.GetAttribute("focalLength")
+        cam_prim = resolve_prim(stage, cam_path)
+        focal_length = resolve_attribute(stage, cam_prim, "focalLength")
         focal_length.Set(fov)
 
         viewport_window.set_active_camera(cam_path)
@@ -91,13 +93,13 @@ class CameraSuite:
 
     def set_fov(self, stage=None, cam_path="/World/Camera", fov=110.0):
         # Set Camera properties: FOV
-        cam_prim = stage.GetPrimAtPath(cam_path)
-        focal_length = cam_prim.GetAttribute("focalLength")
+        cam_prim = resolve_prim(stage, cam_path)
+        focal_length = resolve_attribute(stage, cam_prim, "focalLength")
         focal_length.Set(fov)
 
     def get_fov(self, stage=None, cam_path="/World/Camera"):
-        cam_prim = stage.GetPrimAtPath(cam_path)
-        focal_length = cam_prim.GetAttribute("focalLength")
+        cam_prim = resolve_prim(stage, cam_path)
+        focal_length = resolve_attribute(stage, cam_prim, "focalLength")
         return focal_length.Get()
 
     def set_resolution(self, resolution=(1920, 1080)):
@@ -118,7 +120,7 @@ class CameraSuite:
         time_code = Usd.TimeCode.Default()
 
         # Get active camera.
-        cameraPrim = stage.GetPrimAtPath(cam_path)
+        cameraPrim = resolve_prim(stage, cam_path)
 
         if cameraPrim.IsValid():
             camera = UsdGeom.Camera(cameraPrim)  # UsdGeom.Camera
@@ -137,7 +139,7 @@ class CameraSuite:
         viewport_window.set_camera_target(cam_path, rotation[0], rotation[1], rotation[2], True)
 
     def get_world_to_camera_matrix(self, stage, cam_path):
-        cam_prim = stage.GetPrimAtPath(cam_path)
+        cam_prim = resolve_prim(stage, cam_path)
 
         if cam_prim.IsValid():
             time_code = Usd.TimeCode.Default()
@@ -174,7 +176,7 @@ class CameraSuite:
         viewport_window = get_active_viewport_window()
         
         # Get the current rendering camera
-        cameraPrim = stage.GetPrimAtPath(cam)
+        cameraPrim = resolve_prim(stage, cam)
         if cameraPrim.IsValid() == False:
             return
 
@@ -233,7 +235,7 @@ class CameraSuite:
         viewportRect = viewport_window.legacy_window.get_viewport_rect()
         viewportSize = (viewportRect[2] - viewportRect[0], viewportRect[3] - viewportRect[1])
 
-        cameraPrim = stage.GetPrimAtPath(cam)
+        cameraPrim = resolve_prim(stage, cam)
         if cameraPrim.IsValid() == False:
             return
 
@@ -286,8 +288,21 @@ class CameraSuite:
 
         return dist
 
+    def get_frustum_box(self, stage, cam_path, far):
+        """World-space Gf.Range3d enclosing the camera frustum cut off at `far` scene units"""
+        cameraV = UsdGeom.Camera(resolve_prim(stage, cam_path)).GetCamera(Usd.TimeCode.Default())
+
+        frustum = cameraV.frustum
+        near = frustum.GetNearFar().min
+        frustum.SetNearFar(Gf.Range1d(near, max(far, near + 1.0)))
+
+        box = Gf.Range3d()
+        for corner in frustum.ComputeCorners():
+            box.UnionWith(Gf.Vec3d(corner))
+        return box
+
     def is_in_cam_view(self, stage, cam_path, bbox):
-        cam_prim = stage.GetPrimAtPath(cam_path)
+        cam_prim = resolve_prim(stage, cam_path)
 
         if cam_prim.IsValid():
             time_code = Usd.TimeCode.Default()
@@ -305,13 +320,13 @@ class CameraSuite:
         aspect_ratio = width / height
 
         # get camera prim attached to viewport
-        camera = stage.GetPrimAtPath(camera)
-        focal_length = camera.GetAttribute("focalLength").Get()
-        horiz_aperture = camera.GetAttribute("horizontalAperture").Get()
-        vert_aperture = camera.GetAttribute("verticalAperture").Get()
+        camera = resolve_prim(stage, camera)
+        focal_length = resolve_attribute(stage, camera, "focalLength").Get()
+        horiz_aperture = resolve_attribute(stage, camera, "horizontalAperture").Get()
+        vert_aperture = resolve_attribute(stage, camera, "verticalAperture").Get()
         # Pixels are square so we can also do:
         # vert_aperture = height / width * horiz_aperture
-        near, far = camera.GetAttribute("clippingRange").Get()
+        near, far = resolve_attribute(stage, camera, "clippingRange").Get()
         fov = 2 * math.atan(horiz_aperture / (2 * focal_length))
 
         # helper to compute projection matrix
@@ -326,7 +341,7 @@ class CameraSuite:
         return focal_x, focal_y, center_x, center_y
 
     def get_details(self, stage, cam_path):
-        cam_prim = stage.GetPrimAtPath(cam_path)
+        cam_prim = resolve_prim(stage, cam_path)
 
         if cam_prim.IsValid():
             time_code = Usd.TimeCode.Default()
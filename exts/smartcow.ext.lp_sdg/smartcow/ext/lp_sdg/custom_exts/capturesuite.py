@@ -3,11 +3,16 @@ import carb
 import carb.events
 import carb.settings
 
-from omni.kit.viewport.utility import get_active_viewport
+from omni.kit.viewport.utility import get_active_viewport, capture_viewport_to_buffer
 
 import asyncio
+import ctypes
 import os
 
+import numpy as np
+
+from .rendersuite import RenderSuite
+
 
 class CaptureSuite:
     """Take in-system screenshot with camera and resolution control"""
@@ -15,6 +20,23 @@ class CaptureSuite:
     def __init__(self):
         print("Initialized Screen Capture Tool.")
 
+        # Render settings are only written when they change
+        self.render_suite = RenderSuite()
+
+        # Output directories already created during this run
+        self._output_dirs = set()
+
+    def ensure_dir(self, path):
+        """Creates an output directory once per run"""
+        path = str(path)
+        if path not in self._output_dirs:
+            os.makedirs(path, exist_ok=True)
+            self._output_dirs.add(path)
+
+    def reset_output_dirs(self):
+        """Forget created directories, e.g. at the start of a new run"""
+        self._output_dirs = set()
+
     def take_screenshot(
             self,
             img_path="",
@@ -29,33 +51,27 @@ class CaptureSuite:
         # print("Configuring capture settings... ")
 
         # Create capture path if it doesn't exist
-        if not os.path.exists(os.path.dirname(img_path)):
-            os.mkdir(os.path.dirname(img_path))
-
-        # Set post-processing effects
-        settings = carb.settings.get_settings()
+        self.ensure_dir(os.path.dirname(img_path))
 
-        # Remove Gizmos from RGB
-        # settings.set("/persistent/app/viewport/displayOptions", 0)
+        viewport_window = self._prepare_viewport(
+            use_custom_camera, switch_cam, cam_path, resolution, rendermode, spp, disable_async
+        )
 
-        # Remove ASYNC rendering to improve rendering stability
-        if disable_async:
-            settings.set_bool("/app/asyncRendering", False)
-            settings.set_bool("/app/asyncRenderingLowLatency", False)
+        # print("Say cheese!")
 
-        # Allow interactivity in the UI and accumulation of subframes for motion blur
-        settings.set_int("/rtx/pathtracing/spp", 1)
+        # Get renderer and render image
+        # renderer.capture_next_frame_rp_resource(img_path, viewport_ldr)
+        # Returns the capture; `await capture.wait_for_result()` to know when the file is written
+        return omni.kit.viewport.utility.capture_viewport_to_file(file_path=img_path, viewport_api=viewport_window)
 
-        # Enable syncLoads in materialDB and Hydra. This is needed to make sure texture updates finish before we start the rendering
-        settings.set("/rtx/materialDb/syncLoads", True)
-        settings.set("/rtx/hydra/materialSyncLoads", True)
+    def _prepare_viewport(self, use_custom_camera, switch_cam, cam_path, resolution, rendermode, spp, disable_async):
+        """Applies the capture render settings, camera and resolution; returns the active viewport"""
 
-        if settings.get("/rtx/rendermode") != rendermode:
-            # Set to PathTraced rendering by default
-            settings.set("/rtx/rendermode", rendermode)
-            settings.set("/rtx/pathtracing/totalSpp", spp)
+        # Remove Gizmos from RGB
+        # settings.set("/persistent/app/viewport/displayOptions", 0)
 
-            print("Switching to PathTracing")
+        # Apply the capture render settings (rendermode, SPP, sync loads); unchanged keys are not re-written
+        self.render_suite.apply_capture_profile(rendermode=rendermode, spp=spp, disable_async=disable_async)
 
         # print("Acquiring viewport interface... ")
 
@@ -86,11 +102,51 @@ class CaptureSuite:
         # Get viewport image.
         # viewport_ldr = viewport_window.get_drawable_ldr_resource()
 
-        # print("Say cheese!")
+        return viewport_window
 
-        # Get renderer and render image
-        # renderer.capture_next_frame_rp_resource(img_path, viewport_ldr)
-        omni.kit.viewport.utility.capture_viewport_to_file(file_path=img_path, viewport_api=viewport_window)
+    def buffer_to_array(self, buffer, buffer_size, width, height):
+        """Copies a captured frame (PyCapsule) into a (height, width, channels) uint8 array"""
+        ctypes.pythonapi.PyCapsule_GetPointer.restype = ctypes.POINTER(ctypes.c_byte * buffer_size)
+        ctypes.pythonapi.PyCapsule_GetPointer.argtypes = [ctypes.py_object, ctypes.c_char_p]
+        content = ctypes.pythonapi.PyCapsule_GetPointer(buffer, None)
+
+        # The buffer is only valid during the callback, hence the copy
+        pixels = np.frombuffer(content.contents, dtype=np.uint8).copy()
+        channels = buffer_size // (width * height)
+
+        return pixels.reshape(height, width, channels)
+
+    async def take_screenshot_to_buffer_async(
+            self,
+            use_custom_camera=False,
+            switch_cam=False,
+            cam_path="/World/Camera",
+            resolution=(1920, 1080),
+            rendermode="PathTracing",
+            spp=64,
+            disable_async=False,
+            timeout=10.0,
+    ):
+        """Captures the next frame into memory instead of a file; encoding is left to the caller"""
+        await omni.kit.app.get_app().next_update_async()
+
+        viewport_window = self._prepare_viewport(
+            use_custom_camera, switch_cam, cam_path, resolution, rendermode, spp, disable_async
+        )
+
+        future = asyncio.get_event_loop().create_future()
+
+        def _on_capture(buffer, buffer_size, width, height, format):
+            if future.done():
+                return
+            try:
+                future.set_result(self.buffer_to_array(buffer, buffer_size, width, height))
+            except Exception as e:
+                future.set_exception(e)
+
+        capture_viewport_to_buffer(viewport_window, _on_capture)
+
+        return await asyncio.wait_for(future, timeout)
 
     async def take_screenshot_async(
             self,
@@ -104,7 +160,7 @@ class CaptureSuite:
             disable_async=False,
     ):
         await omni.kit.app.get_app().next_update_async()
-        self.take_screenshot(
+        return self.take_screenshot(
             img_path, use_custom_camera, switch_cam, cam_path, resolution, rendermode, spp, disable_async=disable_async
         )
 
@@ -0,0 +1,167 @@
+import cv2
+import numpy as np
+
+
+def dhash(pixels, hash_size=8):
+    """
+    Difference hash of an image: the sign of the horizontal gradient on a (hash_size + 1) x hash_size grayscale
+    thumbnail, packed into a hash_size^2 bit integer. Robust to noise, small shifts and global brightness changes.
+    """
+    if pixels.ndim == 3:
+        code = cv2.COLOR_RGBA2GRAY if pixels.shape[2] == 4 else cv2.COLOR_RGB2GRAY
+        pixels = cv2.cvtColor(pixels, code)
+
+    thumb = cv2.resize(pixels, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (thumb[:, 1:] > thumb[:, :-1]).flatten()
+
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class MultiIndexHashTable:
+    """
+    Hamming-distance search over binary hashes (multi-index hashing).
+    Hashes are split into max_distance + 1 chunks, each indexed in its own exact-match table. Two hashes within
+    max_distance bits agree exactly on at least one chunk (pigeonhole), so a query only verifies the hashes that
+    share a chunk with it instead of scanning the whole index.
+    """
+
+    def __init__(self, bits=64, max_distance=4):
+        self.bits = bits
+        self.max_distance = max_distance
+
+        n_chunks = min(max_distance + 1, bits)
+        # (shift, mask) per chunk; the first chunks take the remainder bits
+        self.chunks = []
+        shift = bits
+        for i in range(n_chunks):
+            width = bits // n_chunks + (1 if i < bits % n_chunks else 0)
+            shift -= width
+            self.chunks.append((shift, (1 << width) - 1))
+
+        self.clear()
+
+    def clear(self):
+        self.tables = [{} for _ in self.chunks]
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, value):
+        for table, (shift, mask) in zip(self.tables, self.chunks):
+            table.setdefault((value >> shift) & mask, []).append(value)
+        self.size += 1
+
+    def nearest(self, value):
+        """Closest indexed hash within max_distance as (hash, distance), or None"""
+        best = None
+        seen = set()
+        for table, (shift, mask) in zip(self.tables, self.chunks):
+            for candidate in table.get((value >> shift) & mask, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+
+                distance = hamming(value, candidate)
+                if distance <= self.max_distance and (best is None or distance < best[1]):
+                    best = (candidate, distance)
+                    if distance == 0:
+                        return best
+        return best
+
+
+class DuplicateFilter:
+    """
+    Rejects captured frames that are near-duplicates of a frame already kept in this run.
+    Frames are compared by the perceptual hash of the crop around all of their annotated plates ("plates"), or of
+    the whole frame ("frame"); a frame is a duplicate if a kept frame's hash is within `max_distance` bits.
+    The plates themselves are masked out before hashing: plate texts are drawn per sample, so only the scene
+    (vehicles, pose, camera, lighting) decides whether two frames are duplicates. The "plates" crop extends
+    `context` times the size of the plates' box on every side, so that it holds the vehicles around them.
+    """
+
+    REGIONS = ("frame", "plates")
+
+    def __init__(self, enabled=True, max_distance=4, hash_size=8, region="plates", context=1.0):
+        if region not in self.REGIONS:
+            raise ValueError(f"Unknown duplicate filter region: {region}; choose one of {list(self.REGIONS)}")
+
+        self.enabled = enabled
+        self.hash_size = hash_size
+        self.region = region
+        self.context = context
+        self.index = MultiIndexHashTable(bits=hash_size * hash_size, max_distance=max_distance)
+
+        self.reset()
+
+    def reset(self):
+        self.index.clear()
+        self.checked = 0
+        self.rejected = 0
+
+    def _region_of(self, pixels, annotations):
+        """Region of the frame to hash, with the plates filled in; a copy, the captured pixels are encoded later"""
+        if annotations is None or len(annotations) == 0:
+            return pixels
+
+        height, width = pixels.shape[:2]
+        boxes = np.array(annotations[["x1", "y1", "x2", "y2"]], dtype=float)
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height)
+
+        x1, y1 = boxes[:, 0].min(), boxes[:, 1].min()
+        x2, y2 = boxes[:, 2].max(), boxes[:, 3].max()
+        if self.region == "plates" and x2 - x1 >= 2 and y2 - y1 >= 2:
+            dx, dy = (x2 - x1) * self.context, (y2 - y1) * self.context
+            left, top = int(max(0, x1 - dx)), int(max(0, y1 - dy))
+            right, bottom = int(min(width, x2 + dx)), int(min(height, y2 + dy))
+        else:
+            left, top, right, bottom = 0, 0, width, height
+
+        region = pixels[top:bottom, left:right].copy()
+        for bx1, by1, bx2, by2 in boxes.astype(int):
+            region[max(0, by1 - top) : max(0, by2 - top), max(0, bx1 - left) : max(0, bx2 - left)] = 0
+        return region
+
+    def is_duplicate(self, pixels, annotations=None):
+        """Checks a frame (HxWxC array) and remembers it if it is kept"""
+        if not self.enabled or pixels is None:
+            return False
+
+        value = dhash(np.ascontiguousarray(self._region_of(pixels, annotations)), self.hash_size)
+        self.checked += 1
+
+        if self.index.nearest(value) is not None:
+            self.rejected += 1
+            return True
+
+        self.index.add(value)
+        return False
+
+    def select(self, frames):
+        """
+        Captured frames worth writing: those with annotated plates (a frame without plates has no image name and
+        nothing to annotate) that are not near-duplicates of a kept frame
+        """
+        return [
+            frame
+            for frame in frames
+            if frame["annotations"] is not None
+            and len(frame["annotations"])
+            and not self.is_duplicate(frame["pixels"], frame["annotations"])
+        ]
+
+    def get_stats(self):
+        return {
+            "checked": self.checked,
+            "rejected": self.rejected,
+            "reject_rate": self.rejected / self.checked if self.checked else 0.0,
+            "kept": len(self.index),
+        }
@@ -0,0 +1,195 @@
+import asyncio
+import os
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from .metricsuite import MetricsSuite
+
+
+class EncoderPool:
+    """
+    Encodes captured frames and writes them to disk on a pool of worker threads.
+    At most `max_pending` frames are held in memory; `submit` waits (backpressure) when the pool is full.
+    """
+
+    # Supported formats and their file extensions
+    FORMATS = {"png": ".png", "jpg": ".jpg", "webp": ".webp", "npy": ".npy"}
+
+    # Named quality/speed trade-offs: format, PNG compression level, JPEG/WebP quality
+    PRESETS = {
+        "png_fast": ("png", 1, 95),  # lossless, fastest PNG; larger files
+        "png": ("png", 3, 95),  # lossless, balanced
+        "png_small": ("png", 9, 95),  # lossless, smallest PNG; slowest
+        "jpeg_hq": ("jpg", 3, 95),  # lossy, high quality
+        "webp": ("webp", 3, 90),  # lossy, smaller than JPEG at similar quality
+        "webp_lossless": ("webp", 3, 101),  # OpenCV switches WebP to lossless above 100
+        "npy": ("npy", 3, 95),  # raw pixels, no encoding at all
+    }
+
+    @classmethod
+    def from_preset(cls, preset, **kwargs):
+        if preset not in cls.PRESETS:
+            raise ValueError(f"Unknown image preset: {preset}; choose one of {list(cls.PRESETS)}")
+
+        fmt, compression, quality = cls.PRESETS[preset]
+        return cls(fmt=fmt, compression=compression, quality=quality, **kwargs)
+
+    def __init__(self, fmt="png", compression=3, quality=95, workers=4, max_pending=8, metrics=None):
+        """
+        fmt: one of FORMATS
+        compression: PNG compression level (0-9)
+        quality: JPEG/WebP quality (0-100)
+        workers: number of encoding threads
+        max_pending: maximum number of frames submitted but not yet written
+        metrics: MetricsSuite receiving the per-frame "image_write" timings
+        """
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unsupported image format: {fmt}; choose one of {list(self.FORMATS)}")
+
+        self.fmt = fmt
+        self.compression = compression
+        self.quality = quality
+        self.workers = workers
+        self.max_pending = max_pending
+        self.metrics = metrics if metrics is not None else MetricsSuite()
+
+        self._executor = None
+        self._slots = None
+        self._loop = None
+        self._pending = set()
+
+        # Telemetry
+        self._stats_lock = threading.Lock()
+        self.encoded = 0
+        self.bytes_written = 0
+        self.encode_time = 0.0
+
+    @property
+    def extension(self):
+        return self.FORMATS[self.fmt]
+
+    def encode_params(self):
+        if self.fmt == "png":
+            return [cv2.IMWRITE_PNG_COMPRESSION, int(self.compression)]
+        elif self.fmt == "jpg":
+            return [cv2.IMWRITE_JPEG_QUALITY, int(self.quality)]
+        elif self.fmt == "webp":
+            return [cv2.IMWRITE_WEBP_QUALITY, int(self.quality)]
+        return []
+
+    def encode(self, pixels, path):
+        """Encodes RGB(A) pixels and writes them to `path`; returns the number of bytes written"""
+        t0 = time.perf_counter()
+
+        if self.fmt == "npy":
+            np.save(path, pixels)
+        else:
+            # Captures are RGBA; OpenCV expects BGR
+            if pixels.ndim == 3 and pixels.shape[2] == 4:
+                pixels = cv2.cvtColor(pixels, cv2.COLOR_RGBA2BGR)
+            elif pixels.ndim == 3 and pixels.shape[2] == 3:
+                pixels = cv2.cvtColor(pixels, cv2.COLOR_RGB2BGR)
+
+            ok, data = cv2.imencode(self.extension, pixels, self.encode_params())
+            if not ok:
+                raise IOError(f"Could not encode {path}")
+
+            with open(path, "wb") as f:
+                f.write(data.tobytes())
+
+        nbytes = os.path.getsize(path)
+        elapsed = time.perf_counter() - t0
+        self.metrics.observe("image_write", elapsed)
+
+        with self._stats_lock:
+            self.encode_time += elapsed
+            self.encoded += 1
+            self.bytes_written += nbytes
+
+        return nbytes
+
+    def _start(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="encoder")
+            self._loop = asyncio.get_event_loop()
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+    async def submit(self, pixels, path):
+        """Queues a frame for encoding, waiting while `max_pending` frames are in flight; returns its future"""
+        self._start()
+        await self._slots.acquire()
+
+        future = self._executor.submit(self.encode, pixels, str(path))
+        self._pending.add(future)
+        future.add_done_callback(self._on_done)
+
+        return future
+
+    def _on_done(self, future):
+        # Called from the worker thread; the semaphore belongs to the main loop
+        self._loop.call_soon_threadsafe(self._release, future)
+
+    def _release(self, future):
+        self._pending.discard(future)
+        self._slots.release()
+
+    async def flush(self):
+        """Waits until every submitted frame has been written"""
+        if self._pending:
+            await asyncio.gather(*[asyncio.wrap_future(f) for f in list(self._pending)])
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self._slots = None
+            self._loop = None
+            self._pending = set()
+
+    def get_stats(self):
+        return {
+            "frames": self.encoded,
+            "bytes": self.bytes_written,
+            "bytes_per_frame": self.bytes_written / self.encoded if self.encoded else 0,
+            "encode_time": self.encode_time,
+            "mean_encode_time": self.encode_time / self.encoded if self.encoded else 0.0,
+        }
+
+
+class TextureWriter:
+    """
+    Writes the plate textures (diffuse + normal map) in a configurable format. Textures are read back by the
+    renderer a moment later, so they rarely need maximum compression. Normal maps always stay lossless:
+    JPEG blocks would show up as bumps on the plate.
+    """
+
+    # name: (diffuse extension, diffuse PIL save options, normal map PIL save options)
+    PRESETS = {
+        "png": (".png", {"format": "PNG", "compress_level": 6}, {"format": "PNG", "compress_level": 6}),
+        "png_fast": (".png", {"format": "PNG", "compress_level": 1}, {"format": "PNG", "compress_level": 1}),
+        "png_raw": (".png", {"format": "PNG", "compress_level": 0}, {"format": "PNG", "compress_level": 0}),
+        "jpeg": (".jpg", {"format": "JPEG", "quality": 95}, {"format": "PNG", "compress_level": 1}),
+    }
+
+    def __init__(self, preset="png"):
+        if preset not in self.PRESETS:
+            raise ValueError(f"Unknown texture preset: {preset}; choose one of {list(self.PRESETS)}")
+
+        self.preset = preset
+        extension, self.diffuse_options, self.normals_options = self.PRESETS[preset]
+
+        # Appended to the per-vehicle texture path
+        self.diffuse_name = "plate" + extension
+        self.normals_name = "plate_normals.png"
+
+    def save(self, diffuse, normals, save_path):
+        """diffuse, normals: PIL images; returns the number of bytes written"""
+        diffuse.save(save_path + self.diffuse_name, **self.diffuse_options)
+        normals.save(save_path + self.normals_name, **self.normals_options)
+
+        return os.path.getsize(save_path + self.diffuse_name) + os.path.getsize(save_path + self.normals_name)
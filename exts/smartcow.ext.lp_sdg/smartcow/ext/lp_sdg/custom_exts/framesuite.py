@@ -0,0 +1,175 @@
+import time
+
+# Key of the viewport's frame info (ViewportAPI.frame_info, also read by the render progress of the viewport HUD)
+# holding the path-tracing subframes accumulated since the last reset
+SUBFRAME_KEY = "subframe_count"
+
+
+def viewport_subframes():
+    """Accumulated subframes of the active viewport's renderer, or None if it does not report them"""
+    from omni.kit.viewport.utility import get_active_viewport
+
+    viewport = get_active_viewport()
+    info = getattr(viewport, "frame_info", None) or {}
+    count = info.get(SUBFRAME_KEY)
+    return int(count) if count is not None else None
+
+
+class FrameSuite:
+    """
+    Waits for the renderer to be ready for capture, instead of sleeping for a fixed amount of time.
+    Two ways of waiting are supported:
+        - a fixed number of app updates (render frames)
+        - until the renderer's accumulated subframe count reaches /rtx/pathtracing/totalSpp
+    Every wait is bounded by a timeout and the time spent waiting is recorded per sample.
+    """
+
+    def __init__(self, update_fn=None, settings=None, subframe_fn=None, timeout=10.0, clock=time.perf_counter):
+        """
+        update_fn: coroutine function awaiting a single app update (default: Kit's next_update_async)
+        settings: carb settings interface used to read the SPP settings (default: carb.settings.get_settings())
+        subframe_fn: callable returning the renderer's accumulated subframe count, or None when unknown
+            (default: viewport_subframes). Without a count, subframes are estimated as the number of updates
+            times /rtx/pathtracing/spp
+        timeout: maximum number of seconds any single wait may take
+        clock: monotonic clock, swappable for a fake one
+        """
+        self._update_fn = update_fn
+        self._settings = settings
+        self._subframe_fn = subframe_fn
+        self._estimating = False
+        self.timeout = timeout
+        self._clock = clock
+
+        # Telemetry
+        self._sample_wait = 0.0
+        self.sample_waits = []
+        self.timeouts = 0
+
+    def _get_update_fn(self):
+        if self._update_fn is None:
+            import omni.kit.app
+
+            self._update_fn = omni.kit.app.get_app().next_update_async
+        return self._update_fn
+
+    def _get_settings(self):
+        if self._settings is None:
+            import carb.settings
+
+            self._settings = carb.settings.get_settings()
+        return self._settings
+
+    def _get_subframe_fn(self):
+        if self._subframe_fn is None:
+            self._subframe_fn = viewport_subframes
+        return self._subframe_fn
+
+    def _subframes(self, updates, spp_per_frame):
+        """Subframes accumulated since the wait started: the renderer's count, else an estimate"""
+        accumulated = self._get_subframe_fn()()
+        if accumulated is not None:
+            return accumulated
+
+        # Warned once per run (see reset_stats): an estimate may capture PathTracing frames before they converged
+        if not self._estimating:
+            print(
+                f"WARNING: the viewport frame info has no '{SUBFRAME_KEY}'; accumulated subframes are estimated from "
+                "/rtx/pathtracing/spp, so path-traced captures may not have converged."
+            )
+            self._estimating = True
+        return updates * spp_per_frame
+
+    async def wait_frames(self, n_frames=1, timeout=None):
+        """Waits for `n_frames` app updates; returns the number of seconds waited"""
+        update_fn = self._get_update_fn()
+        timeout = self.timeout if timeout is None else timeout
+
+        start = self._clock()
+        for _ in range(n_frames):
+            await update_fn()
+
+            if self._clock() - start > timeout:
+                self.timeouts += 1
+                print(f"Frame wait timed out after {timeout}s.")
+                break
+
+        return self._record(self._clock() - start)
+
+    async def wait_subframes(self, total_spp=None, timeout=None):
+        """Waits until `total_spp` subframes have accumulated (default: /rtx/pathtracing/totalSpp)"""
+        settings = self._get_settings()
+        update_fn = self._get_update_fn()
+        timeout = self.timeout if timeout is None else timeout
+
+        if total_spp is None:
+            total_spp = settings.get("/rtx/pathtracing/totalSpp") or 1
+
+        # Subframes rendered per app update
+        spp_per_frame = max(1, settings.get("/rtx/pathtracing/spp") or 1)
+
+        start = self._clock()
+        updates = 0
+        while True:
+            await update_fn()
+            updates += 1
+
+            accumulated = self._subframes(updates, spp_per_frame)
+            if accumulated >= total_spp:
+                break
+
+            if self._clock() - start > timeout:
+                self.timeouts += 1
+                print(f"Subframe wait timed out after {timeout}s ({accumulated}/{total_spp} subframes).")
+                break
+
+        return self._record(self._clock() - start)
+
+    async def wait_until_ready(self, rendermode="PathTracing", n_frames=1, total_spp=None, timeout=None):
+        """Waits for convergence when path tracing, otherwise for a fixed number of frames"""
+        if rendermode == "PathTracing":
+            return await self.wait_subframes(total_spp=total_spp, timeout=timeout)
+        return await self.wait_frames(n_frames=n_frames, timeout=timeout)
+
+    ###############
+    ## TELEMETRY ##
+    ###############
+
+    def _record(self, waited):
+        self._sample_wait += waited
+        return waited
+
+    def end_sample(self):
+        """Closes the current sample; returns the total time waited during it"""
+        waited = self._sample_wait
+        self.sample_waits.append(waited)
+        self._sample_wait = 0.0
+        return waited
+
+    def get_stats(self):
+        """Summary of the per-sample wait times"""
+        if not self.sample_waits:
+            return {
+                "samples": 0,
+                "total": 0.0,
+                "mean": 0.0,
+                "max": 0.0,
+                "timeouts": self.timeouts,
+                "estimated_subframes": self._estimating,
+            }
+
+        total = sum(self.sample_waits)
+        return {
+            "samples": len(self.sample_waits),
+            "total": total,
+            "mean": total / len(self.sample_waits),
+            "max": max(self.sample_waits),
+            "timeouts": self.timeouts,
+            "estimated_subframes": self._estimating,
+        }
+
+    def reset_stats(self):
+        self._sample_wait = 0.0
+        self.sample_waits = []
+        self.timeouts = 0
+        self._estimating = False
@@ -0,0 +1,152 @@
+import bisect
+
+from pxr import Sdf, Tf, Usd
+
+
+class HandleRegistry:
+    """
+    Usd.Prim and Usd.Attribute handles of a stage cached by path, so that the same paths are resolved once instead of
+    on every call. Handles stay valid across value edits; the registry listens to Usd.Notice.ObjectsChanged and drops
+    only the entries at or below resynced paths (prims/properties added, removed or recomposed).
+    Missing prims/attributes are cached too (as invalid handles) until their path is resynced.
+    """
+
+    def __init__(self, stage=None):
+        self.stage = None
+        self._listener = None
+
+        self._prims = {}  # prim path -> Usd.Prim
+        self._attributes = {}  # prim path -> {attribute name -> Usd.Attribute}
+        self._paths = []  # sorted prim paths of both, so that a subtree is one contiguous range
+
+        # Telemetry
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+        if stage is not None:
+            self.attach(stage)
+
+    def attach(self, stage):
+        """Binds the registry to `stage` and starts listening to its changes; previous handles are dropped"""
+        self.detach()
+        self.stage = stage
+        self._listener = Tf.Notice.Register(Usd.Notice.ObjectsChanged, self._on_objects_changed, stage)
+
+    def detach(self):
+        if self._listener is not None:
+            self._listener.Revoke()
+            self._listener = None
+        self.stage = None
+        self.clear()
+
+    def clear(self):
+        self._prims.clear()
+        self._attributes.clear()
+        self._paths.clear()
+
+    def _track(self, key):
+        if key not in self._prims and key not in self._attributes:
+            bisect.insort(self._paths, key)
+
+    def prim(self, path):
+        """Prim at `path` (str or Sdf.Path)"""
+        key = path if isinstance(path, str) else str(path)
+
+        prim = self._prims.get(key)
+        if prim is not None:
+            self.hits += 1
+            return prim
+
+        self.misses += 1
+        prim = self.stage.GetPrimAtPath(key)
+        self._track(key)
+        self._prims[key] = prim
+        return prim
+
+    def attribute(self, path, name):
+        """Attribute `name` of the prim at `path` (str, Sdf.Path or an already-resolved Usd.Prim)"""
+        prim = path if isinstance(path, Usd.Prim) else None
+        key = str(prim.GetPath()) if prim is not None else (path if isinstance(path, str) else str(path))
+
+        attributes = self._attributes.get(key)
+        if attributes is not None:
+            attr = attributes.get(name)
+            if attr is not None:
+                self.hits += 1
+                return attr
+
+        self.misses += 1
+        if prim is None:
+            prim = self._prims.get(key) or self.stage.GetPrimAtPath(key)
+        attr = prim.GetAttribute(name)
+        if attributes is None:
+            self._track(key)
+            attributes = self._attributes[key] = {}
+        attributes[name] = attr
+        return attr
+
+    def invalidate(self, path):
+        """Drops the handles of a property path, or of a prim path and everything below it"""
+        path = Sdf.Path(path) if isinstance(path, str) else path
+
+        if path.IsAbsoluteRootPath():
+            self.invalidations += len(self._paths)
+            self.clear()
+            return
+
+        if path.IsPropertyPath():
+            attributes = self._attributes.get(str(path.GetPrimPath()))
+            if attributes is not None and attributes.pop(path.name, None) is not None:
+                self.invalidations += 1
+            return
+
+        # Prim paths (and anything else, e.g. relationship targets, at the level of their prim)
+        key = str(path.GetPrimPath())
+        prefix = key + "/"
+        start = end = bisect.bisect_left(self._paths, key)
+        while end < len(self._paths) and (self._paths[end] == key or self._paths[end].startswith(prefix)):
+            self._prims.pop(self._paths[end], None)
+            self._attributes.pop(self._paths[end], None)
+            end += 1
+        del self._paths[start:end]
+        self.invalidations += end - start
+
+    def _on_objects_changed(self, notice, sender):
+        # Info-only changes (attribute values, metadata) keep handles valid
+        for path in notice.GetResyncedPaths():
+            self.invalidate(path)
+
+    def get_stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "lookups": lookups,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "prims": len(self._prims),
+            "attributes": sum(len(attributes) for attributes in self._attributes.values()),
+            "invalidations": self.invalidations,
+        }
+
+
+# Shared by every suite; bound to the stage it was last used with
+_registry = HandleRegistry()
+
+
+def get_registry(stage=None):
+    """The shared handle registry, re-attached (and emptied) when `stage` is not the one it is bound to"""
+    if stage is not None and (_registry.stage is None or _registry.stage != stage):
+        _registry.attach(stage)
+    return _registry
+
+
+def resolve_prim(stage, object_path):
+    """Returns the prim at the given path, or the prim itself if an already-resolved Usd.Prim is passed"""
+    if isinstance(object_path, Usd.Prim):
+        return object_path
+
+    return get_registry(stage).prim(object_path)
+
+
+def resolve_attribute(stage, object_path, name):
+    """Returns the attribute `name` of the prim at the given path (or of an already-resolved Usd.Prim)"""
+    return get_registry(stage).attribute(object_path, name)
@@ -7,6 +7,9 @@ import string
 import random
 import glob
 import asyncio
+import threading
+
+from collections import OrderedDict
 
 import cv2
 
@@ -15,6 +18,10 @@ import pandas as pd
 
 from PIL import Image, ImageDraw, ImageFont
 
+from .handlesuite import resolve_prim
+from .metricsuite import MetricsSuite
+from .encodesuite import TextureWriter
+
 
 class IndianLicensePlateGenerator:
     """
@@ -36,8 +43,16 @@ class IndianLicensePlateGenerator:
     SPACERS_2 = np.array(["", " ", "  "])
 
     def __init__(self, working_dir, arm_bg_material, arm_mil_bg_material, arm_height_bg_material, text_width, regions_path="regions.txt",
-                 seed=None):
-        """Entrypoint for LP-SDG extension"""
+                 seed=None, texture_slots=5, metrics=None, texture_preset="png"):
+        """
+        Entrypoint for LP-SDG extension
+        texture_slots: number of per-sample texture sets kept on disk; must cover every sample in flight (texture set
+            names come from a ring of twice that size, so a name is only reused long after its sample is done)
+        metrics: MetricsSuite receiving the plate text/raster/normal map/write timings
+        texture_preset: plate texture format, one of TextureWriter.PRESETS
+        """
+        self.metrics = metrics if metrics is not None else MetricsSuite()
+        self.texture_writer = TextureWriter(texture_preset)
         self.working_dir = str(working_dir)
         self.arm_bg_material = arm_bg_material
         self.arm_mil_bg_material = arm_mil_bg_material
@@ -57,7 +72,11 @@ class IndianLicensePlateGenerator:
         assert len(self.REGIONS), "Regions cannot be empty"
 
         self.FONT = {}
-        self.plate_image_names = []
+        # Sample image name -> name of its texture set, oldest first; prepare_lp runs on worker threads
+        self.texture_sets = OrderedDict()
+        self.texture_slots = texture_slots
+        self._next_slot = 0
+        self._texture_lock = threading.Lock()
 
         # seed random generators
         if seed is not None:
@@ -132,7 +151,11 @@ class IndianLicensePlateGenerator:
         """Helps debug font cache"""
         self.FONT = {}
 
-    async def generate_image(
+    async def generate_image(self, save_path, **kwargs):
+        """Asynchronous wrapper of render_image"""
+        return self.render_image(save_path, **kwargs)
+
+    def render_image(
             self,
             save_path,
             width=675,
@@ -166,6 +189,9 @@ class IndianLicensePlateGenerator:
         lp_type = np.random.choice(list(lp_types.keys()), p=list(lp_types.values()))
         bg_color, text_color = self.COLOR_COMBINATIONS[lp_type]
 
+        # Raster time includes font loading and the (separately timed) text generation
+        raster_start = self.metrics.start()
+
         # create a blank canvas and drawing object
         if lp_type == "arm_height":
             width = 300
@@ -200,7 +226,8 @@ class IndianLicensePlateGenerator:
         font_regular = self.FONT[font_key]
 
         if lp_type == "arm_mil":
-            lp = self.generate_text(lp_type)
+            with self.metrics.timer("plate_text"):
+                lp = self.generate_text(lp_type)
             # Load fonts with different styles and sizes
             font_bold_small = self.load_font(
                 width,
@@ -274,7 +301,8 @@ class IndianLicensePlateGenerator:
                 anchor="ls",
             )
         elif lp_type == "arm_height":
-            lp = self.generate_text(lp_type)
+            with self.metrics.timer("plate_text"):
+                lp = self.generate_text(lp_type)
             first_part, last_part = " ".join(lp.split()[:-1]), lp.split()[-1]
 
             # Get bounding box for the first and last part
@@ -313,7 +341,8 @@ class IndianLicensePlateGenerator:
 
         else:
             # generate single line license plate text
-            lp = self.generate_text(lp_type)
+            with self.metrics.timer("plate_text"):
+                lp = self.generate_text(lp_type)
             draw.text(
                 (width // 2, height // 2),
                 lp,
@@ -323,45 +352,46 @@ class IndianLicensePlateGenerator:
                 anchor="mm",
             )
 
-        # generate normal map
-        normal_map = self.generate_normal_map(
-            cv2.cvtColor(np.array(src), cv2.COLOR_RGB2GRAY),
-            save_path,
-            bluriness=bluriness,
-            sobel=sobel,
-        )
-        normal_map = Image.fromarray(normal_map)
+        self.metrics.stop("plate_raster", raster_start)
 
-        # Save OG License Plate img
-        src.save(save_path + "plate.png", "PNG")
+        # generate normal map
+        with self.metrics.timer("normal_map"):
+            normal_map = self.generate_normal_map(
+                cv2.cvtColor(np.array(src), cv2.COLOR_RGB2GRAY),
+                save_path,
+                bluriness=bluriness,
+                sobel=sobel,
+            )
+            normal_map = Image.fromarray(normal_map)
 
-        # Save generated normal map
-        normal_map.save(save_path + "plate_normals.png", "PNG")
+        # Save OG License Plate img and the generated normal map
+        with self.metrics.timer("png_write"):
+            self.texture_writer.save(src, normal_map, save_path)
 
         return lp, lp_type, (bg_color, text_color)
 
     def assign_texture(self, stage, object_path, material, save_path):
         """Creates and binds the generated LP material to the LP asset"""
-        mtl_prim = stage.GetPrimAtPath(material)
+        mtl_prim = resolve_prim(stage, material)
 
         # Set material inputs, these can be determined by looking at the .mdl file
         # or by selecting the Shader attached to the Material in the stage window and looking at the details panel
         omni.usd.create_material_input(
             mtl_prim,
             "diffuse_texture",
-            save_path + "plate.png",
+            save_path + self.texture_writer.diffuse_name,
             Sdf.ValueTypeNames.Asset,
         )
 
         omni.usd.create_material_input(
             mtl_prim,
             "normalmap_texture",
-            save_path + "plate_normals.png",
+            save_path + self.texture_writer.normals_name,
             Sdf.ValueTypeNames.Asset,
         )
 
         # Get the path to the prim
-        prim = stage.GetPrimAtPath(object_path)
+        prim = resolve_prim(stage, object_path)
 
         # Bind the material to the prim
         prim_mat_shade = UsdShade.Material(mtl_prim)
@@ -369,7 +399,7 @@ class IndianLicensePlateGenerator:
         UsdShade.MaterialBindingAPI(prim).Bind(prim_mat_shade, UsdShade.Tokens.strongerThanDescendants)
 
     def set_size_position(self, stage, object_path, scale, position):
-        prim = stage.GetPrimAtPath(object_path)
+        prim = resolve_prim(stage, object_path)
         if prim.IsA(UsdGeom.Xformable):
             xformable = UsdGeom.Xformable(prim)
 
@@ -400,16 +430,16 @@ class IndianLicensePlateGenerator:
             translate_op.Set(translation_value)
 
     def remove_dirt(self, stage, object_path):
-        prim = stage.GetPrimAtPath(object_path)
+        prim = resolve_prim(stage, object_path)
         if prim and prim.IsValid():
-            prim.GetStage().RemovePrim(object_path)
+            prim.GetStage().RemovePrim(prim.GetPath())
 
     def set_lp_bg(self, stage, object_path, material):
         """Binds selected LP material to the select LP object"""
-        mtl_prim = stage.GetPrimAtPath(material)
+        mtl_prim = resolve_prim(stage, material)
 
         # Get the path to the prim
-        prim = stage.GetPrimAtPath(object_path)
+        prim = resolve_prim(stage, object_path)
 
         # Bind the material to the prim
         prim_mat_shade = UsdShade.Material(mtl_prim)
@@ -419,7 +449,7 @@ class IndianLicensePlateGenerator:
     async def make_lp(
             self,
             stage,
-            vehicle_path,
+            vehicle,
             im_width,
             im_height,
             save_path,
@@ -433,21 +463,68 @@ class IndianLicensePlateGenerator:
             multiline=False,
             show_lp_text=True,
     ):
-        """Creates and binds the license plate images to the correct regions"""
+        """
+        Creates and binds the license plate images to the correct regions
+        vehicle: the VehicleEntry (see vehiclesuite.py) holding the resolved plate prims of the vehicle
+        """
+        save_path, lp_text, lp_type = self.prepare_lp(
+            save_path,
+            im_width,
+            im_height,
+            lp_types,
+            font_file,
+            image_name,
+            bluriness=bluriness,
+            sobel=sobel,
+            padding=padding,
+            linespace=linespace,
+            multiline=multiline,
+        )
+
+        self.apply_lp(stage, vehicle, save_path, lp_type)
+
+        # if show_lp_text:
+        #     print(f"License Plate Text: {lp_text}")
+
+        return lp_text
+
+    def prepare_lp(
+            self,
+            save_path,
+            im_width,
+            im_height,
+            lp_types,
+            font_file,
+            image_name,
+            bluriness=0,
+            sobel=0,
+            padding=12,
+            linespace=0,
+            multiline=False,
+    ):
+        """
+        Generates the license plate textures on disk; does no USD work, so it can run off the main loop
+        Returns the texture save path, the plate text and the plate type
+        """
+
+        prepare_start = self.metrics.start()
 
         # print("Generating License Plates")
-        image_name = "image" + str(int(image_name.split('.')[0]) % 10) + "_"
-        save_path = os.path.join(os.path.dirname(save_path), image_name + os.path.basename(save_path))
-        if image_name not in self.plate_image_names:
-            if len(self.plate_image_names) == 5:
-                del_image_name = self.plate_image_names[0]
-                for i in range(len(self.Vehicle_paths)):
-                    del_image_path = os.path.join(os.path.dirname(save_path), del_image_name + str(i)) + "_"
-                    os.remove(del_image_path + "plate.png")
-                    os.remove(del_image_path + "plate_normals.png")
-                del self.plate_image_names[0]
-            self.plate_image_names.append(image_name)
-        lp_text, lp_type, (bg_color, text_color) = await self.generate_image(
+        # Texture sets are taken from the ring in plan order, not by sample index (which skips ahead on resumed
+        # runs), so a set is never handed out again while its sample is in flight
+        with self._texture_lock:
+            texture_set = self.texture_sets.get(image_name)
+            if texture_set is None:
+                texture_set = "image" + str(self._next_slot % (2 * self.texture_slots)) + "_"
+                self._next_slot += 1
+                self.texture_sets[image_name] = texture_set
+
+                # Keep the textures of the last `texture_slots` samples only
+                if len(self.texture_sets) > self.texture_slots:
+                    _, del_texture_set = self.texture_sets.popitem(last=False)
+                    self._remove_textures(os.path.dirname(save_path), del_texture_set)
+        save_path = os.path.join(os.path.dirname(save_path), texture_set + os.path.basename(save_path))
+        lp_text, lp_type, (bg_color, text_color) = self.render_image(
             save_path,
             width=im_width,
             height=im_height,
@@ -461,23 +538,40 @@ class IndianLicensePlateGenerator:
         )
 
         # print("License Plates Generated!")
-
-        # Retrieval of vehicle and LP prims, bboxes
-        lp_prim_f = vehicle_path + "/NumberPlateAsset_F/LP"
-        bg_prim_f = vehicle_path + "/NumberPlateAsset_F/NumberPlate"
-        holder_prim_f = vehicle_path + "/NumberPlateAsset_F/LP_Holder/LP_Holder_Long"
-        scratches_prim_f = vehicle_path + "/NumberPlateAsset_F/Damage_Scratches"
-
-        lp_prim_r = vehicle_path + "/NumberPlateAsset_R/LP"
-        bg_prim_r = vehicle_path + "/NumberPlateAsset_R/NumberPlate"
-        holder_prim_r = vehicle_path + "/NumberPlateAsset_R/LP_Holder/LP_Holder_Long"
-        scratches_prim_r = vehicle_path + "/NumberPlateAsset_R/Damage_Scratches"
-
-        plate_dirt_f_path = vehicle_path + "/NumberPlateAsset_F/Damage_Dirt"
-        plate_dirt_r_path = vehicle_path + "/NumberPlateAsset_R/Damage_Dirt"
+        self.metrics.stop("prepare_lp", prepare_start)
+
+        return save_path, lp_text, lp_type
+
+    def _remove_textures(self, texture_dir, texture_set):
+        """Deletes the plate textures of a texture set; vehicles its sample did not show have none"""
+        for i in range(len(self.Vehicle_paths)):
+            del_image_path = os.path.join(texture_dir, texture_set + str(i)) + "_"
+            for name in (self.texture_writer.diffuse_name, self.texture_writer.normals_name):
+                try:
+                    os.remove(del_image_path + name)
+                except FileNotFoundError:
+                    pass
+
+    def apply_lp(self, stage, vehicle, save_path, lp_type):
+        """Binds the generated textures to a vehicle and fits the plate parts to the plate type"""
+        apply_start = self.metrics.start()
+
+        # Retrieval of vehicle and LP prims, resolved once in the vehicle registry
+        lp_prim_f = vehicle.front["lp"]
+        bg_prim_f = vehicle.front["plate"]
+        holder_prim_f = vehicle.front["holder"]
+        scratches_prim_f = vehicle.front["scratches"]
+
+        lp_prim_r = vehicle.rear["lp"]
+        bg_prim_r = vehicle.rear["plate"]
+        holder_prim_r = vehicle.rear["holder"]
+        scratches_prim_r = vehicle.rear["scratches"]
+
+        plate_dirt_f_path = vehicle.front["dirt"]
+        plate_dirt_r_path = vehicle.rear["dirt"]
 
         # Shared Materials Scope with an OmniPBR material assigned to it
-        pbr_path = vehicle_path + "/Shared_Materials/OmniPBR"
+        pbr_path = vehicle.pbr_material
 
         # CONNECT PLATEGENERATOR TO TEXTURE!!!!
         self.assign_texture(
@@ -534,12 +628,9 @@ class IndianLicensePlateGenerator:
         self.set_size_position(stage, object_path=holder_prim_r, scale=scale_holder, position=position_holder)
         self.set_size_position(stage, object_path=scratches_prim_f, scale=scale_scratch, position=position_scratch)
         self.set_size_position(stage, object_path=scratches_prim_r, scale=scale_scratch, position=position_scratch)
-        if vehicle_path not in self.Vehicle_paths:
+        if vehicle.path not in self.Vehicle_paths:
             self.remove_dirt(stage, plate_dirt_f_path)
             self.remove_dirt(stage, plate_dirt_r_path)
-            self.Vehicle_paths.append(vehicle_path)
+            self.Vehicle_paths.append(vehicle.path)
 
-        # if show_lp_text:
-        #     print(f"License Plate Text: {lp_text}")
-
-        return lp_text
+        self.metrics.stop("apply_lp", apply_start)
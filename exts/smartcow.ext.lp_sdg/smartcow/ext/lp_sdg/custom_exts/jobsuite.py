@@ -0,0 +1,117 @@
+import json
+import os
+
+
+class JobSpec:
+    """
+    Everything a headless generation run needs, read from a JSON job file, e.g.
+
+        {
+            "scene": "usd_scene/Collected_scene/scene.usd",
+            "samples": 5000,
+            "resolution": [1280, 720],
+            "spp": 128,
+            "rendermode": "PathTracing",
+            "pathtracing_ratio": 0.3,
+            "plate_probabilities": {"arm": 0.2, "arm_mil": 0.2, "arm_height": 0.6},
+            "output_dir": "/data/run_01",
+            "seed": 42
+        }
+
+    Fields left out keep the defaults of settings.py. Relative output paths are relative to the job file.
+    `pathtracing_ratio` mixes render modes per sample (see RENDERMODE_MIX); `rendermode` is then unused.
+    """
+
+    RENDERMODES = ("PathTracing", "RayTracedLighting")
+
+    FIELDS = (
+        "scene",
+        "samples",
+        "start_index",
+        "resolution",
+        "spp",
+        "rendermode",
+        "pathtracing_ratio",
+        "plate_probabilities",
+        "output_dir",
+        "seed",
+        "resume",
+    )
+
+    def __init__(self, **fields):
+        unknown = set(fields) - set(self.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown job fields: {sorted(unknown)}; expected some of {list(self.FIELDS)}")
+
+        self.scene = fields.get("scene")
+        self.samples = fields.get("samples")
+        self.start_index = fields.get("start_index", 0)
+        self.resolution = fields.get("resolution")
+        self.spp = fields.get("spp")
+        self.rendermode = fields.get("rendermode")
+        self.pathtracing_ratio = fields.get("pathtracing_ratio")
+        self.plate_probabilities = fields.get("plate_probabilities")
+        self.output_dir = fields.get("output_dir")
+        self.seed = fields.get("seed")
+        self.resume = fields.get("resume")
+
+        self.validate()
+
+    @classmethod
+    def from_file(cls, path, plate_types=None):
+        """plate_types: plate types of the generator; when given, plate_probabilities may only name those"""
+        with open(path, "r") as f:
+            fields = json.load(f)
+
+        # Relative outputs follow the job file, not the working directory of Kit
+        if fields.get("output_dir") and not os.path.isabs(fields["output_dir"]):
+            fields["output_dir"] = os.path.join(os.path.dirname(os.path.abspath(path)), fields["output_dir"])
+
+        job = cls(**fields)
+        if plate_types is not None:
+            job.validate_plate_types(plate_types)
+        return job
+
+    def validate(self):
+        if self.samples is not None and (not isinstance(self.samples, int) or self.samples <= 0):
+            raise ValueError(f"samples must be a positive integer, got {self.samples!r}")
+
+        if not isinstance(self.start_index, int) or self.start_index < 0:
+            raise ValueError(f"start_index must be a non-negative integer, got {self.start_index!r}")
+
+        if self.resolution is not None:
+            if len(self.resolution) != 2 or any(not isinstance(v, int) or v <= 0 for v in self.resolution):
+                raise ValueError(f"resolution must be [width, height], got {self.resolution!r}")
+            self.resolution = tuple(self.resolution)
+
+        if self.spp is not None and (not isinstance(self.spp, int) or self.spp <= 0):
+            raise ValueError(f"spp must be a positive integer, got {self.spp!r}")
+
+        if self.rendermode is not None and self.rendermode not in self.RENDERMODES:
+            raise ValueError(f"rendermode must be one of {self.RENDERMODES}, got {self.rendermode!r}")
+
+        if self.pathtracing_ratio is not None and not (
+            isinstance(self.pathtracing_ratio, (int, float)) and 0.0 <= self.pathtracing_ratio <= 1.0
+        ):
+            raise ValueError(f"pathtracing_ratio must be within [0, 1], got {self.pathtracing_ratio!r}")
+
+        if self.plate_probabilities is not None:
+            probs = self.plate_probabilities
+            if not probs or any(p < 0 for p in probs.values()) or sum(probs.values()) <= 0:
+                raise ValueError(f"plate_probabilities must be non-negative with a positive sum, got {probs!r}")
+
+            # np.random.choice needs probabilities summing to exactly 1
+            total = float(sum(probs.values()))
+            self.plate_probabilities = {k: p / total for k, p in probs.items()}
+
+        if self.seed is not None and not isinstance(self.seed, int):
+            raise ValueError(f"seed must be an integer, got {self.seed!r}")
+
+    def validate_plate_types(self, plate_types):
+        if self.plate_probabilities is not None:
+            unknown = set(self.plate_probabilities) - set(plate_types)
+            if unknown:
+                raise ValueError(f"Unknown plate types {sorted(unknown)}; choose from {list(plate_types)}")
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
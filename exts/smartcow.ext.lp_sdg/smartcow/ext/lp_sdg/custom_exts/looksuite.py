@@ -6,6 +6,8 @@ import math
 
 from pxr import UsdShade, Sdf
 
+from .handlesuite import resolve_prim
+
 
 class LooksSuite:
     """
@@ -26,7 +28,7 @@ class LooksSuite:
         Outputs:
             None.
         """
-        obj = stage.GetPrimAtPath(path)
+        obj = resolve_prim(stage, path)
 
         mtl_created = []
 
@@ -45,10 +47,10 @@ class LooksSuite:
         omni.kit.commands.execute("BindMaterial", prim_path=obj.GetPath(), material_path=mtl_path)
 
     def bind_material(self, stage, object_path, mat_path):
-        mtl_prim = stage.GetPrimAtPath(mat_path)
+        mtl_prim = resolve_prim(stage, mat_path)
 
         # Get the path to the prim
-        prim = stage.GetPrimAtPath(object_path)
+        prim = resolve_prim(stage, object_path)
 
         # Bind the material to the prim
         prim_mat_shade = UsdShade.Material(mtl_prim)
@@ -56,14 +58,14 @@ class LooksSuite:
         UsdShade.MaterialBindingAPI(prim).Bind(prim_mat_shade, UsdShade.Tokens.strongerThanDescendants)
 
     def unbind_materials(self, stage, path):
-        prim = stage.GetPrimAtPath(path)
+        prim = resolve_prim(stage, path)
 
         if prim.IsValid():
             # Unbind Material.
             UsdShade.MaterialBindingAPI(prim).UnbindAllBindings()
 
     def get_material(self, stage, path):
-        prim = stage.GetPrimAtPath(path)
+        prim = resolve_prim(stage, path)
 
         # Get Material.
         rel = UsdShade.MaterialBindingAPI(prim).GetDirectBindingRel()
@@ -72,11 +74,11 @@ class LooksSuite:
         for mTargetPath in pathList:
             print("  material : " + mTargetPath.pathString)
 
-            material = UsdShade.Material(stage.GetPrimAtPath(mTargetPath))
+            material = UsdShade.Material(resolve_prim(stage, mTargetPath))
             print(material)
 
     def assign_texture_with_normals(self, stage, object_path, material, tex_path, normal_path):
-        mtl_prim = stage.GetPrimAtPath(material)
+        mtl_prim = resolve_prim(stage, material)
 
         # Set material inputs, these can be determined by looking at the .mdl file
         # or by selecting the Shader attached to the Material in the stage window and looking at the details panel
@@ -95,7 +97,7 @@ class LooksSuite:
         )
 
         # Get the path to the prim
-        prim = stage.GetPrimAtPath(object_path)
+        prim = resolve_prim(stage, object_path)
 
         # Bind the material to the prim
         prim_mat_shade = UsdShade.Material(mtl_prim)
@@ -103,7 +105,7 @@ class LooksSuite:
         UsdShade.MaterialBindingAPI(prim).Bind(prim_mat_shade, UsdShade.Tokens.strongerThanDescendants)
 
     def modify_float_parameter(self, stage, object_path, mat_path, param_name, param_value):
-        mtl_prim = stage.GetPrimAtPath(mat_path)
+        mtl_prim = resolve_prim(stage, mat_path)
 
         omni.usd.create_material_input(
             mtl_prim,
@@ -113,7 +115,7 @@ class LooksSuite:
         )
 
         # Get the path to the prim
-        prim = stage.GetPrimAtPath(object_path)
+        prim = resolve_prim(stage, object_path)
 
         # Bind the material to the prim
         prim_mat_shade = UsdShade.Material(mtl_prim)
@@ -0,0 +1,104 @@
+import json
+import os
+
+
+def _to_json(value):
+    # numpy scalars (bounding boxes, ids) -> plain Python values
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class SampleManifest:
+    """
+    Append-only record of every committed sample (index, seed, images and annotation rows), one JSON line each.
+    A sample is only written here once its images and annotations are on disk, so after a crash the run can
+    continue with the indices that are missing from the manifest.
+    """
+
+    def __init__(self, path, sync_every=1):
+        """
+        path: manifest file, usually next to the generated data
+        sync_every: fsync the manifest every N committed samples (a checkpoint); 1 = after every sample
+        """
+        self.path = str(path)
+        self.sync_every = max(1, int(sync_every))
+
+        self.records = {}
+        self._file = None
+        self._unsynced = 0
+
+    def load(self):
+        """Reads the committed samples; returns their number"""
+        self.records = {}
+
+        if not os.path.exists(self.path):
+            return 0
+
+        truncated = False
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Only the last line can be incomplete (crash while appending)
+                    truncated = True
+                    break
+                self.records[record["index"]] = record
+
+        if truncated:
+            self._rewrite()
+
+        return len(self.records)
+
+    def _rewrite(self):
+        """Drops an incomplete trailing line by rewriting the complete records"""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            for record in self.records.values():
+                f.write(json.dumps(record, default=_to_json) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def is_done(self, index):
+        return index in self.records
+
+    def missing(self, start, end):
+        """Indices in [start, end) that still have to be generated"""
+        return [i for i in range(start, end) if i not in self.records]
+
+    def committed_images(self):
+        """Image names of all committed samples, as written to disk and as referenced by their annotations"""
+        images = set()
+        for record in self.records.values():
+            images.update(record["images"])
+            images.update(row.get("Image") for row in record["annotations"])
+        return images
+
+    def commit(self, index, seed, images, annotations):
+        """Appends a finished sample; `annotations` is a list of annotation rows (dicts)"""
+        record = {"index": index, "seed": seed, "images": list(images), "annotations": annotations}
+
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a")
+
+        self._file.write(json.dumps(record, default=_to_json) + "\n")
+        self._file.flush()
+        self.records[index] = record
+
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every:
+            self.sync()
+
+    def sync(self):
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
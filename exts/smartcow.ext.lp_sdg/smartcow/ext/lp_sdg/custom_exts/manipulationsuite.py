@@ -1,15 +1,32 @@
 import omni
-from pxr import Usd, UsdGeom, Gf
+from pxr import Sdf, Usd, UsdGeom, Gf
 
 import numpy as np
 
+from .handlesuite import resolve_attribute, resolve_prim
+
 
 class ManipulationSuite:
     """
     All object manipulation capabilities that can be used within a scene.
     """
 
+    # Value type of each xform op attribute type
+    _VEC3_TYPES = {
+        Sdf.ValueTypeNames.Float3: Gf.Vec3f,
+        Sdf.ValueTypeNames.Double3: Gf.Vec3d,
+        Sdf.ValueTypeNames.Half3: Gf.Vec3h,
+    }
+
     def __init__(self):
+        # Resolved xform op attributes of the batched setters: (prim path, op) -> (attribute, value type)
+        self._xform_ops = {}
+        self._xform_stage = None
+
+        # Telemetry
+        self.op_hits = 0
+        self.op_misses = 0
+
         print("Initialized Manipulation Tool.")
 
     def create_prim(self, stage, path, prim_type="Cube"):
@@ -63,42 +80,43 @@ class ManipulationSuite:
     #######################################
 
     def get_transformation(self, stage, object_path):
-        prim = stage.GetPrimAtPath(object_path)
+        prim = resolve_prim(stage, object_path)
 
         if prim.IsValid() == True:
-            return prim.GetAttribute("xformOpOrder").Get()
+            return resolve_attribute(stage, prim, "xformOpOrder").Get()
 
     def set_transformation(self, stage, object_path, new_transform):
-        prim = stage.GetPrimAtPath(object_path)
+        prim = resolve_prim(stage, object_path)
 
         if prim.IsValid() == True:
-            return prim.GetAttribute("xformOpOrder").Set(new_transform)
+            return resolve_attribute(stage, prim, "xformOpOrder").Set(new_transform)
 
     def get_translation(self, stage, object_path):
-        prim = stage.GetPrimAtPath(object_path)
+        prim = resolve_prim(stage, object_path)
 
         if prim.IsValid() == True:
-            return prim.GetAttribute("xformOp:translate").Get()
+            return resolve_attribute(stage, prim, "xformOp:translate").Get()
 
     def set_translation(self, stage, object_path, new_translation):
-        prim = stage.GetPrimAtPath(object_path)
+        prim = resolve_prim(stage, object_path)
 
         if prim.IsValid() == True:
-            trans = prim.GetAttribute("xformOp:translate").Get()
+            attr = resolve_attribute(stage, prim, "xformOp:translate")
+            trans = attr.Get()
 
             if trans != None:
                 # Specify a value for each type.
                 if type(trans) == Gf.Vec3f:
-                    prim.GetAttribute("xformOp:translate").Set(Gf.Vec3f(new_translation))
+                    attr.Set(Gf.Vec3f(new_translation))
                 elif type(trans) == Gf.Vec3d:
-                    prim.GetAttribute("xformOp:translate").Set(Gf.Vec3d(new_translation))
+                    attr.Set(Gf.Vec3d(new_translation))
             else:
                 # xformOpOrder is also updated.
                 xformAPI = UsdGeom.XformCommonAPI(prim)
                 xformAPI.SetTranslate(Gf.Vec3d(new_translation))
 
     def get_rotation(self, stage, object_path):
-        prim = stage.GetPrimAtPath(object_path)
+        prim = resolve_prim(stage, object_path)
 
         if prim.IsValid() == True:
             xformAPI = UsdGeom.XformCommonAPI(prim)
@@ -110,12 +128,12 @@ class ManipulationSuite:
             rotateAttrName = "xformOp:" + UsdGeom.XformOp.GetOpTypeToken(t)
 
             # Set rotate.
-            rotate = prim.GetAttribute(rotateAttrName).Get()
+            rotate = resolve_attribute(stage, prim, rotateAttrName).Get()
 
             return rotate
 
     def set_rotation(self, stage, object_path, new_rotation):
-        prim = stage.GetPrimAtPath(object_path)
+        prim = resolve_prim(stage, object_path)
 
         if prim.IsValid() == True:
             xformAPI = UsdGeom.XformCommonAPI(prim)
@@ -127,53 +145,154 @@ class ManipulationSuite:
             rotateAttrName = "xformOp:" + UsdGeom.XformOp.GetOpTypeToken(t)
 
             # Set rotate.
-            rotate = prim.GetAttribute(rotateAttrName).Get()
+            attr = resolve_attribute(stage, prim, rotateAttrName)
+            rotate = attr.Get()
 
             if rotate != None:
                 # Specify a value for each type.
                 if type(rotate) == Gf.Vec3f:
-                    prim.GetAttribute(rotateAttrName).Set(Gf.Vec3f(new_rotation))
+                    attr.Set(Gf.Vec3f(new_rotation))
                 elif type(rotate) == Gf.Vec3d:
-                    prim.GetAttribute(rotateAttrName).Set(Gf.Vec3d(new_rotation))
+                    attr.Set(Gf.Vec3d(new_rotation))
             else:
                 # xformOpOrder is also updated.
                 xformAPI.SetRotate(Gf.Vec3f(new_rotation), rotOrder)
 
     def get_scale(self, stage, object_path):
-        prim = stage.GetPrimAtPath(object_path)
+        prim = resolve_prim(stage, object_path)
 
         if prim.IsValid() == True:
-            return prim.GetAttribute("xformOp:scale").Get()
+            return resolve_attribute(stage, prim, "xformOp:scale").Get()
 
     def set_scale(self, stage, object_path, new_scale):
-        prim = stage.GetPrimAtPath(object_path)
+        prim = resolve_prim(stage, object_path)
 
         if prim.IsValid() == True:
-            scale = prim.GetAttribute("xformOp:scale").Get()
+            attr = resolve_attribute(stage, prim, "xformOp:scale")
+            scale = attr.Get()
 
             if scale != None:
                 # Specify a value for each type.
                 if type(scale) == Gf.Vec3f:
-                    prim.GetAttribute("xformOp:scale").Set(Gf.Vec3f(new_scale))
+                    attr.Set(Gf.Vec3f(new_scale))
                 elif type(scale) == Gf.Vec3d:
-                    prim.GetAttribute("xformOp:scale").Set(Gf.Vec3d(new_scale))
+                    attr.Set(Gf.Vec3d(new_scale))
             else:
                 # xformOpOrder is also updated.
                 xformAPI = UsdGeom.XformCommonAPI(prim)
                 xformAPI.SetScale(Gf.Vec3f(new_scale))
 
+    #############################
+    ## BATCHED TRANSFORMATIONS ##
+    #############################
+
+    def _resolve_xform_op(self, stage, object_path, op):
+        """
+        Attribute and value type of the translate/rotate/scale op of a prim, resolved once and cached.
+        Missing ops are added through XformCommonAPI (as the single setters do); returns None for invalid prims.
+        """
+        key = (str(object_path), op)
+        cached = self._xform_ops.get(key)
+        if cached is not None and cached[0].IsValid():
+            self.op_hits += 1
+            return cached
+
+        self.op_misses += 1
+        prim = resolve_prim(stage, object_path)
+        if not prim.IsValid():
+            return None
+
+        xformAPI = UsdGeom.XformCommonAPI(prim)
+        if op == "rotate":
+            _, _, _, _, rotOrder = xformAPI.GetXformVectors(Usd.TimeCode.Default())
+            attr_name = "xformOp:" + UsdGeom.XformOp.GetOpTypeToken(xformAPI.ConvertRotationOrderToOpType(rotOrder))
+        else:
+            attr_name = "xformOp:" + op
+
+        attr = prim.GetAttribute(attr_name)
+        if not attr.IsValid():
+            # xformOpOrder is also updated.
+            if op == "translate":
+                xformAPI.SetTranslate(Gf.Vec3d(0, 0, 0))
+            elif op == "rotate":
+                xformAPI.SetRotate(Gf.Vec3f(0, 0, 0), rotOrder)
+            else:
+                xformAPI.SetScale(Gf.Vec3f(1, 1, 1))
+            attr = prim.GetAttribute(attr_name)
+
+        cached = self._xform_ops[key] = (attr, self._VEC3_TYPES.get(attr.GetTypeName(), Gf.Vec3d))
+        return cached
+
+    def set_transforms(self, stage, object_paths, translations=None, rotations=None, scales=None):
+        """
+        Batched set_translation/set_rotation/set_scale of many prims.
+        Inputs:
+            stage: The name of the world the objects belong to.
+            object_paths: Paths (or prims) of the objects.
+            translations, rotations, scales: One XYZ value per object (N x 3 array or list), or None to leave as is.
+        Outputs:
+            count: The number of values written.
+
+        Xform ops are resolved (and added if missing) once per prim and cached; all values are then written inside
+        one Sdf.ChangeBlock, so the stage recomposes and notifies once for the whole batch.
+        """
+        if stage != self._xform_stage:
+            self.clear_xform_cache()
+            self._xform_stage = stage
+
+        writes = []
+        for op, values in (("translate", translations), ("rotate", rotations), ("scale", scales)):
+            if values is None:
+                continue
+            values = np.asarray(values, dtype=np.float64).reshape(-1, 3)
+            if len(values) != len(object_paths):
+                raise ValueError(f"{len(values)} {op} values for {len(object_paths)} objects")
+
+            # Resolve outside the change block: adding ops reads back the composed stage
+            for object_path, value in zip(object_paths, values.tolist()):
+                resolved = self._resolve_xform_op(stage, object_path, op)
+                if resolved is not None:
+                    writes.append((resolved[0], resolved[1](*value)))
+
+        with Sdf.ChangeBlock():
+            for attr, value in writes:
+                attr.Set(value)
+
+        return len(writes)
+
+    def set_translations(self, stage, object_paths, new_translations):
+        return self.set_transforms(stage, object_paths, translations=new_translations)
+
+    def set_rotations(self, stage, object_paths, new_rotations):
+        return self.set_transforms(stage, object_paths, rotations=new_rotations)
+
+    def set_scales(self, stage, object_paths, new_scales):
+        return self.set_transforms(stage, object_paths, scales=new_scales)
+
+    def clear_xform_cache(self):
+        self._xform_ops.clear()
+
+    def get_stats(self):
+        lookups = self.op_hits + self.op_misses
+        return {
+            "op_lookups": lookups,
+            "op_hit_rate": self.op_hits / lookups if lookups else 0.0,
+            "cached_ops": len(self._xform_ops),
+        }
+
     ##################################
     ## SCENE MANIPULATION FUNCTIONS ##
     ##################################
 
     # ADJUST WHETHER AN OBJECT IS VISIBLE OR NOT
     def toggle_visibility(self, stage, object_path, is_visible=False):
-        prim = stage.GetPrimAtPath(object_path)
+        prim = resolve_prim(stage, object_path)
 
+        visibility = resolve_attribute(stage, prim, "visibility")
         if is_visible:
-            prim.GetAttribute("visibility").Set("inherited")
+            visibility.Set("inherited")
         elif not is_visible:
-            prim.GetAttribute("visibility").Set("invisible")
+            visibility.Set("invisible")
 
     # DELETION OF PRIMS WITHIN THE OMNIVERSE SCENE
     def delete_object(self, stage, object):
@@ -190,7 +309,7 @@ class ManipulationSuite:
 
     def calculate_bbox(self, stage, object_path, local=False, isRange=True, return_raw=False):
         # Get object at path
-        prim = stage.GetPrimAtPath(object_path)
+        prim = resolve_prim(stage, object_path)
 
         # Fetch bounding box coordinates from the primitive
         # bbox_cache = UsdGeom.BBoxCache(Usd.TimeCode.Default(), includedPurposes=[UsdGeom.Tokens.default_])
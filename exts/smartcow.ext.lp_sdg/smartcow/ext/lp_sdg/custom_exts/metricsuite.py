@@ -0,0 +1,218 @@
+import bisect
+import json
+import os
+import threading
+import time
+
+
+class Histogram:
+    """Latency histogram with fixed (Prometheus-style) bucket bounds in seconds"""
+
+    BOUNDS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self):
+        # One bucket per bound plus +Inf
+        self.buckets = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, seconds):
+        self.buckets[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def quantile(self, q):
+        """Upper bucket bound holding the q-th quantile (the usual histogram_quantile approximation)"""
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return self.BOUNDS[i] if i < len(self.BOUNDS) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "min": self.min or 0.0,
+            "max": self.max or 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": {str(b): n for b, n in zip(self.BOUNDS + ("+Inf",), self.buckets)},
+        }
+
+
+class _NullTimer:
+    """Timer handed out while metrics are disabled; does nothing"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.stop(self.name, self.start)
+        return False
+
+
+class MetricsSuite:
+    """
+    Per-stage latency histograms and sample throughput, exported periodically as JSON and Prometheus text.
+    Timed stages are also recorded as spans by an attached, enabled TraceSuite.
+    While both are disabled, `timer` returns a shared no-op and `start` returns None, so instrumented code costs
+    two attribute checks.
+
+        with metrics.timer("capture"):
+            ...
+
+        t0 = metrics.start()
+        ...
+        metrics.stop("normal_map", t0)
+    """
+
+    def __init__(self, enabled=False, export_dir=None, export_interval=30.0, prefix="lp_sdg", tracer=None):
+        """
+        export_dir: directory receiving metrics.json and metrics.prom (None = no files)
+        export_interval: minimum number of seconds between two periodic exports
+        tracer: optional TraceSuite receiving every timed stage
+        """
+        self.enabled = enabled
+        self.tracer = tracer
+        self.export_dir = export_dir
+        self.export_interval = export_interval
+        self.prefix = prefix
+
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.samples = 0
+            self.started = time.perf_counter()
+            self._last_export = self.started
+
+    @property
+    def tracing(self):
+        return self.tracer is not None and self.tracer.enabled
+
+    def timer(self, name):
+        if not (self.enabled or self.tracing):
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def start(self):
+        return time.perf_counter() if self.enabled or self.tracing else None
+
+    def stop(self, name, start):
+        if start is None:
+            return
+
+        end = time.perf_counter()
+        self.observe(name, end - start)
+        if self.tracing:
+            self.tracer.complete(name, start, end)
+
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def count_sample(self, n=1):
+        """Counts finished samples and exports if the export interval has passed"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.samples += n
+            due = time.perf_counter() - self._last_export >= self.export_interval
+        if due:
+            self.export()
+
+    @property
+    def samples_per_second(self):
+        elapsed = time.perf_counter() - self.started
+        return self.samples / elapsed if elapsed > 0 else 0.0
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "samples": self.samples,
+                "elapsed": time.perf_counter() - self.started,
+                "samples_per_second": self.samples_per_second,
+                "stages": {name: h.to_dict() for name, h in sorted(self.histograms.items())},
+            }
+
+    def to_prometheus(self):
+        """Prometheus text exposition format"""
+        metric = f"{self.prefix}_stage_seconds"
+        lines = [
+            f"# HELP {metric} Latency of a generation stage in seconds.",
+            f"# TYPE {metric} histogram",
+        ]
+
+        with self._lock:
+            for name, h in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, n in zip(Histogram.BOUNDS + ("+Inf",), h.buckets):
+                    cumulative += n
+                    lines.append(f'{metric}_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{stage="{name}"}} {h.sum}')
+                lines.append(f'{metric}_count{{stage="{name}"}} {h.count}')
+
+            lines += [
+                f"# HELP {self.prefix}_samples_total Samples generated in this run.",
+                f"# TYPE {self.prefix}_samples_total counter",
+                f"{self.prefix}_samples_total {self.samples}",
+                f"# HELP {self.prefix}_samples_per_second Mean sample throughput of this run.",
+                f"# TYPE {self.prefix}_samples_per_second gauge",
+                f"{self.prefix}_samples_per_second {self.samples_per_second}",
+            ]
+
+        return "\n".join(lines) + "\n"
+
+    def export(self):
+        """Writes metrics.json and metrics.prom; files are replaced atomically so scrapers never see half a file"""
+        if not self.enabled or self.export_dir is None:
+            return
+
+        os.makedirs(self.export_dir, exist_ok=True)
+        self._write(os.path.join(self.export_dir, "metrics.json"), json.dumps(self.snapshot(), indent=2))
+        self._write(os.path.join(self.export_dir, "metrics.prom"), self.to_prometheus())
+
+        with self._lock:
+            self._last_export = time.perf_counter()
+
+    def _write(self, path, text):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
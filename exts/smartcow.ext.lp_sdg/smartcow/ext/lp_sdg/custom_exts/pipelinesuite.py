@@ -0,0 +1,188 @@
+import asyncio
+import contextvars
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .tracesuite import current_track
+
+
+class PipelineStage:
+    """
+    A single step of the pipeline.
+    fn: takes the sample and returns it (or None to drop it); may be a coroutine function
+    threaded: run a synchronous `fn` on the worker pool instead of the Kit main loop
+    acquire/release: name of a resource held from this stage until the `release` stage has finished,
+        e.g. the USD stage which may only hold one scene state at a time
+    """
+
+    def __init__(self, name, fn, threaded=False, acquire=None, release=None):
+        self.name = name
+        self.fn = fn
+        self.threaded = threaded
+        self.acquire = acquire
+        self.release = release
+
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.items = 0
+        self.dropped = 0
+        self.busy = 0.0
+        self.starved = 0.0
+        self.blocked = 0.0
+
+
+class _Job:
+    def __init__(self, sample):
+        self.sample = sample
+        self.held = []
+
+
+# Marks the end of the input
+_DONE = object()
+
+
+class PipelineSuite:
+    """
+    Runs samples through a sequence of stages connected by bounded queues, so that e.g. CPU work for
+    sample i+1 and disk work for sample i-1 overlap with the render of sample i.
+    Per-stage busy/starved/blocked times are tracked to find the bottleneck; an enabled `tracer` (TraceSuite)
+    additionally records every stage step on a timeline row named after the stage.
+    """
+
+    def __init__(self, stages, queue_size=2, max_workers=2, tracer=None):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.max_workers = max_workers
+        self.tracer = tracer
+
+        self.wall_time = 0.0
+        self.completed = 0
+
+    async def _call(self, stage, sample, executor):
+        if stage.threaded:
+            # Carry the trace track of the stage over to the worker thread
+            context = contextvars.copy_context()
+            return await asyncio.get_event_loop().run_in_executor(executor, context.run, stage.fn, sample)
+
+        result = stage.fn(sample)
+        if asyncio.iscoroutine(result):
+            result = await result
+        return result
+
+    async def _run_stage(self, stage, in_queue, out_queue, resources, executor):
+        # Each stage runs in its own task, so this only names the timeline row of this stage
+        current_track.set(stage.name)
+
+        while True:
+            t0 = time.perf_counter()
+            job = await in_queue.get()
+            stage.starved += time.perf_counter() - t0
+
+            if job is _DONE:
+                if out_queue is not None:
+                    await out_queue.put(_DONE)
+                return
+
+            if stage.acquire is not None:
+                t0 = time.perf_counter()
+                await resources[stage.acquire].acquire()
+                stage.blocked += time.perf_counter() - t0
+                job.held.append(stage.acquire)
+
+            t0 = time.perf_counter()
+            try:
+                job.sample = await self._call(stage, job.sample, executor)
+            except BaseException:
+                self._release_all(job, resources)
+                raise
+            t1 = time.perf_counter()
+            stage.busy += t1 - t0
+            stage.items += 1
+
+            if self.tracer is not None:
+                self.tracer.complete(stage.name, t0, t1, cat="pipeline")
+
+            if stage.release is not None and stage.release in job.held:
+                job.held.remove(stage.release)
+                resources[stage.release].release()
+
+            if job.sample is None:
+                # Dropped samples give back anything they still hold
+                stage.dropped += 1
+                self._release_all(job, resources)
+                continue
+
+            if out_queue is not None:
+                t0 = time.perf_counter()
+                await out_queue.put(job)
+                stage.blocked += time.perf_counter() - t0
+            else:
+                self._release_all(job, resources)
+                self.completed += 1
+
+    def _release_all(self, job, resources):
+        for name in job.held:
+            resources[name].release()
+        job.held = []
+
+    async def _feed(self, samples, queue):
+        for sample in samples:
+            await queue.put(_Job(sample))
+        await queue.put(_DONE)
+
+    async def run(self, samples):
+        """Pushes every sample through all stages; returns the number of samples that completed"""
+        for stage in self.stages:
+            stage.reset_stats()
+        self.completed = 0
+
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        names = {s.acquire for s in self.stages if s.acquire is not None}
+        resources = {name: asyncio.Semaphore(1) for name in names}
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pipeline") as executor:
+            tasks = [asyncio.ensure_future(self._feed(samples, queues[0]))]
+            for i, stage in enumerate(self.stages):
+                out_queue = queues[i + 1] if i + 1 < len(self.stages) else None
+                tasks.append(asyncio.ensure_future(self._run_stage(stage, queues[i], out_queue, resources, executor)))
+
+            try:
+                # Fail fast: the first stage error cancels the whole pipeline
+                done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+                for task in done:
+                    if task.exception() is not None:
+                        raise task.exception()
+            finally:
+                for task in tasks:
+                    if not task.done():
+                        task.cancel()
+                self.wall_time = time.perf_counter() - start
+
+        return self.completed
+
+    def get_report(self):
+        """Per-stage utilisation (busy time / wall time) and mean latency"""
+        wall = self.wall_time or 1e-9
+        report = {}
+        for stage in self.stages:
+            report[stage.name] = {
+                "items": stage.items,
+                "dropped": stage.dropped,
+                "busy": stage.busy,
+                "mean": stage.busy / stage.items if stage.items else 0.0,
+                "utilisation": stage.busy / wall,
+                "starved": stage.starved / wall,
+                "blocked": stage.blocked / wall,
+            }
+        return report
+
+    def print_report(self):
+        print(f"Pipeline: {self.completed} samples in {self.wall_time:.1f}s")
+        for name, stats in self.get_report().items():
+            print(
+                f"  {name:<12} util {stats['utilisation'] * 100:5.1f}%  mean {stats['mean'] * 1000:8.1f}ms  "
+                f"starved {stats['starved'] * 100:5.1f}%  blocked {stats['blocked'] * 100:5.1f}%"
+            )
@@ -0,0 +1,95 @@
+class RenderSuite:
+    """
+    Applies named carb render-settings profiles, writing only the keys whose value actually changes.
+    Every carb write can trigger a renderer reconfiguration, so redundant writes are skipped.
+    """
+
+    # Settings shared by all capture profiles
+    CAPTURE_BASE = {
+        # Allow interactivity in the UI and accumulation of subframes for motion blur
+        "/rtx/pathtracing/spp": 1,
+        # Enable syncLoads in materialDB and Hydra. This is needed to make sure texture updates finish before we start the rendering
+        "/rtx/materialDb/syncLoads": True,
+        "/rtx/hydra/materialSyncLoads": True,
+    }
+
+    PROFILES = {
+        "PathTracing": dict(CAPTURE_BASE, **{"/rtx/rendermode": "PathTracing"}),
+        "RayTracedLighting": dict(CAPTURE_BASE, **{"/rtx/rendermode": "RayTracedLighting"}),
+    }
+
+    # Remove ASYNC rendering to improve rendering stability
+    SYNC_RENDERING = {
+        "/app/asyncRendering": False,
+        "/app/asyncRenderingLowLatency": False,
+    }
+
+    def __init__(self, settings=None):
+        if settings is None:
+            import carb.settings
+
+            settings = carb.settings.get_settings()
+
+        self.settings = settings
+        self.profiles = dict(self.PROFILES)
+        self.active_profile = None
+
+        # Last known value of every key this suite manages
+        self._current = {}
+
+        # Number of carb writes issued/skipped; useful to check nothing is written per sample
+        self.writes = 0
+        self.skipped = 0
+
+    def register_profile(self, name, values):
+        self.profiles[name] = dict(values)
+
+    def apply(self, values):
+        """Writes the keys of `values` that differ from the tracked state; returns the changed keys"""
+        changed = []
+
+        for key, value in values.items():
+            if key not in self._current:
+                # Seed the tracked state from carb the first time we see a key
+                self._current[key] = self.settings.get(key)
+
+            if self._current[key] == value:
+                self.skipped += 1
+                continue
+
+            self.settings.set(key, value)
+            self._current[key] = value
+            self.writes += 1
+            changed.append(key)
+
+        return changed
+
+    def apply_profile(self, name, overrides=None):
+        """Applies the named profile plus any overrides (e.g. the SPP of the current run)"""
+        values = dict(self.profiles[name])
+        if overrides:
+            values.update(overrides)
+
+        changed = self.apply(values)
+
+        if self.active_profile != name:
+            print(f"Render profile: {name}")
+        self.active_profile = name
+
+        return changed
+
+    def apply_capture_profile(self, rendermode="PathTracing", spp=64, disable_async=False):
+        overrides = {"/rtx/pathtracing/totalSpp": spp}
+        if disable_async:
+            overrides.update(self.SYNC_RENDERING)
+
+        return self.apply_profile(rendermode, overrides)
+
+    def invalidate(self, keys=None):
+        """Forgets the tracked value of the given keys (all if None), e.g. after the UI changed them"""
+        if keys is None:
+            self._current = {}
+            self.active_profile = None
+        else:
+            for key in keys:
+                self._current.pop(key, None)
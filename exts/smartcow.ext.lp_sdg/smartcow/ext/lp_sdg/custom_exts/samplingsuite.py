@@ -0,0 +1,167 @@
+import bisect
+import math
+
+
+class SppPolicy:
+    """
+    Picks the path-tracing samples per pixel of a frame from how hard it is to render its plates legibly.
+
+    Monte-Carlo noise falls with 1/sqrt(spp). A frame whose plates are n times "noisier" than the reference
+    frame (a `reference_area` pixel plate, daylight, clear sky) therefore needs n^2 times `base_spp` to reach
+    the same quality. Noise factors:
+        - plate size: (reference_area / area) ^ area_exponent; small plates have few pixels per character
+        - night: `night_factor`
+        - weather: `weather_factors[effect]` (particles and wet surfaces)
+    The required SPP is rounded up to the next of `levels`, so the renderer only sees a few distinct values.
+    """
+
+    def __init__(
+        self,
+        levels=(16, 32, 64, 128, 256),
+        base_spp=32,
+        reference_area=2000.0,
+        area_exponent=0.5,
+        min_area=100.0,
+        night_factor=2.0,
+        weather_factors=None,
+        enabled=True,
+        default_spp=128,
+    ):
+        """
+        levels: allowed SPP values, ascending
+        min_area: plates smaller than this (in pixels) are unreadable anyway and are not sampled any harder
+        enabled: if False, every frame gets `default_spp`
+        """
+        self.levels = sorted(levels)
+        self.base_spp = base_spp
+        self.reference_area = reference_area
+        self.area_exponent = area_exponent
+        self.min_area = min_area
+        self.night_factor = night_factor
+        self.weather_factors = weather_factors if weather_factors is not None else {}
+        self.enabled = enabled
+        self.default_spp = default_spp
+
+        # Frames per chosen SPP
+        self.histogram = {}
+
+    def noise_factor(self, plate_area, night=False, weather=None):
+        factor = 1.0
+
+        if plate_area:
+            area = max(plate_area, self.min_area)
+            factor *= (self.reference_area / area) ** self.area_exponent
+
+        if night:
+            factor *= self.night_factor
+
+        if weather:
+            factor *= self.weather_factors.get(str(weather).lower(), 1.0)
+
+        return factor
+
+    def required_spp(self, plate_area, night=False, weather=None):
+        return self.base_spp * self.noise_factor(plate_area, night, weather) ** 2
+
+    def choose(self, plate_area, night=False, weather=None):
+        """
+        plate_area: pixel area of the smallest visible plate of the frame (0/None: no plate visible)
+        night: whether the night lighting is active
+        weather: name of the active weather effect, if any
+        """
+        if not self.enabled:
+            spp = self.default_spp
+        elif not plate_area:
+            # Nothing to read in this frame
+            spp = self.levels[0]
+        else:
+            required = self.required_spp(plate_area, night, weather)
+            i = bisect.bisect_left(self.levels, math.ceil(required))
+            spp = self.levels[min(i, len(self.levels) - 1)]
+
+        self.histogram[spp] = self.histogram.get(spp, 0) + 1
+        return spp
+
+    def reset_stats(self):
+        self.histogram = {}
+
+    def get_stats(self):
+        frames = sum(self.histogram.values())
+        return {
+            "frames": frames,
+            "mean_spp": sum(spp * n for spp, n in self.histogram.items()) / frames if frames else 0.0,
+            "histogram": dict(sorted(self.histogram.items())),
+        }
+
+
+def plate_areas(annotations):
+    """Pixel areas of the annotated plates of a frame (annotation DataFrame with x1, y1, x2, y2)"""
+    if annotations is None or len(annotations) == 0:
+        return []
+    return list(((annotations["x2"] - annotations["x1"]).abs() * (annotations["y2"] - annotations["y1"]).abs()))
+
+
+class RenderModeScheduler:
+    """
+    Assigns PathTracing or RayTracedLighting to every sample so that `pathtracing_ratio` of the samples are
+    path traced. Samples are scheduled in blocks of `block_size` consecutive indices sharing one mode, so the
+    renderer switches mode at most once per block. The mode of a block only depends on its index
+    (error diffusion), so resumed and sharded runs reproduce the same schedule.
+    Conditions that RayTracedLighting renders poorly (night, weather effects in `pathtracing_weather`) always
+    get PathTracing.
+    """
+
+    PATH_TRACING = "PathTracing"
+    RAY_TRACED_LIGHTING = "RayTracedLighting"
+
+    def __init__(self, pathtracing_ratio=0.3, block_size=16, pathtracing_at_night=True, pathtracing_weather=()):
+        if not 0.0 <= pathtracing_ratio <= 1.0:
+            raise ValueError(f"pathtracing_ratio must be within [0, 1], got {pathtracing_ratio}")
+
+        self.pathtracing_ratio = pathtracing_ratio
+        self.block_size = max(1, int(block_size))
+        self.pathtracing_at_night = pathtracing_at_night
+        self.pathtracing_weather = {str(w).lower() for w in pathtracing_weather}
+
+        self.reset_stats()
+
+    def block_mode(self, index):
+        block = index // self.block_size
+        # PathTracing whenever the running total of ratio * blocks crosses an integer
+        if math.floor((block + 1) * self.pathtracing_ratio) > math.floor(block * self.pathtracing_ratio):
+            return self.PATH_TRACING
+        return self.RAY_TRACED_LIGHTING
+
+    def assign(self, index, night=False, weather=None):
+        mode = self.block_mode(index)
+
+        forced = mode != self.PATH_TRACING and (
+            (night and self.pathtracing_at_night)
+            or (weather is not None and str(weather).lower() in self.pathtracing_weather)
+        )
+        if forced:
+            mode = self.PATH_TRACING
+            self.forced += 1
+
+        self.counts[mode] = self.counts.get(mode, 0) + 1
+        if self._last_mode is not None and mode != self._last_mode:
+            self.switches += 1
+        self._last_mode = mode
+
+        return mode
+
+    def reset_stats(self):
+        self.counts = {}
+        self.forced = 0
+        self.switches = 0
+        self._last_mode = None
+
+    def get_stats(self):
+        total = sum(self.counts.values())
+        return {
+            "samples": total,
+            "pathtracing_share": self.counts.get(self.PATH_TRACING, 0) / total if total else 0.0,
+            "forced_pathtracing": self.forced,
+            "mode_switches": self.switches,
+            "counts": dict(self.counts),
+        }
@@ -0,0 +1,113 @@
+import bisect
+import os
+
+import numpy as np
+import pandas as pd
+
+
+class WeatherScenarioIndex:
+    """
+    Historical weather records of the deployment sites, loaded from CSV or Parquet files and indexed for offline
+    lookups. Records are sorted by (site, timestamp); sites are (lat, lon) rounded to `precision` decimals.
+    A lookup bisects the sorted site keys and then the timestamps of that site, so both are O(log n).
+
+    Required columns: lat, lon, timestamp (local time of the site) and weather (a description such as "light rain");
+    any other column (temperature, cloud cover, intensity, ...) is returned with the records.
+    """
+
+    REQUIRED = ("lat", "lon", "timestamp", "weather")
+
+    def __init__(self, paths=(), precision=2, columns=None):
+        """
+        paths: CSV/Parquet file(s) to load
+        columns: renames of source columns onto REQUIRED, e.g. {"dt_iso": "timestamp", "weather_description": "weather"}
+        """
+        self.precision = precision
+        self.columns = columns or {}
+
+        self.records = pd.DataFrame(columns=list(self.REQUIRED))
+        self.sites = []
+        self._site_bounds = []
+        self._timestamps = np.array([], dtype=np.int64)
+
+        if isinstance(paths, (str, os.PathLike)):
+            paths = [paths]
+        if paths:
+            self.load(paths)
+
+    def __len__(self):
+        return len(self.records)
+
+    @staticmethod
+    def _read(path):
+        path = str(path)
+        if path.endswith(".parquet") or path.endswith(".pq"):
+            return pd.read_parquet(path)
+        return pd.read_csv(path)
+
+    def load(self, paths):
+        frames = [self._read(path).rename(columns=self.columns) for path in paths]
+        records = pd.concat(frames, ignore_index=True)
+
+        missing = [c for c in self.REQUIRED if c not in records.columns]
+        if missing:
+            raise ValueError(f"Weather scenarios lack the columns {missing}; got {list(records.columns)}")
+
+        records["timestamp"] = pd.to_datetime(records["timestamp"])
+        records["site_lat"] = records["lat"].astype(float).round(self.precision)
+        records["site_lon"] = records["lon"].astype(float).round(self.precision)
+        records = records.sort_values(["site_lat", "site_lon", "timestamp"], kind="mergesort").reset_index(drop=True)
+
+        # Sorted site keys and the [start, end) record range of each
+        grouped = records.groupby(["site_lat", "site_lon"], sort=True).indices
+        self.sites = sorted(grouped)
+        self._site_bounds = [(int(grouped[site][0]), int(grouped[site][-1]) + 1) for site in self.sites]
+
+        self._timestamps = records["timestamp"].values.astype("datetime64[ns]").astype(np.int64)
+        self.records = records
+
+        print(f"Weather scenarios: {len(records)} records of {len(self.sites)} sites")
+
+    def site(self, lat, lon, max_distance=None):
+        """Index of the site of a location: exact match after rounding, else the nearest one (within max_distance)"""
+        if not self.sites:
+            raise LookupError("No weather scenarios loaded")
+
+        key = (round(float(lat), self.precision), round(float(lon), self.precision))
+        i = bisect.bisect_left(self.sites, key)
+        if i < len(self.sites) and self.sites[i] == key:
+            return i
+
+        # Few sites: a linear nearest-site search is fine
+        coords = np.array(self.sites)
+        distances = np.hypot(coords[:, 0] - key[0], coords[:, 1] - key[1])
+        i = int(np.argmin(distances))
+        if max_distance is not None and distances[i] > max_distance:
+            raise LookupError(f"No weather scenarios within {max_distance} degrees of ({lat}, {lon})")
+        return i
+
+    def lookup(self, lat, lon, when, max_distance=None):
+        """Record in effect at `when` at a location: the last one at or before it (or the first of the site)"""
+        start, end = self._site_bounds[self.site(lat, lon, max_distance)]
+        t = pd.Timestamp(when).value
+
+        i = start + int(np.searchsorted(self._timestamps[start:end], t, side="right")) - 1
+        return self._record(max(i, start))
+
+    def sample(self, lat, lon, rng=np.random, max_distance=None):
+        """A random historical record of a location; weather and time of day follow their joint distribution"""
+        start, end = self._site_bounds[self.site(lat, lon, max_distance)]
+        return self._record(int(rng.randint(start, end)))
+
+    def _record(self, i):
+        record = self.records.iloc[i].to_dict()
+        record.pop("site_lat", None)
+        record.pop("site_lon", None)
+        return record
+
+    def get_stats(self):
+        return {
+            "records": len(self.records),
+            "sites": len(self.sites),
+            "weather": self.records["weather"].value_counts().to_dict() if len(self.records) else {},
+        }
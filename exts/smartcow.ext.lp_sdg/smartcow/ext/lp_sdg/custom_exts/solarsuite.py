@@ -0,0 +1,168 @@
+import math
+
+import numpy as np
+
+
+def _to_unix_seconds(times):
+    """UTC timestamps (datetime64, pandas or POSIX seconds) as float seconds since the epoch"""
+    times = np.asarray(times)
+    if np.issubdtype(times.dtype, np.datetime64):
+        return times.astype("datetime64[ms]").astype(np.float64) / 1000.0
+    if times.dtype == object:
+        return np.array([np.datetime64(t, "ms").astype(np.float64) / 1000.0 for t in times.ravel()]).reshape(
+            times.shape
+        )
+    return times.astype(np.float64)
+
+
+def solar_position(lat, lon, times, refraction=True):
+    """
+    Sun azimuth (degrees clockwise from north) and elevation (degrees above the horizon) after the NOAA solar
+    calculator (within ~0.1 degrees of the NREL SPA, 1800-2100). Vectorized over `times` (UTC) and lat/lon.
+    refraction: add the standard atmospheric refraction to the elevation, as observed (and as NOAA reports it)
+    """
+    seconds = _to_unix_seconds(times)
+    lat_r = np.radians(lat)
+
+    jd = seconds / 86400.0 + 2440587.5
+    t = (jd - 2451545.0) / 36525.0
+
+    # Sun's mean longitude, mean anomaly and the eccentricity of Earth's orbit
+    l0 = np.radians((280.46646 + t * (36000.76983 + t * 0.0003032)) % 360.0)
+    m = np.radians(357.52911 + t * (35999.05029 - 0.0001537 * t))
+    e = 0.016708634 - t * (0.000042037 + 0.0000001267 * t)
+
+    center = (
+        np.sin(m) * (1.914602 - t * (0.004817 + 0.000014 * t))
+        + np.sin(2 * m) * (0.019993 - 0.000101 * t)
+        + np.sin(3 * m) * 0.000289
+    )
+    omega = np.radians(125.04 - 1934.136 * t)
+    apparent_long = np.radians(np.degrees(l0) + center - 0.00569 - 0.00478 * np.sin(omega))
+
+    obliquity = 23.0 + (26.0 + (21.448 - t * (46.815 + t * (0.00059 - t * 0.001813))) / 60.0) / 60.0
+    obliquity = np.radians(obliquity + 0.00256 * np.cos(omega))
+
+    declination = np.arcsin(np.sin(obliquity) * np.sin(apparent_long))
+
+    # Equation of time in minutes
+    y = np.tan(obliquity / 2) ** 2
+    eq_time = 4 * np.degrees(
+        y * np.sin(2 * l0)
+        - 2 * e * np.sin(m)
+        + 4 * e * y * np.sin(m) * np.cos(2 * l0)
+        - 0.5 * y * y * np.sin(4 * l0)
+        - 1.25 * e * e * np.sin(2 * m)
+    )
+
+    minutes = (seconds % 86400.0) / 60.0
+    true_solar_time = (minutes + eq_time + 4 * np.asarray(lon, dtype=np.float64)) % 1440.0
+    hour_angle = np.radians(true_solar_time / 4.0 - 180.0)
+
+    cos_zenith = np.sin(lat_r) * np.sin(declination) + np.cos(lat_r) * np.cos(declination) * np.cos(hour_angle)
+    zenith = np.arccos(np.clip(cos_zenith, -1.0, 1.0))
+    elevation = 90.0 - np.degrees(zenith)
+
+    azimuth = np.degrees(
+        np.arctan2(
+            np.sin(hour_angle), np.cos(hour_angle) * np.sin(lat_r) - np.tan(declination) * np.cos(lat_r)
+        )
+    )
+    azimuth = (azimuth + 180.0) % 360.0
+
+    if refraction:
+        elevation = elevation + _refraction(elevation)
+
+    return azimuth, elevation
+
+
+def _refraction(elevation):
+    """Atmospheric refraction in degrees (NOAA approximation)"""
+    elevation = np.asarray(elevation, dtype=np.float64)
+    te = np.tan(np.radians(np.clip(elevation, -89.0, 89.0)))
+    arcsec = np.where(
+        elevation > 5.0,
+        58.1 / te - 0.07 / te**3 + 0.000086 / te**5,
+        np.where(
+            elevation > -0.575,
+            1735.0 + elevation * (-518.2 + elevation * (103.4 + elevation * (-12.79 + elevation * 0.711))),
+            -20.772 / te,
+        ),
+    )
+    return np.where(elevation > 85.0, 0.0, arcsec / 3600.0)
+
+
+def is_night(hour, elevation=None, threshold=0.0):
+    """Night by the sun elevation (degrees) when it is known, else by the local hour (21:00-06:59)"""
+    if elevation is not None:
+        return bool(elevation < threshold)
+    return hour >= 21 or hour <= 6
+
+
+def sun_direction(azimuth, elevation, up_axis="Z", north_offset=0.0):
+    """
+    Unit vector from the scene towards the sun in stage coordinates.
+    Scenes are assumed east = +X and north = +Y (Z-up) or -Z (Y-up); `north_offset` rotates north
+    clockwise (seen from above) to match the scene layout.
+    """
+    az = math.radians(azimuth - north_offset)
+    el = math.radians(elevation)
+    east, north, up = math.cos(el) * math.sin(az), math.cos(el) * math.cos(az), math.sin(el)
+
+    if up_axis == "Y":
+        return east, up, -north
+    return east, north, up
+
+
+def light_rotation_xyz(direction):
+    """
+    XYZ Euler angles (degrees) that turn a distant light, which shines down its local -Z axis, so that it shines
+    against `direction` (i.e. comes from the sun)
+    """
+    x, y, z = direction
+    tilt = math.degrees(math.acos(max(-1.0, min(1.0, z))))
+    heading = math.degrees(math.atan2(y, x))
+    return 0.0, tilt, heading
+
+
+class SolarPosition:
+    """
+    Sun azimuth/elevation of a location, cached per (lat, lon, UTC minute) bucket so that samples drawn from the
+    same minutes never recompute the ephemeris. A bucket holds the position at the start of its minute (the sun
+    moves at most ~0.25 degrees per minute).
+    """
+
+    def __init__(self, max_entries=100000, refraction=True):
+        self.max_entries = max_entries
+        self.refraction = refraction
+        self._cache = {}
+
+        # Telemetry
+        self.hits = 0
+        self.misses = 0
+
+    def position(self, lat, lon, when):
+        """(azimuth, elevation) in degrees at UTC time `when` (datetime/pandas Timestamp/datetime64)"""
+        minute = int(_to_unix_seconds(np.datetime64(when, "ms")) // 60)
+        key = (round(lat, 4), round(lon, 4), minute)
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        if len(self._cache) >= self.max_entries:
+            self._cache.clear()
+
+        azimuth, elevation = solar_position(key[0], key[1], minute * 60.0, refraction=self.refraction)
+        cached = self._cache[key] = (float(azimuth), float(elevation))
+        return cached
+
+    def positions(self, lat, lon, times):
+        """Vectorized (uncached) positions of many UTC timestamps; arrays of azimuth and elevation"""
+        return solar_position(lat, lon, times, refraction=self.refraction)
+
+    def get_stats(self):
+        lookups = self.hits + self.misses
+        return {"lookups": lookups, "hit_rate": self.hits / lookups if lookups else 0.0, "entries": len(self._cache)}
@@ -0,0 +1,172 @@
+import collections
+import contextvars
+import gc
+import json
+import os
+import threading
+import time
+
+# Timeline row of the code running in the current task/thread, e.g. the pipeline stage; falls back to the thread name
+current_track = contextvars.ContextVar("trace_track", default=None)
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.complete(self.name, self.start, time.perf_counter(), args=self.args)
+        return False
+
+
+class TraceSuite:
+    """
+    Records spans of the generation loop in the Chrome trace-event format (chrome://tracing, Perfetto).
+    Events are kept in a ring buffer of `capacity` events, so long runs keep their most recent part.
+    Every span is a single complete ("X") event, so evicting old events never leaves a begin without its end.
+    Garbage collector pauses are recorded as "gc" spans.
+    """
+
+    def __init__(self, enabled=False, capacity=200000, pid=None):
+        self.enabled = enabled
+        self.capacity = capacity
+        self.pid = os.getpid() if pid is None else pid
+
+        self._events = collections.deque(maxlen=capacity)
+        self._tracks = {}
+        # Reentrant: a GC pause may start (and be recorded) while an event is being recorded
+        self._lock = threading.RLock()
+        self._gc_start = {}
+        self.recorded = 0
+        self.origin = time.perf_counter()
+
+        if enabled:
+            gc.callbacks.append(self._on_gc)
+
+    def close(self):
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        self.enabled = False
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+            self.recorded = 0
+        self.origin = time.perf_counter()
+
+    def _tid(self):
+        track = current_track.get() or threading.current_thread().name
+        tid = self._tracks.get(track)
+        if tid is None:
+            with self._lock:
+                tid = self._tracks.setdefault(track, len(self._tracks) + 1)
+        return tid
+
+    def _us(self, t):
+        return (t - self.origin) * 1e6
+
+    def span(self, name, **args):
+        """Context manager recording `name` from enter to exit"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args or None)
+
+    def complete(self, name, start, end, cat="lp_sdg", args=None):
+        """Records a span from perf_counter times `start` to `end`"""
+        if not self.enabled:
+            return
+
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": self._us(start),
+            "dur": (end - start) * 1e6,
+            "pid": self.pid,
+            "tid": self._tid(),
+        }
+        if args:
+            event["args"] = args
+
+        self._record(event)
+
+    def instant(self, name, cat="lp_sdg", args=None):
+        if not self.enabled:
+            return
+
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "i",
+            "s": "t",
+            "ts": self._us(time.perf_counter()),
+            "pid": self.pid,
+            "tid": self._tid(),
+        }
+        if args:
+            event["args"] = args
+
+        self._record(event)
+
+    def _record(self, event):
+        # Worker threads (plan, annotate, encoders) record concurrently
+        with self._lock:
+            self._events.append(event)
+            self.recorded += 1
+
+    def _on_gc(self, phase, info):
+        thread = threading.get_ident()
+        if phase == "start":
+            self._gc_start[thread] = time.perf_counter()
+        else:
+            start = self._gc_start.pop(thread, None)
+            if start is not None:
+                self.complete("gc", start, time.perf_counter(), cat="gc", args={"generation": info.get("generation")})
+
+    @property
+    def dropped(self):
+        return self.recorded - len(self._events)
+
+    def to_dict(self):
+        # Name the timeline rows after their track
+        with self._lock:
+            events = list(self._events)
+            tracks = list(self._tracks.items())
+
+        metadata = [
+            {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": track}}
+            for track, tid in tracks
+        ]
+        return {
+            "traceEvents": metadata + events,
+            "displayTimeUnit": "ms",
+            "otherData": {"recorded": self.recorded, "dropped": self.dropped, "capacity": self.capacity},
+        }
+
+    def save(self, path):
+        """Writes the buffered events as a Chrome trace JSON file"""
+        if not self.enabled and not self._events:
+            return
+
+        os.makedirs(os.path.dirname(str(path)) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+        print(f"Trace: {len(self._events)} events written to {path} ({self.dropped} dropped)")
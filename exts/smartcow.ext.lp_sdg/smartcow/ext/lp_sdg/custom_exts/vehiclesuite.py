@@ -0,0 +1,116 @@
+import os
+
+import pandas as pd
+
+
+class VehicleEntry:
+    """
+    Resolved prims and metadata for a single vehicle in the scene
+    """
+
+    # Sub-paths of a single plate asset, relative to the NumberPlateAsset_F/_R prim
+    PLATE_PARTS = {
+        "lp": "LP",
+        "plate": "NumberPlate",
+        "holder": "LP_Holder/LP_Holder_Long",
+        "scratches": "Damage_Scratches",
+        "dirt": "Damage_Dirt",
+    }
+
+    def __init__(self, stage, index, path, vehicle_class="car", front_y_offset=0, rear_y_offset=0):
+        self.index = index
+        self.path = path
+        self.vehicle_class = vehicle_class
+
+        # Hand-tuned 2D bounding box corrections (in pixels, subtracted from y1/y2)
+        self.front_y_offset = front_y_offset
+        self.rear_y_offset = rear_y_offset
+
+        # Name used when building annotation/image names
+        self.save_stem = os.path.basename(path.lower())
+
+        # Plate prims for both sides of the vehicle
+        self.front = self._resolve_plate(stage, path + "/NumberPlateAsset_F")
+        self.rear = self._resolve_plate(stage, path + "/NumberPlateAsset_R")
+
+        # Everything else the generation loop touches on a vehicle
+        self.lights = stage.GetPrimAtPath(path + "/Vehicle_Lights")
+        self.bounding_box = stage.GetPrimAtPath(path + "/BoundingBox")
+        self.pbr_material = stage.GetPrimAtPath(path + "/Shared_Materials/OmniPBR")
+        self.follow_camera = path + "/Follow_Camera"
+
+    def _resolve_plate(self, stage, plate_path):
+        return {part: stage.GetPrimAtPath(plate_path + "/" + sub) for part, sub in self.PLATE_PARTS.items()}
+
+    def y_offset(self, front=True):
+        return self.front_y_offset if front else self.rear_y_offset
+
+
+class VehicleRegistry:
+    """
+    Per-vehicle index of prim handles, vehicle class and bbox corrections, built once per scene.
+    Adding a vehicle type only requires a new row in the vehicle classes file.
+    """
+
+    DEFAULT_CLASS = "car"
+
+    def __init__(self, classes_path):
+        self.classes_path = str(classes_path)
+        self.classes = self.load_classes(self.classes_path)
+        self.entries = []
+
+    def load_classes(self, classes_path):
+        """Reads (keyword, class, front offset, rear offset) rows; the first keyword found in a vehicle path wins"""
+        if not os.path.exists(classes_path):
+            print(f"Vehicle classes file not found: {classes_path}; using defaults.")
+            return []
+
+        df = pd.read_csv(classes_path)
+
+        return [
+            (
+                str(row["Keyword"]).lower(),
+                str(row["Vehicle_Class"]),
+                float(row["Front_Y_Offset"]),
+                float(row["Rear_Y_Offset"]),
+            )
+            for _, row in df.iterrows()
+        ]
+
+    def classify(self, vehicle_path):
+        """Returns the (class, front offset, rear offset) for a vehicle path"""
+        vehicle_path = vehicle_path.lower()
+
+        for keyword, vehicle_class, front_y_offset, rear_y_offset in self.classes:
+            if keyword in vehicle_path:
+                return vehicle_class, front_y_offset, rear_y_offset
+
+        return self.DEFAULT_CLASS, 0, 0
+
+    def build(self, stage, vehicle_paths):
+        """(Re-)builds the registry for the given vehicles"""
+        self.entries = []
+
+        for index, path in enumerate(vehicle_paths):
+            vehicle_class, front_y_offset, rear_y_offset = self.classify(path)
+            self.entries.append(
+                VehicleEntry(
+                    stage,
+                    index,
+                    path,
+                    vehicle_class=vehicle_class,
+                    front_y_offset=front_y_offset,
+                    rear_y_offset=rear_y_offset,
+                )
+            )
+
+        return self.entries
+
+    def __getitem__(self, index):
+        return self.entries[index]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
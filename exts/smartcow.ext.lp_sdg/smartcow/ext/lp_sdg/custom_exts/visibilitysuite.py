@@ -0,0 +1,92 @@
+from pxr import Sdf, Usd, UsdGeom
+
+from .handlesuite import resolve_attribute
+
+
+class VisibilityManager:
+    """
+    Desired visibility of scene prims, written to the stage in batches. `set`/`set_group` only record the desired
+    state; `commit` writes the prims whose state actually differs from what is on the stage, all inside one
+    Sdf.ChangeBlock, so an unchanged light never costs a visibility flip (and the renderer work that comes with it).
+    Assumes it is the only writer of the prims it manages; call `reset` after they were changed elsewhere.
+    """
+
+    def __init__(self):
+        self.groups = {}  # group name -> prim paths
+        self._state = {}  # prim path -> visibility on the stage (True = inherited)
+        self._pending = {}  # prim path -> desired visibility, not yet committed
+
+        # Telemetry
+        self.requests = 0
+        self.writes = 0
+        self.commits = 0
+
+    @staticmethod
+    def _key(object_path):
+        if isinstance(object_path, Usd.Prim):
+            return str(object_path.GetPath()) if object_path.IsValid() else None
+        return str(object_path)
+
+    def define_group(self, name, objects):
+        """Names a set of prims (paths or Usd.Prims) that is switched together, e.g. all scene lights"""
+        self.groups[name] = [key for key in (self._key(obj) for obj in objects) if key]
+
+    def set(self, object_path, is_visible):
+        key = self._key(object_path)
+        if not key:
+            return
+
+        self.requests += 1
+        if self._state.get(key) == is_visible:
+            self._pending.pop(key, None)
+        else:
+            self._pending[key] = is_visible
+
+    def set_group(self, name, is_visible):
+        for key in self.groups.get(name, ()):
+            self.set(key, is_visible)
+
+    def is_visible(self, object_path):
+        """Desired visibility of a prim (pending or committed), or None if it is not managed"""
+        key = self._key(object_path)
+        return self._pending.get(key, self._state.get(key))
+
+    def commit(self, stage):
+        """Writes the pending changes in one change block; returns the number of prims flipped"""
+        if not self._pending:
+            return 0
+
+        # Read the stage state of prims seen for the first time, outside the change block
+        changes = []
+        for key, is_visible in self._pending.items():
+            attr = resolve_attribute(stage, key, UsdGeom.Tokens.visibility)
+            if not attr.IsValid():
+                continue
+            if key not in self._state:
+                self._state[key] = attr.Get() != UsdGeom.Tokens.invisible
+                if self._state[key] == is_visible:
+                    continue
+            changes.append((key, attr, is_visible))
+        self._pending.clear()
+
+        with Sdf.ChangeBlock():
+            for key, attr, is_visible in changes:
+                attr.Set(UsdGeom.Tokens.inherited if is_visible else UsdGeom.Tokens.invisible)
+                self._state[key] = is_visible
+
+        self.commits += 1
+        self.writes += len(changes)
+        return len(changes)
+
+    def reset(self):
+        """Forgets the known stage state (new stage, or managed prims changed elsewhere)"""
+        self._state.clear()
+        self._pending.clear()
+
+    def get_stats(self):
+        return {
+            "requests": self.requests,
+            "writes": self.writes,
+            "skipped": self.requests - self.writes,
+            "commits": self.commits,
+        }
@@ -0,0 +1,236 @@
+import asyncio
+import json
+import threading
+import time
+
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import urllib3
+
+
+OPENWEATHER_URL = "https://api.openweathermap.org/data/2.5/onecall"
+
+
+def describe(data):
+    """Description of the current weather of a One Call API response (e.g. "light rain")"""
+    try:
+        return data["current"]["weather"][0]["description"]
+    except (KeyError, IndexError, TypeError):
+        raise ValueError(f"Not a weather response: {str(data)[:200]}")
+
+
+class HttpWeatherBackend:
+    """
+    Fetches the One Call API over HTTP. All backends of the process share one connection pool, so repeated
+    lookups reuse their TLS connections.
+    Pointing `base_url` at a local server (e.g. `python -m http.server` serving a recorded data/2.5/onecall file)
+    gives a stand-in that needs no network access.
+    """
+
+    _pool = None
+    _pool_lock = threading.Lock()
+
+    def __init__(self, api_key=None, base_url=OPENWEATHER_URL, timeout=5.0, retries=2):
+        """
+        timeout: connect and read timeout of a request in seconds
+        retries: retries of failed connections and 5xx/429 responses (with backoff)
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = urllib3.Timeout(connect=timeout, read=timeout)
+        self.retries = urllib3.Retry(
+            total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504), raise_on_status=False
+        )
+
+    @classmethod
+    def pool(cls):
+        with cls._pool_lock:
+            if cls._pool is None:
+                cls._pool = urllib3.PoolManager(num_pools=4, maxsize=4)
+            return cls._pool
+
+    def fetch(self, lat, lon):
+        fields = {"lat": lat, "lon": lon, "units": "metric"}
+        if self.api_key is not None:
+            fields["appid"] = self.api_key
+
+        response = self.pool().request(
+            "GET", self.base_url, fields=fields, timeout=self.timeout, retries=self.retries
+        )
+        if response.status != 200:
+            raise IOError(f"Weather API returned HTTP {response.status} for lat={lat}, lon={lon}")
+
+        return json.loads(response.data.decode("utf-8"))
+
+
+class RecordedWeatherBackend:
+    """
+    Serves recorded API responses from a JSON file, for offline farm nodes and tests. The file holds either a
+    single response (returned for every location) or responses keyed by "lat,lon" plus an optional "default":
+
+        {"35.92,14.5": {"current": {"weather": [{"description": "light rain"}]}}, "default": {...}}
+
+    Locations are matched after rounding to `precision` decimals.
+    """
+
+    def __init__(self, path, precision=2):
+        self.path = str(path)
+        self.precision = precision
+
+        with open(self.path, "r") as f:
+            recorded = json.load(f)
+
+        if "current" in recorded:
+            self.responses = {}
+            self.default = recorded
+        else:
+            self.default = recorded.pop("default", None)
+            self.responses = {self._key(*map(float, k.split(","))): v for k, v in recorded.items()}
+
+    def _key(self, lat, lon):
+        return round(lat, self.precision), round(lon, self.precision)
+
+    def fetch(self, lat, lon):
+        response = self.responses.get(self._key(lat, lon), self.default)
+        if response is None:
+            raise KeyError(f"No recorded weather for lat={lat}, lon={lon} in {self.path}")
+        return response
+
+
+class WeatherClient:
+    """
+    Cached weather lookups over a pluggable backend (anything with `fetch(lat, lon) -> response dict`).
+    Responses are cached for `ttl` seconds per location rounded to `precision` decimals (2 decimals ~ 1 km).
+    Backend calls run on a small thread pool and concurrent lookups of one location share a single request, so
+    `get_async` never blocks the event loop and `peek` never waits at all.
+    A failed lookup is not retried for `error_ttl` seconds: lookups of that location fail (or peek stale/None) at
+    once instead of sending a request per sample to an API that is down.
+    """
+
+    def __init__(self, backend, ttl=600.0, precision=2, workers=2, error_ttl=30.0, clock=time.monotonic):
+        """clock: monotonic clock, swappable for a fake one"""
+        self.backend = backend
+        self.ttl = ttl
+        self.precision = precision
+        self.error_ttl = error_ttl
+        self._clock = clock
+
+        self._cache = {}
+        self._failed = {}  # location -> (retry time, exception of the failed lookup)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="weather")
+
+        # Telemetry
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _key(self, lat, lon):
+        return round(float(lat), self.precision), round(float(lon), self.precision)
+
+    def _cached(self, key):
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] > self._clock():
+            return entry[1]
+        return None
+
+    def _failure(self, key):
+        """Exception of a location's failed lookup while it is not retried yet, else None"""
+        entry = self._failed.get(key)
+        if entry is not None and entry[0] > self._clock():
+            return entry[1]
+        return None
+
+    def _fetch(self, key):
+        try:
+            response = self.backend.fetch(*key)
+        except Exception as e:
+            print(f"ERROR! Weather lookup of lat={key[0]}, lon={key[1]} failed: {e}")
+            with self._lock:
+                self.errors += 1
+                self._failed[key] = (self._clock() + self.error_ttl, e)
+                self._inflight.pop(key, None)
+            raise
+
+        with self._lock:
+            self._cache[key] = (self._clock() + self.ttl, response)
+            self._failed.pop(key, None)
+            self._inflight.pop(key, None)
+        return response
+
+    def _submit(self, key):
+        """
+        Future of the response of a location; joins a request already in flight, and fails at once while a failed
+        lookup is backing off (call with the lock held)
+        """
+        error = self._failure(key)
+        if error is not None:
+            future = Future()
+            future.set_exception(error)
+            return future
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = self._inflight[key] = self._executor.submit(self._fetch, key)
+        return future
+
+    def get_future(self, lat, lon):
+        """concurrent.futures.Future of the response of a location (already resolved on a cache hit)"""
+        key = self._key(lat, lon)
+        with self._lock:
+            response = self._cached(key)
+            if response is not None:
+                self.hits += 1
+                future = Future()
+                future.set_result(response)
+            else:
+                self.misses += 1
+                future = self._submit(key)
+        return future
+
+    def get(self, lat, lon, timeout=None):
+        """Blocking lookup; prefer `get_async` or `peek` on the main loop"""
+        return self.get_future(lat, lon).result(timeout)
+
+    async def get_async(self, lat, lon):
+        return await asyncio.wrap_future(self.get_future(lat, lon))
+
+    def peek(self, lat, lon):
+        """Cached response of a location or None; a missing or stale entry is fetched in the background"""
+        key = self._key(lat, lon)
+        with self._lock:
+            response = self._cached(key)
+            if response is not None:
+                self.hits += 1
+                return response
+
+            self.misses += 1
+            self._submit(key)
+            # A stale response is still better than none while the refresh runs
+            entry = self._cache.get(key)
+            return entry[1] if entry is not None else None
+
+    def prefetch(self, locations):
+        """Warms the cache for (lat, lon) pairs without waiting"""
+        for lat, lon in locations:
+            self.peek(lat, lon)
+
+    def clear(self):
+        with self._lock:
+            self._cache = {}
+            self._failed = {}
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "lookups": lookups,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "errors": self.errors,
+                "cached_locations": len(self._cache),
+                "failed_locations": len(self._failed),
+            }
@@ -0,0 +1,113 @@
+import os
+
+import omni.kit.app
+import omni.timeline
+import omni.usd
+from pxr import Sdf, Usd, UsdGeom
+
+
+# Prims that drive the particle simulation; deactivated in the snapshots so that nothing simulates them again
+SIMULATION_TYPES = (
+    "OmniGraph",
+    "OmniGraphNode",
+    "ComputeGraph",
+    "ComputeNode",
+    "PhysicsScene",
+    "PhysxParticleSystem",
+)
+
+SNAPSHOTS_ROOT = "/Snapshots"
+
+
+def baked_path(baked_dir, effect_name):
+    return os.path.join(str(baked_dir), f"{effect_name}.usd")
+
+
+def snapshot_prims(prim):
+    """Snapshot prims below a referenced baked effect, in order"""
+    return [child for child in prim.GetChildren() if child.GetName().startswith("snapshot_")]
+
+
+class WeatherBaker:
+    """
+    Pre-simulates weather effects offline (inside Kit) and stores settled particle states, so generation never waits
+    for an effect to warm up. Each effect is simulated for `warmup_frames`, then `snapshots` states are taken
+    `interval_frames` apart. Every snapshot is a full copy of the flattened effect with its simulation prims
+    deactivated; WeatherEffectPool references the baked file and shows one (invisible by default) snapshot per sample.
+
+    Output: <out_dir>/<effect>.usd with /Snapshots/snapshot_000, snapshot_001, ...
+    """
+
+    def __init__(self, out_dir, snapshots=8, warmup_frames=240, interval_frames=24):
+        self.out_dir = str(out_dir)
+        self.snapshots = snapshots
+        self.warmup_frames = warmup_frames
+        self.interval_frames = interval_frames
+
+    async def _step(self, n_frames):
+        app = omni.kit.app.get_app()
+        for _ in range(n_frames):
+            await app.next_update_async()
+
+    async def bake_effect(self, name, effect_path):
+        """Simulates one effect and writes its snapshots; returns the path of the baked file"""
+        usd_context = omni.usd.get_context()
+        await usd_context.new_stage_async()
+        stage = usd_context.get_stage()
+
+        effect = stage.DefinePrim("/Effect", "Xform")
+        effect.GetReferences().AddReference(str(effect_path))
+
+        out_path = baked_path(self.out_dir, name)
+        os.makedirs(self.out_dir, exist_ok=True)
+        layer = Sdf.Layer.CreateNew(out_path)
+        Sdf.CreatePrimInLayer(layer, SNAPSHOTS_ROOT).specifier = Sdf.SpecifierDef
+        layer.GetPrimAtPath(SNAPSHOTS_ROOT).typeName = "Xform"
+        layer.defaultPrim = SNAPSHOTS_ROOT.strip("/")
+
+        timeline = omni.timeline.get_timeline_interface()
+        timeline.play()
+        try:
+            await self._step(self.warmup_frames)
+
+            for i in range(self.snapshots):
+                if i:
+                    await self._step(self.interval_frames)
+                self._take_snapshot(stage, effect.GetPath(), layer, f"{SNAPSHOTS_ROOT}/snapshot_{i:03d}")
+        finally:
+            timeline.stop()
+
+        layer.customLayerData = {
+            "source": os.path.basename(str(effect_path)),
+            "snapshots": self.snapshots,
+            "warmup_frames": self.warmup_frames,
+            "interval_frames": self.interval_frames,
+        }
+        layer.Save()
+
+        print(f"Baked {self.snapshots} snapshots of {name} into {out_path}")
+        return out_path
+
+    def _take_snapshot(self, stage, effect_path, layer, snapshot_path):
+        # The flattened stage holds the current particle state without any composition arcs (particle systems must
+        # write their state back to USD; Fabric-only state is not part of the stage)
+        flat = stage.Flatten()
+        Sdf.CopySpec(flat, effect_path, layer, snapshot_path)
+
+        snapshot = Usd.Stage.Open(layer)
+        root = snapshot.GetPrimAtPath(snapshot_path)
+        simulation = [prim for prim in Usd.PrimRange(root) if prim.GetTypeName() in SIMULATION_TYPES]
+        for prim in simulation:
+            prim.SetActive(False)
+
+        # Snapshots are shown one at a time by the weather pool
+        UsdGeom.Imageable(root).GetVisibilityAttr().Set(UsdGeom.Tokens.invisible)
+
+    async def bake(self, effects):
+        """Bakes every (name, USD path) of `effects`; missing files are skipped"""
+        baked = {}
+        for name, effect_path in effects.items():
+            if effect_path is None or not os.path.exists(str(effect_path)):
+                continue
+            baked[name] = await self.bake_effect(name, effect_path)
+        return baked
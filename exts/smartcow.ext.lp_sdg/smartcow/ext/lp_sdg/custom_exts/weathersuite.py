@@ -1,13 +1,19 @@
 import omni
-import urllib3
-import json
+import os
 
 from enum import IntEnum
 
 # Sun Study!
 from omni.kit.environment.core.sunstudy_player.player import SunstudyPlayer
+from pxr import Usd, UsdGeom, Gf
+
+import numpy as np
+import pandas as pd
 
 from .manipulationsuite import ManipulationSuite
+from .weatherapisuite import WeatherClient, HttpWeatherBackend, describe
+from .solarsuite import SolarPosition, sun_direction, light_rotation_xyz
+from .weatherbakesuite import baked_path, snapshot_prims
 
 # Enumerator defining the different weather profiles
 class WeatherOptions(IntEnum):
@@ -16,6 +22,216 @@ class WeatherOptions(IntEnum):
     RAIN = 2
     SNOW = 3
     STORM = 4
+    DUST = 5
+
+
+class WeatherEffectPool:
+    """
+    Keeps every weather effect referenced once, invisible, under a pool scope of the stage.
+    Switching effects then only toggles visibility and scales the emitter attributes, so no layer is recomposed.
+    Intensity scales the authored value of every attribute named in INTENSITY_ATTRIBUTES below an effect.
+    Effects baked by WeatherBaker are referenced from their baked file instead: they need no warm-up, and every
+    activation shows one of their settled snapshots. Their snapshots no longer simulate, so their intensity is fixed
+    at the one they were baked with; the intensity passed to activate() is ignored for them.
+    An effect can be fitted to a volume (e.g. the frustum of the active camera): its emitter sources (the shapes
+    named emitter_source_* that particles spawn in) are centered on the volume and resized to enclose it, and the
+    emitter rates are scaled by the volume ratio of the sources, so the particle density stays as authored. The effect
+    is never scaled as a whole, so particles keep their size. Effects without emitter sources (and baked effects,
+    whose snapshots no longer simulate) are only moved so that their native bounds are centered on the volume.
+    """
+
+    # Emitter attributes scaled by the effect intensity (last namespace component)
+    INTENSITY_ATTRIBUTES = ("rate", "spawnRate", "emissionRate", "particleRate", "maxParticles", "intensity")
+    # Of those, the ones that set the particle count; also scaled with the volume of the emitter sources
+    RATE_ATTRIBUTES = ("rate", "spawnRate", "emissionRate", "particleRate", "maxParticles")
+    # Emitter source shapes (prim type -> size attribute)
+    EMITTER_SOURCES = {"Sphere": "radius", "Cube": "size"}
+
+    def __init__(self, manip, root="/Root/Weather_Pool"):
+        self.manip = manip
+        self.root = root
+
+        # effect -> {"prim", "xform_op", "attributes": [(attribute, authored value)], "bounds",
+        #            "sources": [(prim type, size attribute, authored size, Gf.Range3d in effect space)], "snapshots",
+        #            "shown", "warned"}
+        self.effects = {}
+        self.active = None
+
+    @property
+    def loaded(self):
+        return len(self.effects) > 0
+
+    def load(self, stage, effect_paths, baked_dir=None):
+        """
+        References every existing effect file once; effect_paths maps WeatherOptions to USD paths.
+        baked_dir: directory of baked effects (<effect>.usd), preferred over the live effects
+        """
+        self.effects = {}
+        self.active = None
+        stage.DefinePrim(self.root, "Scope")
+
+        for effect, path in effect_paths.items():
+            if path is None or not os.path.exists(path):
+                continue
+
+            name = effect.name.lower()
+            baked = baked_path(baked_dir, name) if baked_dir is not None else None
+            if baked is not None and os.path.exists(baked):
+                path = baked
+
+            prim = self.manip.create_object(stage, prefix=f"{self.root}/{name}", path=path, group=[])
+            self.manip.toggle_visibility(stage, prim, is_visible=False)
+
+            snapshots = snapshot_prims(prim) if path == baked else []
+            self.effects[effect] = {
+                "prim": prim,
+                "xform_op": UsdGeom.Xformable(prim).GetOrderedXformOps()[0],
+                "attributes": self._intensity_attributes(prim) if not snapshots else [],
+                "bounds": self._native_bounds(prim),
+                "sources": self._emitter_sources(prim) if not snapshots else [],
+                "snapshots": snapshots,
+                "shown": None,
+                "warned": False,
+            }
+
+        print(
+            f"Weather pool: preloaded {[effect.name.lower() for effect in self.effects]} under {self.root} "
+            f"(baked: {[effect.name.lower() for effect, e in self.effects.items() if e['snapshots']]})"
+        )
+        if any(entry["snapshots"] for entry in self.effects.values()):
+            print("Weather pool: baked effects keep the intensity they were baked with; only live effects are scaled")
+
+    def _native_bounds(self, prim):
+        """Local bounds of an effect (Gf.Range3d), or None if it has no extent"""
+        bounds = UsdGeom.BBoxCache(Usd.TimeCode.Default(), ["default", "render"]).ComputeUntransformedBound(prim)
+        bounds = bounds.ComputeAlignedRange()
+        if bounds.IsEmpty() or min(bounds.GetSize()) <= 0.0:
+            return None
+        return bounds
+
+    def _emitter_sources(self, prim):
+        """Emitter source shapes below an effect, with their authored size and bounds relative to the effect"""
+        bbox_cache = UsdGeom.BBoxCache(Usd.TimeCode.Default(), ["default", "render", "guide"])
+
+        found = []
+        for descendant in Usd.PrimRange(prim):
+            type_name = descendant.GetTypeName()
+            if not descendant.GetName().startswith("emitter_source") or type_name not in self.EMITTER_SOURCES:
+                continue
+
+            attr = descendant.GetAttribute(self.EMITTER_SOURCES[type_name])
+            bounds = bbox_cache.ComputeRelativeBound(descendant, prim).ComputeAlignedRange()
+            if attr.Get() is None or bounds.IsEmpty() or min(bounds.GetSize()) <= 0.0:
+                continue
+            found.append((type_name, attr, attr.Get(), bounds))
+        return found
+
+    def _intensity_attributes(self, prim):
+        found = []
+        for descendant in Usd.PrimRange(prim):
+            for attr in descendant.GetAttributes():
+                if attr.GetName().split(":")[-1] not in self.INTENSITY_ATTRIBUTES:
+                    continue
+                value = attr.Get()
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    found.append((attr, value))
+        return found
+
+    def activate(self, stage, effect, intensity=1.0, position=None, snapshot=None, volume=None):
+        """
+        Shows `effect` (hiding the previous one) at the given intensity; effects not in the pool just hide it.
+        snapshot: index of the baked snapshot to show (modulo their number; default: random)
+        volume: world-space Gf.Range3d to center the effect on (overrides `position`)
+        """
+        if self.active is not None and self.active != effect:
+            self.manip.toggle_visibility(stage, self.effects[self.active]["prim"], is_visible=False)
+            self.active = None
+
+        if effect not in self.effects:
+            return None
+
+        entry = self.effects[effect]
+        prim = entry["prim"]
+
+        # Factor the emitter sources are resized by; 1.0 keeps them (and the emitter rates) as authored
+        factor = 1.0
+        if volume is not None and entry["sources"]:
+            matrix, factor = self._fit_sources(entry["sources"], volume)
+            entry["xform_op"].Set(matrix)
+        elif volume is not None and entry["bounds"] is not None:
+            matrix, covered = self._fit(entry["bounds"], volume)
+            entry["xform_op"].Set(matrix)
+            if not covered and not entry["warned"]:
+                print(f"Weather pool: {effect.name.lower()} is smaller than the camera volume; it covers its center")
+                entry["warned"] = True
+        elif volume is not None:
+            entry["xform_op"].Set(Gf.Matrix4d().SetTranslate(volume.GetMidpoint()))
+        elif position is not None:
+            entry["xform_op"].Set(Gf.Matrix4d().SetTranslate(Gf.Vec3d(*position)))
+
+        for type_name, attr, size, _ in entry["sources"]:
+            attr.Set(size * factor)
+            # The extent bounds the shape for the renderer; it is not derived from the size attribute
+            half = size * factor if type_name == "Sphere" else size * factor / 2.0
+            UsdGeom.Boundable(attr.GetPrim()).GetExtentAttr().Set([Gf.Vec3f(-half), Gf.Vec3f(half)])
+
+        # A source resized by `factor` has factor^3 its volume: the same density needs factor^3 the particles
+        for attr, value in entry["attributes"]:
+            scaled = value * intensity
+            if attr.GetName().split(":")[-1] in self.RATE_ATTRIBUTES:
+                scaled *= factor**3
+            attr.Set(int(round(scaled)) if isinstance(value, int) else float(scaled))
+
+        # Baked effects: show one settled snapshot
+        snapshots = entry["snapshots"]
+        if snapshots:
+            index = (snapshot if snapshot is not None else np.random.randint(len(snapshots))) % len(snapshots)
+            if entry["shown"] != index:
+                if entry["shown"] is not None:
+                    self.manip.toggle_visibility(stage, snapshots[entry["shown"]], is_visible=False)
+                self.manip.toggle_visibility(stage, snapshots[index], is_visible=True)
+                entry["shown"] = index
+
+        if self.active != effect:
+            self.manip.toggle_visibility(stage, prim, is_visible=True)
+            self.active = effect
+
+        return [prim]
+
+    @staticmethod
+    def _fit(bounds, volume):
+        """
+        Translation centering `bounds` on `volume`, and whether the bounds then cover the whole volume.
+        A non-uniform scale would distort the particles (and baked snapshots), so the effect keeps its size.
+        """
+        matrix = Gf.Matrix4d().SetTranslate(volume.GetMidpoint() - bounds.GetMidpoint())
+        covered = all(n >= t for n, t in zip(bounds.GetSize(), volume.GetSize()))
+
+        return matrix, covered
+
+    @staticmethod
+    def _fit_sources(sources, volume):
+        """
+        Translation centering the emitter sources on `volume`, and the factor resizing every source so that it
+        encloses the volume: a sphere needs half the volume's diagonal as its radius, a cube its largest side.
+        """
+        size = volume.GetSize()
+
+        center = Gf.Range3d()
+        factor = 0.0
+        for type_name, _, _, bounds in sources:
+            center.UnionWith(bounds)
+            native = bounds.GetSize()
+            if type_name == "Sphere":
+                factor = max(factor, size.GetLength() / native[0])
+            else:
+                factor = max(factor, max(s / n for s, n in zip(size, native)))
+
+        matrix = Gf.Matrix4d().SetTranslate(volume.GetMidpoint() - center.GetMidpoint())
+        return matrix, factor
+
+    def deactivate(self, stage):
+        self.activate(stage, None)
 
 
 class WeatherSuite:
@@ -28,26 +244,42 @@ class WeatherSuite:
     _weather_effect = None
     _effect_path = ""
 
-    def __init__(self, path="omnitools/Weather/", lat=None, lon=None):
+    def __init__(self, path="omnitools/Weather/", lat=None, lon=None, client=None, scenarios=None):
+        """
+        client: WeatherClient used for API lookups (default: an HTTP client created on the first lookup)
+        scenarios: WeatherScenarioIndex of historical records, for offline lookups
+        """
         print("Initialized Weather Suite.")
         print("Weather path:", path)
         self._effect_path = str(path)
         self.lat = lat
         self.lon = lon
+        self.client = client
+        self.scenarios = scenarios
 
         # Explicitly state weather bindings
         # TODO: Can we define these better?
-        self._weather_dict[WeatherOptions.TEST] = self._effect_path + "test.usd"
+        self._weather_dict[WeatherOptions.TEST] = os.path.join(self._effect_path, "test.usd")
         self._weather_dict[WeatherOptions.SUN] = None
-        self._weather_dict[WeatherOptions.RAIN] = self._effect_path + "rain.usd"
-        self._weather_dict[WeatherOptions.SNOW] = self._effect_path + "snow.usd"
-        self._weather_dict[WeatherOptions.STORM] = self._effect_path + "thunder.usd"
+        self._weather_dict[WeatherOptions.RAIN] = os.path.join(self._effect_path, "rain.usd")
+        self._weather_dict[WeatherOptions.SNOW] = os.path.join(self._effect_path, "snow.usd")
+        self._weather_dict[WeatherOptions.STORM] = os.path.join(self._effect_path, "thunder.usd")
+        self._weather_dict[WeatherOptions.DUST] = os.path.join(self._effect_path, "dust.usd")
 
         # SunStudy variables
         SunstudyPlayer().latitude = lat
         SunstudyPlayer().longitude = lon
 
         self.manip = ManipulationSuite()
+        self.effect_pool = WeatherEffectPool(self.manip)
+
+        # Analytic sun (see set_sun_light); without a sun light the SunStudy player is used
+        self.solar = SolarPosition()
+        self.stage = None
+        self.sun_light = None
+        self.up_axis = "Z"
+        self.north_offset = 0.0
+        self.utc_offset = None
 
     # Retrieve current weather effect
     def get_weather_effect_path(self):
@@ -60,23 +292,59 @@ class WeatherSuite:
     def set_weather_effect(self, value):
         self._weather_effect = value
 
-    # Fetch data from an API, with key, lat, and lon values
+    def preload_effects(self, stage, root="/Root/Weather_Pool", baked_dir=None):
+        """
+        References all weather effects once (at scene init), so later switches are visibility toggles.
+        baked_dir: directory of effects baked by WeatherBaker (default: <weather path>/baked)
+        """
+        self.effect_pool.root = root
+        baked_dir = baked_dir if baked_dir is not None else os.path.join(self._effect_path, "baked")
+        self.effect_pool.load(stage, self._weather_dict, baked_dir=baked_dir)
+
+    def get_bakeable_effects(self):
+        """(name, USD path) of every effect that has a file, for WeatherBaker"""
+        return {
+            effect.name.lower(): path
+            for effect, path in self._weather_dict.items()
+            if effect != WeatherOptions.TEST and path is not None and os.path.exists(path)
+        }
+
+    @staticmethod
+    def effect_from_description(weather_desc):
+        """Weather effect matching an API/UI description, e.g. "light rain" -> RAIN (None if unknown)"""
+        weather_desc = weather_desc.lower()
+        if "sun" in weather_desc or "cloud" in weather_desc or "clear" in weather_desc:
+            return WeatherOptions.SUN
+        if "rain" in weather_desc or "drizzle" in weather_desc:
+            return WeatherOptions.RAIN
+        if "snow" in weather_desc or "sleet" in weather_desc:
+            return WeatherOptions.SNOW
+        if "thunder" in weather_desc or "storm" in weather_desc:
+            return WeatherOptions.STORM
+        if "dust" in weather_desc or "sand" in weather_desc or "haze" in weather_desc:
+            return WeatherOptions.DUST
+        return None
+
+    def get_client(self, api_key=None):
+        # Lookups share one cached, pooled client
+        if self.client is None:
+            self.client = WeatherClient(HttpWeatherBackend(api_key))
+        return self.client
+
+    def needs_api_key(self, api_key=None):
+        """Whether a lookup still lacks an API key: only the HTTP backend needs one, recorded responses do not"""
+        if api_key is not None:
+            return False
+        if self.client is None:
+            return True
+        return isinstance(self.client.backend, HttpWeatherBackend) and self.client.backend.api_key is None
+
+    # Fetch data from an API, with key, lat, and lon values (blocking; cached per location)
     def fetch_from_api(self, api_key, lat, lon):
-        # Make URL request with URLLib3
-        url = "https://api.openweathermap.org/data/2.5/onecall?lat=%s&lon=%s&appid=%s&units=metric" % (
-            lat,
-            lon,
-            api_key,
-        )
-
-        http = urllib3.PoolManager()
-        response = http.request("GET", url)
-
-        # Decode data into JSON format
-        data = json.loads(response.data.decode("utf-8"))
+        data = self.get_client(api_key).get(lat, lon)
 
         # Get description of current weather; needed to show real-time
-        weather_desc = data["current"]["weather"][0]["description"]
+        weather_desc = describe(data)
 
         print("Current Weather: " + str(weather_desc))
 
@@ -86,6 +354,15 @@ class WeatherSuite:
             print("Could not fetch weather data! Please check that your configuration is correct.")
             raise
 
+    async def fetch_from_api_async(self, api_key, lat, lon):
+        """Same as fetch_from_api without blocking the event loop"""
+        return describe(await self.get_client(api_key).get_async(lat, lon))
+
+    def peek_weather(self, lat=None, lon=None):
+        """Cached description of the current weather, or None while it is being fetched; never waits"""
+        data = self.get_client().peek(self.lat if lat is None else lat, self.lon if lon is None else lon)
+        return describe(data) if data is not None else None
+
     def configure_weather(
         self,
         stage=None,
@@ -94,11 +371,24 @@ class WeatherSuite:
         rotation=(0.0, 0.0, 0.0),
         weather_desc=None,
         test_mode=False,
+        intensity=1.0,
+        snapshot=None,
+        volume=None,
     ):
         # Put effect in non-caps as a safety precaution
         weather_desc = weather_desc.lower()
         weather = None
 
+        # Preloaded effects: switching is a visibility toggle, no prims are created or deleted
+        if self.effect_pool.loaded and not test_mode:
+            effect = self.effect_from_description(weather_desc)
+            if effect is not None:
+                self.set_weather_effect(effect)
+                weather = self.effect_pool.activate(
+                    stage, effect, intensity=intensity, position=position, snapshot=snapshot, volume=volume
+                )
+            return weather
+
         print(weather_desc)
 
         if test_mode:
@@ -205,8 +495,63 @@ class WeatherSuite:
     # SUN BEHAVIOUR #
     #################
 
-    def configure_time_of_day(self, new_hr):
-        # Note: new_hr must be between 0 and 23
+    def set_sun_light(self, stage, path=None, north_offset=0.0, utc_offset=None):
+        """
+        Drives the given distant light (default: the first one of the stage) from the analytic sun position.
+        north_offset: clockwise angle (degrees) from the stage's +Y (Z-up) or -Z (Y-up) axis to true north
+        utc_offset: hours local time is ahead of UTC (default: estimated from the longitude)
+        Returns the path of the sun light, or None if the stage has none (the SunStudy player is then used)
+        """
+        if path is None:
+            lights = [p for p in stage.Traverse() if p.GetTypeName() == "DistantLight"]
+            path = str(lights[0].GetPath()) if lights else None
+
+        if path is None or not stage.GetPrimAtPath(path).IsValid():
+            print("No sun light found; time of day is set through the SunStudy player.")
+            self.sun_light = None
+            return None
+
+        self.stage = stage
+        self.sun_light = stage.GetPrimAtPath(path)
+        self.up_axis = str(UsdGeom.GetStageUpAxis(stage))
+        self.north_offset = north_offset
+        self.utc_offset = utc_offset
+
+        print(f"Sun light: {path}")
+        return path
+
+    def sun_position(self, when):
+        """(azimuth, elevation) of the sun at local time `when` (pandas Timestamp) at the configured location"""
+        utc_offset = self.utc_offset if self.utc_offset is not None else round(self.lon / 15.0)
+        return self.solar.position(self.lat, self.lon, when - pd.Timedelta(hours=utc_offset))
+
+    def _orient_sun(self, rotation_xyz):
+        orient = self.sun_light.GetAttribute("xformOp:orient")
+        if orient.IsValid() and orient.Get() is not None:
+            rx, ry, rz = rotation_xyz
+            # XYZ order: X is applied first
+            rotation = Gf.Rotation(Gf.Vec3d.XAxis(), rx) * Gf.Rotation(Gf.Vec3d.YAxis(), ry)
+            quat = (rotation * Gf.Rotation(Gf.Vec3d.ZAxis(), rz)).GetQuat()
+            orient.Set(Gf.Quatf(quat) if isinstance(orient.Get(), Gf.Quatf) else quat)
+        else:
+            self.manip.set_rotation(self.stage, self.sun_light.GetPath(), rotation_xyz)
+
+    def configure_time_of_day(self, new_hr, when=None):
+        """
+        Note: new_hr must be between 0 and 23; `when` (local pandas Timestamp) gives the exact date and time.
+        Returns the sun (azimuth, elevation) in degrees when the analytic sun is used, else None
+        """
+        if self.sun_light is not None:
+            if when is None:
+                when = pd.Timestamp.today().normalize() + pd.Timedelta(hours=new_hr)
+
+            azimuth, elevation = self.sun_position(when)
+            self._orient_sun(light_rotation_xyz(sun_direction(azimuth, elevation, self.up_axis, self.north_offset)))
+
+            # No sunlight through the ground at night
+            self.manip.toggle_visibility(self.stage, self.sun_light, is_visible=elevation > 0.0)
+
+            return azimuth, elevation
 
         # Configure sun study with new times
         SunstudyPlayer().start_time = new_hr
@@ -217,9 +562,11 @@ class WeatherSuite:
         SunstudyPlayer().stop()
 
     def configure_lat(self, lat_val):
+        self.lat = lat_val
         SunstudyPlayer().latitude = lat_val
 
     def configure_lon(self, lon_val):
+        self.lon = lon_val
         SunstudyPlayer().longitude = lon_val
 
     #######################
@@ -235,11 +582,24 @@ class WeatherSuite:
         api_key=None,
         weather_desc=None,
         test_mode=False,
+        when=None,
     ):
+        """
+        Sets the weather from the API (use_api), from the historical scenarios in effect at `when` (local time;
+        default: now), or from a description.
+        API lookups go through the cached client and never wait: while the first response of a location is being
+        fetched, nothing is set and None is returned (see get_weather_async to wait for it).
+        """
+        # Historical records stand in for the API on offline nodes
+        if not use_api and weather_desc is None and self.scenarios is not None:
+            when = when if when is not None else pd.Timestamp.today()
+            weather_desc = self.scenarios.lookup(self.lat, self.lon, when)["weather"]
+            return self.configure_weather(stage, prefix, position, rotation, weather_desc, test_mode)
+
         # Initial checks
-        if use_api and (api_key is None):
+        if use_api and self.needs_api_key(api_key):
             print("API Key Error! Cannot set weather via API without a valid API Key.")
-            raise
+            raise ValueError("Weather API key missing")
         elif (use_api and self.lat is None) or (use_api and self.lon is None):
             print("LATITUDE or LONGITUDE parameters are missing! Cannot set weather via API without these parameters.")
             raise
@@ -249,7 +609,12 @@ class WeatherSuite:
 
         # Identify processing means
         if use_api:
-            weather_desc = self.fetch_from_api(api_key, self.lat, self.lon)
+            # The first lookup creates the client with the key
+            self.get_client(api_key)
+            weather_desc = self.peek_weather()
+            if weather_desc is None:
+                print("Weather lookup in progress; the weather is set once its response has arrived.")
+                return None
             weather_effect = self.configure_weather(stage, prefix, position, rotation, weather_desc, test_mode)
 
         elif weather_desc is not None:
@@ -261,3 +626,15 @@ class WeatherSuite:
             raise
 
         return weather_effect
+
+    async def get_weather_async(self, stage=None, prefix=None, position=(), rotation=(), api_key=None, test_mode=False):
+        """Sets the weather from the API like get_weather, waiting for the response without blocking the event loop"""
+        if self.needs_api_key(api_key):
+            print("API Key Error! Cannot set weather via API without a valid API Key.")
+            raise ValueError("Weather API key missing")
+        if self.lat is None or self.lon is None:
+            print("LATITUDE or LONGITUDE parameters are missing! Cannot set weather via API without these parameters.")
+            raise ValueError("Weather API location missing")
+
+        weather_desc = await self.fetch_from_api_async(api_key, self.lat, self.lon)
+        return self.configure_weather(stage, prefix, position, rotation, weather_desc, test_mode)
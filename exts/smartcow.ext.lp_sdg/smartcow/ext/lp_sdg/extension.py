@@ -20,10 +20,10 @@ omni.kit.pipapi.install("tqdm")
 omni.kit.pipapi.install("numpy")
 omni.kit.pipapi.install("pandas")
 omni.kit.pipapi.install("opencv-python")
-omni.kit.pipapi.install("torch==2.4.0 torchvision==0.19.0 torchaudio==2.4.0 --index-url https://download.pytorch.org/whl/cu121")
 
 from .style import WIN_WIDTH, WIN_HEIGHT
 from .window import LPSDGWindow
+from .headless import JOB_SPEC_SETTING, run_job_and_quit
 
 ####################
 ## MAIN EXTENSION ##
@@ -40,6 +40,14 @@ class LPSDGExtension(omni.ext.IExt):
     settings = carb.settings.get_settings()
 
     def on_startup(self, ext_id):
+        self._menu = None
+
+        # Headless job: run it without building the window and quit Kit when done
+        job_spec = self.settings.get(JOB_SPEC_SETTING)
+        if job_spec:
+            asyncio.ensure_future(run_job_and_quit(job_spec))
+            return
+
         # The ability to show the window if the system requires it. We use it
         # in QuickLayout.
         ui.Workspace.set_show_window_fn(LPSDGExtension.WINDOW_NAME, partial(self.show_window, None))
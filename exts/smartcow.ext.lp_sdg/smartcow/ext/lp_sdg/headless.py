@@ -0,0 +1,65 @@
+"""
+Runs a generation job without the LP-SDG window, e.g. on a render farm:
+
+    kit --no-window --enable smartcow.ext.lp_sdg --/exts/smartcow.ext.lp_sdg/job_spec=/data/job.json
+
+or through `python scripts/run_job.py /data/job.json --kit ...`, which starts Kit that way. The job must be set
+before the extension starts (a script run with `--exec` comes too late: the window is already built). Kit quits with
+status 0 on success, 1 if the run failed and 2 if the job file is invalid.
+"""
+import random
+import traceback
+
+import numpy as np
+import omni.kit.app
+
+from .custom_exts.indianplategensuite import IndianLicensePlateGenerator
+from .custom_exts.jobsuite import JobSpec
+from .lp_sdg_control_panel import LP_SDG_Control_Panel
+
+# Exit codes
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_INVALID_JOB = 2
+
+# Kit setting holding the path of the job file to run at startup
+JOB_SPEC_SETTING = "/exts/smartcow.ext.lp_sdg/job_spec"
+
+
+async def run_job(job):
+    """Generates the dataset described by a JobSpec"""
+    if job.seed is not None:
+        random.seed(job.seed)
+        np.random.seed(job.seed)
+
+    panel = LP_SDG_Control_Panel()
+    panel.apply_job(job)
+
+    await panel.initialize(block=True)
+    if not panel.VEHICLES:
+        raise RuntimeError(f"No vehicles found after loading the scene {panel.scene_dir}")
+
+    await panel.create_synthetic_data(
+        panel.sdg_samples, rendermode=panel.rendermode, start_index=job.start_index
+    )
+
+
+async def run_job_and_quit(spec_path):
+    """Runs the job file at `spec_path` and quits Kit with its status code"""
+    exit_code = EXIT_OK
+    try:
+        # Plate types are checked here too, so that a job naming an unknown one is reported as an invalid job
+        job = JobSpec.from_file(spec_path, plate_types=IndianLicensePlateGenerator.COLOR_COMBINATIONS)
+    except (OSError, ValueError, TypeError) as e:
+        print(f"ERROR! Invalid job file {spec_path}: {e}")
+        exit_code = EXIT_INVALID_JOB
+    else:
+        print(f"Running job {spec_path}: {job.to_dict()}")
+        try:
+            await run_job(job)
+        except Exception:
+            traceback.print_exc()
+            exit_code = EXIT_FAILED
+
+    omni.kit.app.get_app().post_quit(exit_code)
+    return exit_code
@@ -1,5 +1,5 @@
 from pickle import FALSE
-from random import random
+import random
 from typing import Optional, List
 import omni
 
@@ -10,12 +10,12 @@ import omni.usd
 import omni.ui as ui
 import omni.kit.commands
 import omni.timeline
-import gc
 # Carb imports
 import carb.events
 import carb.settings
 
 # Non-Omniverse Packages
+import csv
 import os
 import sys
 import pathlib
@@ -24,14 +24,28 @@ from pathlib import Path
 # from elasticsearch import Elasticsearch
 import numpy as np
 import pandas as pd
-import torch
 
 from smartcow.ext.lp_sdg.custom_exts.capturesuite import CaptureSuite
 from smartcow.ext.lp_sdg.custom_exts.weathersuite import WeatherSuite
+from smartcow.ext.lp_sdg.custom_exts.scenariosuite import WeatherScenarioIndex
+from smartcow.ext.lp_sdg.custom_exts.solarsuite import is_night
+from smartcow.ext.lp_sdg.custom_exts.weatherapisuite import WeatherClient, HttpWeatherBackend, RecordedWeatherBackend
 from smartcow.ext.lp_sdg.custom_exts.manipulationsuite import ManipulationSuite
+from smartcow.ext.lp_sdg.custom_exts.handlesuite import get_registry
+from smartcow.ext.lp_sdg.custom_exts.visibilitysuite import VisibilityManager
 from smartcow.ext.lp_sdg.custom_exts.looksuite import LooksSuite
 from smartcow.ext.lp_sdg.custom_exts.movementsuite import MovementSuite
 from smartcow.ext.lp_sdg.custom_exts.camerasuite import CameraSuite
+from smartcow.ext.lp_sdg.custom_exts.vehiclesuite import VehicleRegistry
+from smartcow.ext.lp_sdg.custom_exts.framesuite import FrameSuite
+from smartcow.ext.lp_sdg.custom_exts.pipelinesuite import PipelineSuite, PipelineStage
+from smartcow.ext.lp_sdg.custom_exts.encodesuite import EncoderPool
+from smartcow.ext.lp_sdg.custom_exts.manifestsuite import SampleManifest
+from smartcow.ext.lp_sdg.custom_exts.metricsuite import MetricsSuite
+from smartcow.ext.lp_sdg.custom_exts.tracesuite import TraceSuite
+from smartcow.ext.lp_sdg.custom_exts.cachesuite import CacheManager
+from smartcow.ext.lp_sdg.custom_exts.samplingsuite import SppPolicy, RenderModeScheduler, plate_areas
+from smartcow.ext.lp_sdg.custom_exts.dedupsuite import DuplicateFilter
 
 from smartcow.ext.lp_sdg.custom_exts.indianplategensuite import IndianLicensePlateGenerator
 from tqdm import tqdm
@@ -42,8 +56,59 @@ from .settings import (
     FPS,
     RESOLUTION,
     SDG_SAMPLES,
+    SDG_SEED,
+    SDG_RESUME,
+    MANIFEST_SYNC_EVERY,
+    METRICS_ENABLED,
+    METRICS_EXPORT_INTERVAL,
+    TRACE_ENABLED,
+    TRACE_CAPACITY,
+    OV_CACHE_PATH,
+    OV_CACHE_MAX_SIZE_MB,
+    OV_CACHE_MAX_AGE_HOURS,
+    OV_CACHE_SCAN_INTERVAL,
     RENDERMODE,
+    RENDERMODE_MIX,
+    RENDERMODE_BLOCK,
+    RENDERMODE_PT_AT_NIGHT,
+    RENDERMODE_PT_WEATHER,
     SPP,
+    ADAPTIVE_SPP,
+    SPP_LEVELS,
+    SPP_BASE,
+    SPP_REFERENCE_AREA,
+    SPP_NIGHT_FACTOR,
+    SPP_WEATHER_FACTORS,
+    READY_FRAMES,
+    READY_TIMEOUT,
+    PIPELINE_QUEUE_SIZE,
+    CAPTURE_MODE,
+    CAMERAS_PER_SCENE,
+    IMAGE_FORMAT,
+    IMAGE_COMPRESSION,
+    IMAGE_QUALITY,
+    IMAGE_PRESET,
+    PLATE_TEXTURE_PRESET,
+    DEDUP_ENABLED,
+    DEDUP_MAX_DISTANCE,
+    DEDUP_REGION,
+    ENCODER_WORKERS,
+    ENCODER_MAX_PENDING,
+    WEATHER_API_KEY,
+    WEATHER_API_URL,
+    WEATHER_RECORDED_PATH,
+    WEATHER_CACHE_TTL,
+    WEATHER_ERROR_TTL,
+    WEATHER_API_TIMEOUT,
+    WEATHER_PROBABILITIES,
+    WEATHER_INTENSITY_RANGE,
+    WEATHER_FOLLOW_CAMERA,
+    WEATHER_SCENARIOS_PATH,
+    SUN_LIGHT_PATH,
+    SUN_NORTH_OFFSET,
+    SOLAR_UTC_OFFSET,
+    SOLAR_RANDOM_TIME,
+    NIGHT_SUN_ELEVATION,
     LAT,
     LON,
     VEHICLES_PATH,
@@ -52,6 +117,7 @@ from .settings import (
     MATERIALS_PATH,
     FONT_PATH,
     RTO_DATA_PATH,
+    VEHICLE_CLASSES_PATH,
     PLATE_TEX_PATH,
     SAVE_DIR,
     STRF_DATE,
@@ -59,6 +125,29 @@ from .settings import (
 )
 
 
+# Columns of the annotation CSVs, in file order. New columns go at the end: files written before they existed
+# hold rows that are a prefix of this list (and are upgraded when they are appended to)
+ANNOTATION_COLUMNS = [
+    "TS",
+    "Image",
+    "FPS",
+    "Frame_No",
+    "Latitude",
+    "Longitude",
+    "Object_ID",
+    "x1",
+    "y1",
+    "x2",
+    "y2",
+    "LP_Text",
+    "Render_Mode",
+    "SPP",
+    "Weather",
+    "Sun_Azimuth",
+    "Sun_Elevation",
+]
+
+
 ################
 ## MAIN CLASS ##
 ################
@@ -95,8 +184,15 @@ class LP_SDG_Control_Panel:
         self.__fps = FPS
         self.__resolution = RESOLUTION
         self.__sdg_samples = SDG_SAMPLES
+        self.__sdg_seed = SDG_SEED
+        self.__sdg_resume = SDG_RESUME
         self.__rendermode = RENDERMODE
+        self.__rendermode_mix = RENDERMODE_MIX
         self.__spp = SPP
+        self.__ready_frames = READY_FRAMES
+        self.__pipeline_queue_size = PIPELINE_QUEUE_SIZE
+        self.__capture_mode = CAPTURE_MODE
+        self.__cameras_per_scene = CAMERAS_PER_SCENE
         self.__lat = LAT
         self.__lon = LON
         self.__vehicles_path = VEHICLES_PATH
@@ -105,6 +201,7 @@ class LP_SDG_Control_Panel:
         self.__materials_path = MATERIALS_PATH
         self.__font_path = FONT_PATH
         self.__rto_data_path = RTO_DATA_PATH
+        self.__vehicle_classes_path = VEHICLE_CLASSES_PATH
         self.__plate_tex_path = PLATE_TEX_PATH
         self.__save_dir = str(pathlib.Path(self.EXTENSION_FOLDER_PATH, SAVE_DIR))
         self.__strf_date = STRF_DATE
@@ -155,14 +252,81 @@ class LP_SDG_Control_Panel:
 
         # Call the other exts
         self.manip_suite = ManipulationSuite()
+        self.visibility = VisibilityManager()
         self.looks_suite = LooksSuite()
         self.mov_suite = MovementSuite()
         self.cam_suite = CameraSuite()
         self.cap_suite = CaptureSuite()
+        self.frame_suite = FrameSuite(timeout=READY_TIMEOUT)
+
+        # Stage timings and their timeline; exported next to the generated data
+        self.tracer = TraceSuite(enabled=TRACE_ENABLED, capacity=TRACE_CAPACITY)
+        self.metrics = MetricsSuite(
+            enabled=METRICS_ENABLED, export_interval=METRICS_EXPORT_INTERVAL, tracer=self.tracer
+        )
+
+        # Per-frame SPP from plate size, night and weather
+        self.spp_policy = SppPolicy(
+            levels=SPP_LEVELS,
+            base_spp=SPP_BASE,
+            reference_area=SPP_REFERENCE_AREA,
+            night_factor=SPP_NIGHT_FACTOR,
+            weather_factors=SPP_WEATHER_FACTORS,
+            enabled=ADAPTIVE_SPP,
+            default_spp=self.__spp,
+        )
+
+        # Per-sample render mode of mixed runs (see RENDERMODE_MIX)
+        self.rendermode_scheduler = None
+
+        # Keeps the OV cache within budget from a background thread while generating
+        self.cache_manager = CacheManager(
+            OV_CACHE_PATH,
+            max_size_mb=OV_CACHE_MAX_SIZE_MB,
+            max_age_hours=OV_CACHE_MAX_AGE_HOURS,
+            interval=OV_CACHE_SCAN_INTERVAL,
+        )
+
+        # Encodes buffer captures off the main loop
+        if IMAGE_PRESET is not None:
+            self.encoder = EncoderPool.from_preset(
+                IMAGE_PRESET, workers=ENCODER_WORKERS, max_pending=ENCODER_MAX_PENDING, metrics=self.metrics
+            )
+        else:
+            self.encoder = EncoderPool(
+                fmt=IMAGE_FORMAT,
+                compression=IMAGE_COMPRESSION,
+                quality=IMAGE_QUALITY,
+                workers=ENCODER_WORKERS,
+                max_pending=ENCODER_MAX_PENDING,
+                metrics=self.metrics,
+            )
+
+        # Drops near-duplicate frames before they are encoded and annotated
+        self.dedup_filter = DuplicateFilter(
+            enabled=DEDUP_ENABLED, max_distance=DEDUP_MAX_DISTANCE, region=DEDUP_REGION
+        )
+
+        # Weather data: recorded responses on offline nodes, otherwise the weather API
+        if WEATHER_RECORDED_PATH is not None:
+            weather_backend = RecordedWeatherBackend(Path(self.EXTENSION_FOLDER_PATH, WEATHER_RECORDED_PATH))
+        else:
+            weather_backend = HttpWeatherBackend(
+                WEATHER_API_KEY, base_url=WEATHER_API_URL, timeout=WEATHER_API_TIMEOUT
+            )
+
+        # Historical weather of the deployment sites (offline, sampled per sample)
+        self.weather_scenarios = None
+        if WEATHER_SCENARIOS_PATH is not None:
+            self.weather_scenarios = WeatherScenarioIndex(Path(self.EXTENSION_FOLDER_PATH, WEATHER_SCENARIOS_PATH))
 
         # Calling and setting up the WeatherSuite extension
         self.weatherController = WeatherSuite(
-            path=Path(self.EXTENSION_FOLDER_PATH, "scene_utils/weather/").parent, lat=self.__lat, lon=self.__lon
+            path=Path(self.EXTENSION_FOLDER_PATH, "scene_utils/weather"),
+            lat=self.__lat,
+            lon=self.__lon,
+            client=WeatherClient(weather_backend, ttl=WEATHER_CACHE_TTL, error_ttl=WEATHER_ERROR_TTL),
+            scenarios=self.weather_scenarios,
         )
 
         self.WEATHER_OPTIONS = self.weatherController.get_available_effects()[1:]
@@ -174,9 +338,16 @@ class LP_SDG_Control_Panel:
             arm_mil_bg_material=self.ARM_MIL_BG_MAT,
             arm_height_bg_material=self.ARM_HEIGHT_BG_MAT,
             regions_path=self.__rto_data_path,
-            text_width=self.PLATE_TEX_WIDTH
+            text_width=self.PLATE_TEX_WIDTH,
+            # Plan may run up to (queue size + 2) samples ahead of the render
+            texture_slots=self.__pipeline_queue_size + 3,
+            metrics=self.metrics,
+            texture_preset=PLATE_TEXTURE_PRESET,
         )
 
+        # Per-vehicle prims, class and bbox corrections; built in _initialize_cars_with_lps
+        self.vehicle_registry = VehicleRegistry(Path(self.EXTENSION_FOLDER_PATH, self.__vehicle_classes_path))
+
         #####################
         ## SCENE VARIABLES ##
         #####################
@@ -184,6 +355,18 @@ class LP_SDG_Control_Panel:
         # DataFrame for appending annotator
         self.gen_df = pd.DataFrame()
 
+        # Annotation files known to exist during the current run
+        self._annotation_files = set()
+
+        # Progress bar of the running generation (if any)
+        self._progress = None
+
+        # Committed samples of the running generation; lets an interrupted run resume
+        self.manifest = None
+
+        # Weather volume per ALPR camera (see WEATHER_FOLLOW_CAMERA); built in _initialize_cars_with_lps
+        self.weather_volumes = {}
+
         # FONTS
         self.FONT_LIST = [str(i) for i in Path(self.EXTENSION_FOLDER_PATH, self.__font_path).rglob("*.ttf")]
         # Probability of white plate VS yellow plate
@@ -315,12 +498,79 @@ class LP_SDG_Control_Panel:
     @save_dir.setter
     def save_dir(self, value: str):
         self.__save_dir = value
+        self.IM_PATH = pathlib.Path(self.__save_dir, "snapshots")
+        self.DATA_PATH = pathlib.Path(self.__save_dir, "data")
+
+    @property
+    def plate_tex_path(self) -> str:
+        return self.__plate_tex_path
+
+    @plate_tex_path.setter
+    def plate_tex_path(self, value: str):
+        self.__plate_tex_path = value
+
+    @property
+    def rendermode(self) -> str:
+        return self.__rendermode
+
+    @rendermode.setter
+    def rendermode(self, value: str):
+        self.__rendermode = value
+
+    @property
+    def rendermode_mix(self):
+        return self.__rendermode_mix
+
+    @rendermode_mix.setter
+    def rendermode_mix(self, value):
+        self.__rendermode_mix = value
+
+    @property
+    def spp(self) -> int:
+        return self.__spp
+
+    @spp.setter
+    def spp(self, value: int):
+        self.__spp = value
+
+    @property
+    def scene_dir(self) -> str:
+        return self.__scene_dir
+
+    @scene_dir.setter
+    def scene_dir(self, value: str):
+        self.__scene_dir = value
+
+    def apply_job(self, job):
+        """Applies the fields set in a JobSpec; call before initialize() so the job's scene is loaded"""
+        if job.scene is not None:
+            self.scene_dir = job.scene
+        if job.samples is not None:
+            self.sdg_samples = job.samples
+        if job.resolution is not None:
+            self.resolution = job.resolution
+        if job.spp is not None:
+            self.spp = job.spp
+        if job.rendermode is not None:
+            self.rendermode = job.rendermode
+        if job.pathtracing_ratio is not None:
+            self.rendermode_mix = job.pathtracing_ratio
+        if job.output_dir is not None:
+            self.save_dir = job.output_dir
+        if job.seed is not None:
+            self.__sdg_seed = job.seed
+        if job.resume is not None:
+            self.__sdg_resume = job.resume
+
+        if job.plate_probabilities is not None:
+            job.validate_plate_types(self.plate_generator.COLOR_COMBINATIONS)
+            self.PLATE_PROB = dict(job.plate_probabilities)
 
     #######################
     ## PRIVATE FUNCTIONS ##
     #######################
 
-    async def initialize(self):
+    async def initialize(self, block=False):
         # IMPORTANT!!!!!! PRE-LOAD THE SCENE TO BE ABLE TO SET VARIABLES!
         try:
             # _load_scene(self.__scene_dir)
@@ -328,8 +578,11 @@ class LP_SDG_Control_Panel:
         except Exception as e:
             print(f"ERROR! Could not load stage; Traceback: {e}")
 
-        # Kickstart everything! NOTE: USERS MUST WAIT HERE!
-        asyncio.ensure_future(self._initialize_cars_with_lps())
+        # Kickstart everything! NOTE: USERS MUST WAIT HERE! (headless runs wait by passing block=True)
+        if block:
+            await self._initialize_cars_with_lps()
+        else:
+            asyncio.ensure_future(self._initialize_cars_with_lps())
 
     async def _load_scene_async(self, scene_dir):
         """Asynchronous stage loading"""
@@ -374,6 +627,29 @@ class LP_SDG_Control_Panel:
         vehs = self.STAGE.GetPrimAtPath(self.__vehicles_path)
         self.VEHICLES = [str(p.GetChildren()[0].GetPath()) for p in vehs.GetChildren()]
 
+        # Resolve all per-vehicle prims once, so the generation loop does no path work
+        self.vehicle_registry.build(self.STAGE, self.VEHICLES)
+
+        # Prims switched together; only actual visibility changes are written
+        self.visibility.reset()
+        self.visibility.define_group("scene_lights", self.LIGHTS)
+        self.visibility.define_group("vehicle_lights", [vehicle.lights for vehicle in self.vehicle_registry])
+        self.visibility.define_group("bounding_boxes", [vehicle.bounding_box for vehicle in self.vehicle_registry])
+
+        # Reference every weather effect once; switching weather later only toggles visibility
+        self.weatherController.preload_effects(self.STAGE, root="/Root/Weather_Pool")
+
+        # Weather volume of every (fixed) ALPR camera: its frustum up to the LP readability distance
+        if WEATHER_FOLLOW_CAMERA:
+            self.weather_volumes = {
+                cam: self.cam_suite.get_frustum_box(self.STAGE, cam, self.CAM_THRESH) for cam in self.CAMERAS
+            }
+
+        # Time of day orients the sun light analytically (no SunStudy start/stop per sample)
+        self.weatherController.set_sun_light(
+            self.STAGE, SUN_LIGHT_PATH, north_offset=SUN_NORTH_OFFSET, utc_offset=SOLAR_UTC_OFFSET
+        )
+
         # Create an empty string list to be assigned later
         self.LICENSE_PLATES = [""] * len(self.VEHICLES)
 
@@ -381,7 +657,7 @@ class LP_SDG_Control_Panel:
         # self.SELECTION.set_selected_prim_paths([self.VEHICLES[self.CURR_VEHICLE]], True)
 
         # Switch cam to default car
-        self.cam_suite.switch_camera(self.VEHICLES[self.current_vehicle] + "/Follow_Camera")
+        self.cam_suite.switch_camera(self.vehicle_registry[self.current_vehicle].follow_camera)
 
         # Reset timeline
         self.mov_suite.set_point_on_timeline(0, fps=self.__fps)
@@ -389,23 +665,24 @@ class LP_SDG_Control_Panel:
         # Clear any previously stored data
         self.clear_data()
 
+        # If night: Switch all vehicle lights off
+        self.visibility.set_group("vehicle_lights", self.IS_NIGHT_TIME)
+        self.visibility.commit(self.STAGE)
+
         # Generate LPs for all vehicles
         for current_vehicle in range(len(self.VEHICLES)):
-            # If night: Switch all vehicle lights off
-            self.manip_suite.toggle_visibility(
-                self.STAGE, self.VEHICLES[current_vehicle] + "/Vehicle_Lights", is_visible=self.IS_NIGHT_TIME
-            )
-
             # Assign LP to select vehicle
             lp = self.generate_lp("imagex", current_vehicle, randomize_font=self.randomize_font,
                                   current_font=self.CURRENT_FONT)
 
             self.LICENSE_PLATES[current_vehicle] = lp
 
-    def _get_ground_truth(self, date, stage, vehicle, im_name, lp_text):
-        veh_bbox, aligned_veh_bbox = self.manip_suite.calculate_bbox(stage, vehicle, return_raw=True)
-
-        active_cam = self.cam_suite.get_current_cam()
+    def _find_visible_plate(self, stage, vehicle, active_cam):
+        """
+        Returns (aligned LP bbox, is front plate) of the LP of a vehicle that is fully visible and close enough
+        to the given camera, or None. Needs no viewport, so it can be used before switching cameras.
+        """
+        veh_bbox, aligned_veh_bbox = self.manip_suite.calculate_bbox(stage, vehicle.path, return_raw=True)
 
         if self.cam_suite.is_in_cam_view(stage, active_cam, veh_bbox):
             # Calculates the 2D coordinates of the object with respect to the desired camera
@@ -436,8 +713,8 @@ class LP_SDG_Control_Panel:
             #     lp_text=lp_text,
             # )
 
-            front_plate_path = vehicle + "/NumberPlateAsset_F/NumberPlate"
-            back_plate_path = vehicle + "/NumberPlateAsset_R/NumberPlate"
+            front_plate_path = vehicle.front["plate"]
+            back_plate_path = vehicle.rear["plate"]
 
             front_bbox, aligned_front_box = self.manip_suite.calculate_bbox(stage, front_plate_path, return_raw=True)
 
@@ -472,60 +749,62 @@ class LP_SDG_Control_Panel:
 
                 # Now the LP has been detected, we need the LP text and shit
                 if all(bbox_in_view):
-                    # Calculates the 2D coordinates of the object with respect to the desired camera
-                    lp_coords_2d = [
-                        self.cam_suite.point_to_pixel(
-                            stage,
-                            active_cam,
-                            aligned_lp_bbox.GetCorner(i),
-                            resolution=self.__resolution,
-                        )
-                        for i in range(8)
-                    ]
-
-                    # Returns the 2D Bounding Box calculated from the 3D points
-                    lp_bbox_2d = self.manip_suite.extract_bbox2D(lp_coords_2d)
-
-                    # Show LP 2D Coordinates
-                    # print(f"LP Coords: {lp_bbox_2d}")
-                    lp_bbox_2d = list(lp_bbox_2d)
-                    if "motorbike" in vehicle.lower():
-                        if front:
-                            y_go_up = 20
-                        else:
-                            y_go_up = 0
-                        lp_bbox_2d[2] -= y_go_up
-                        lp_bbox_2d[3] -= y_go_up
-                    if "mercedes" in vehicle.lower():
-                        if front:
-                            y_go_up = 0
-                        else:
-                            y_go_up = 0
-                        lp_bbox_2d[2] -= y_go_up
-                        lp_bbox_2d[3] -= y_go_up
-                    if "range" in vehicle.lower():
-                        if front:
-                            y_go_up = 10
-                        else:
-                            y_go_up = 0
-                        lp_bbox_2d[2] -= y_go_up
-                        lp_bbox_2d[3] -= y_go_up
-                    save_name = im_name.split('.')[0] + "_"
-                    save_name += os.path.basename(vehicle.lower())
-                    save_name += "_front" if front else "_back"
-                    save_name += '.png'
-                    self.append_annotator(
-                        ts=date,
-                        im_name=save_name,
-                        fps=self.__fps,
-                        lat=self.__lat,
-                        lon=self.__lon,
-                        frame=self.mov_suite.get_current_point_on_timeline(self.STAGE),
-                        obj_id=1,
-                        bbox2d=lp_bbox_2d,
-                        lp_text=lp_text,
-                    )
-                    return save_name
+                    return aligned_lp_bbox, front
+        return None
+
+    def _camera_sees_plates(self, stage, cam_path):
+        """Pre-render visibility check: does any vehicle show a readable LP to this camera?"""
+        return any(self._find_visible_plate(stage, vehicle, cam_path) is not None for vehicle in self.vehicle_registry)
+
+    def _get_ground_truth(self, date, stage, vehicle, im_name, lp_text, active_cam=None):
+        """Annotates the visible LP of a vehicle; `vehicle` is an entry of the vehicle registry"""
+        if active_cam is None:
+            active_cam = self.cam_suite.get_current_cam()
+
+        visible_plate = self._find_visible_plate(stage, vehicle, active_cam)
+
+        if visible_plate is not None:
+            aligned_lp_bbox, front = visible_plate
+
+            # Calculates the 2D coordinates of the object with respect to the desired camera
+            lp_coords_2d = [
+                self.cam_suite.point_to_pixel(
+                    stage,
+                    active_cam,
+                    aligned_lp_bbox.GetCorner(i),
+                    resolution=self.__resolution,
+                )
+                for i in range(8)
+            ]
+
+            # Returns the 2D Bounding Box calculated from the 3D points
+            lp_bbox_2d = self.manip_suite.extract_bbox2D(lp_coords_2d)
+
+            # Show LP 2D Coordinates
+            # print(f"LP Coords: {lp_bbox_2d}")
+            lp_bbox_2d = list(lp_bbox_2d)
+
+            # Per-class correction offsets (see scene_utils/vehicle_classes.csv)
+            y_go_up = vehicle.y_offset(front)
+            lp_bbox_2d[2] -= y_go_up
+            lp_bbox_2d[3] -= y_go_up
+
+            save_name = im_name.split('.')[0] + "_"
+            save_name += vehicle.save_stem
+            save_name += "_front" if front else "_back"
+            save_name += os.path.splitext(im_name)[1] or ".png"
+            self.append_annotator(
+                ts=date,
+                im_name=save_name,
+                fps=self.__fps,
+                lat=self.__lat,
+                lon=self.__lon,
+                frame=self.mov_suite.get_current_point_on_timeline(self.STAGE),
+                obj_id=1,
+                bbox2d=lp_bbox_2d,
+                lp_text=lp_text,
+            )
+            return save_name
         return None
 
     ######################
@@ -547,7 +826,7 @@ class LP_SDG_Control_Panel:
         lp_text = await asyncio.ensure_future(
             self.plate_generator.make_lp(
                 self.STAGE,
-                self.VEHICLES[current_vehicle],
+                self.vehicle_registry[current_vehicle],
                 self.PLATE_TEX_WIDTH,
                 self.PLATE_TEX_HEIGHT,
                 vehicle_path,
@@ -564,105 +843,471 @@ class LP_SDG_Control_Panel:
         )
         return lp_text
 
-    def get_directory_size(self, directory):
-        total_size = 0
-        for dirpath, dirnames, filenames in os.walk(directory):
-            for f in filenames:
-                fp = os.path.join(dirpath, f)
-                total_size += os.path.getsize(fp)
-        size_in_mb = total_size / (1024 * 1024)
-        return size_in_mb
-
-    def clear_cache(self, directory):
-        for dirpath, dirnames, filenames in os.walk(directory):
-            for f in filenames:
-                if "plate" in f and "image" in f:
-                    fp = os.path.join(dirpath, f)
-                    os.remove(fp)
-
     async def randomize_scene(self, im_name="-1", rendermode="PathTracing", save=False):
-        # Clear data so that the randomizer can append new data
-        self.clear_data()
-        directory_path = '/home/guest/.cache/ov'
-        size_in_mb = self.get_directory_size(directory_path)
-        if size_in_mb > 20000:
-            torch.cuda.empty_cache()
-            gc.collect()
-            self.clear_cache(directory_path)
+        """Randomizes (and optionally captures) a single sample by running all pipeline stages in order"""
+        sample = self._new_sample(im_name, rendermode, save)
+
+        with self.tracer.span("plan"):
+            sample = self.plan_sample(sample)
+        with self.tracer.span("author"):
+            sample = await self.author_sample(sample)
+        with self.tracer.span("capture"):
+            sample = await self.capture_sample(sample)
+        with self.tracer.span("write"):
+            sample = await self.write_sample(sample)
+        with self.tracer.span("annotate"):
+            self.annotate_sample(sample)
+
+    ###################
+    ## SAMPLE STAGES ##
+    ###################
+
+    def _new_sample(self, im_name, rendermode="PathTracing", save=False, index=None, seed=None):
+        """All state of a single sample travels through the stages in this dict"""
+        return {
+            "index": index,
+            "seed": seed,
+            "im_name": im_name,
+            "rendermode": rendermode,
+            "save": save,
+            # Read on the main loop; the plan stage may run on a worker thread
+            "end_timecode": self.mov_suite.get_end_timecode(self.STAGE),
+            "n_cameras": len(self.CAMERAS),
+            "n_vehicles": len(self.VEHICLES),
+        }
+
+    def plan_sample(self, sample):
+        """Plan: draws every random choice of a sample and renders its plate textures; no USD work"""
+        # Samples of a run are reproducible from the seed recorded in the manifest
+        if sample.get("seed") is not None:
+            random.seed(sample["seed"])
+            np.random.seed(sample["seed"])
 
-        # 1) Position Cars
-        timeline_pos = np.random.randint(0, self.mov_suite.get_end_timecode(self.STAGE))
-        self.mov_suite.set_point_on_timeline(timeline_pos, fps=self.__fps)
         now_time = pd.to_datetime("today")
+        sample["now_time"] = now_time
+
+        # 1) Position Cars
+        sample["timeline_pos"] = np.random.randint(0, sample["end_timecode"])
+
+        # 1) Select Camera(s); they are switched to in the capture stage
+        sample["cameras"] = self._plan_cameras(sample["n_cameras"])
+
+        # Historical weather record of the site: weather and time of day are drawn together
+        scenario = None
+        if self.weather_scenarios is not None:
+            scenario = self.weather_scenarios.sample(self.__lat, self.__lon)
+
+        # 2) Set Time-Of-Day (based on capture time, the historical record, or a random time of the day)
+        sample["sun_time"] = now_time
+        if scenario is not None:
+            sample["sun_time"] = pd.Timestamp(scenario["timestamp"])
+        elif SOLAR_RANDOM_TIME:
+            sample["sun_time"] = now_time.normalize() + pd.Timedelta(minutes=int(np.random.randint(0, 24 * 60)))
+        sample["tod_hour"] = sample["sun_time"].hour
+
+        # 3) Control Lights (sun elevation of the sample, or hour-based without an analytic sun)
+        elevation = None
+        if self.weatherController.sun_light is not None:
+            elevation = self.weatherController.sun_position(sample["sun_time"])[1]
+        sample["show_lights"] = is_night(sample["tod_hour"], elevation, threshold=NIGHT_SUN_ELEVATION)
+
+        # Weather of this sample (applied from the preloaded effect pool)
+        if scenario is not None:
+            effect = self.weatherController.effect_from_description(str(scenario["weather"]))
+            sample["weather"] = effect.name.lower() if effect is not None else "sun"
+        elif WEATHER_PROBABILITIES:
+            names = list(WEATHER_PROBABILITIES)
+            probs = np.array([WEATHER_PROBABILITIES[n] for n in names], dtype=float)
+            sample["weather"] = names[np.random.choice(len(names), p=probs / probs.sum())]
+
+        if sample.get("weather") is not None:
+            sample["weather_intensity"] = float(np.random.uniform(*WEATHER_INTENSITY_RANGE))
+            # Settled snapshot of baked effects
+            sample["weather_snapshot"] = int(np.random.randint(0, 2**16))
+
+        # Mixed runs: render mode of this sample's block (night/weather may force PathTracing)
+        if self.rendermode_scheduler is not None and sample["index"] is not None:
+            sample["rendermode"] = self.rendermode_scheduler.assign(
+                sample["index"],
+                night=sample["show_lights"],
+                weather=self._sample_weather(sample),
+            )
+
+        # 4) Generate LP textures for all vehicles
+        sample["plates"] = []
+        for current_vehicle in range(sample["n_vehicles"]):
+            if self.randomize_font:
+                current_font = self.FONT_LIST[np.random.choice(len(self.FONT_LIST))]
+            else:
+                current_font = self.CURRENT_FONT
+
+            vehicle_path = str(Path(self.EXTENSION_FOLDER_PATH, self.__plate_tex_path, str(current_vehicle) + "_"))
+
+            sample["plates"].append(
+                self.plate_generator.prepare_lp(
+                    vehicle_path,
+                    self.PLATE_TEX_WIDTH,
+                    self.PLATE_TEX_HEIGHT,
+                    self.PLATE_PROB,
+                    current_font,
+                    sample["im_name"],
+                    bluriness=self.bluriness,
+                    sobel=0,
+                    padding=12,
+                    linespace=0,
+                    multiline=False,
+                )
+            )
+
+        return sample
+
+    def _apply_weather(self, sample, cam_path):
+        """Shows the planned weather of a sample around the given camera (fitted to its frustum if known)"""
+        if sample.get("weather") is None:
+            return
+
+        self.weatherController.configure_weather(
+            stage=self.STAGE,
+            position=self.cam_suite.get_position(self.STAGE, cam_path),
+            weather_desc=sample["weather"],
+            intensity=sample["weather_intensity"],
+            snapshot=sample["weather_snapshot"],
+            volume=self.weather_volumes.get(cam_path),
+        )
+
+    def _sample_weather(self, sample):
+        """Name of the weather effect of a sample (the planned one, else the one set from the UI)"""
+        if sample.get("weather") is not None:
+            return sample["weather"]
+
+        weather = self.weatherController.get_weather_effect()
+        return weather.name if weather is not None else None
+
+    def _plan_cameras(self, n_cameras):
+        """One random camera (default), all cameras (0) or a random subset of CAMERAS_PER_SCENE cameras"""
+        if self.__cameras_per_scene == 0 or self.__cameras_per_scene >= n_cameras:
+            return list(range(n_cameras))
+        return [int(c) for c in np.random.choice(n_cameras, self.__cameras_per_scene, replace=False)]
 
-        # 1) Select Camera
-        camera_sel = np.random.randint(0, len(self.CAMERAS))
-        self.cam_suite.switch_camera(self.CAMERAS[camera_sel])
+    async def author_sample(self, sample):
+        """Author USD: applies the planned scene state to the stage"""
+        authoring_start = self.metrics.start()
 
-        # 2) Set Time-Of-Day (based on capture time)
-        tod_hour = now_time.hour
-        self.weatherController.configure_time_of_day(tod_hour)
+        # 1) Position Cars
+        self.mov_suite.set_point_on_timeline(sample["timeline_pos"], fps=self.__fps)
+
+        # 2) Set Time-Of-Day (based on capture time); exact sun geometry is recorded with the annotations
+        sample["sun"] = self.weatherController.configure_time_of_day(sample["tod_hour"], when=sample["sun_time"])
 
-        # 3) Control Lights (hour-based)
-        show_lights = True if (tod_hour >= 21 and tod_hour <= 6) else False
+        # 3) Control Lights (hour-based): scene and vehicle lights flip in one change block, only if they change
+        show_lights = sample["show_lights"]
         self.IS_NIGHT_TIME = show_lights
 
-        [self.manip_suite.toggle_visibility(self.STAGE, light, is_visible=show_lights) for light in self.LIGHTS]
+        self.visibility.set_group("scene_lights", show_lights)
+        self.visibility.set_group("vehicle_lights", show_lights)
+        self.visibility.commit(self.STAGE)
+
+        # Weather: a visibility toggle and intensity change on the preloaded effects
+        self._apply_weather(sample, self.CAMERAS[sample["cameras"][0]])
+
+        self.metrics.stop("usd_authoring", authoring_start)
+
+        # Let the timeline change reach the stage before the visibility checks of the capture stage
+        with self.metrics.timer("wait"):
+            await self.frame_suite.wait_frames(1)
+
+        authoring_start = self.metrics.start()
+
+        # 4) Bind the pre-generated LPs to all vehicles
+        for current_vehicle, (save_path, lp_text, lp_type) in enumerate(sample["plates"]):
+            self.plate_generator.apply_lp(self.STAGE, self.vehicle_registry[current_vehicle], save_path, lp_type)
+
+            self.LICENSE_PLATES[current_vehicle] = lp_text
+
+        self.metrics.stop("usd_authoring", authoring_start)
+
+        return sample
+
+    async def capture_sample(self, sample):
+        """Render/capture: captures the authored scene state from every planned camera that sees a LP"""
+        sample["frames"] = []
+
+        if not sample["save"]:
+            # Nothing to capture; just show the first planned camera
+            self.cam_suite.switch_camera(self.CAMERAS[sample["cameras"][0]])
+            await self.frame_suite.wait_frames(self.__ready_frames)
+            self.frame_suite.end_sample()
+            return sample
+
+        multi_camera = len(sample["cameras"]) > 1
+        stem, ext = os.path.splitext(sample["im_name"])
+
+        for camera_sel in sample["cameras"]:
+            cam_path = self.CAMERAS[camera_sel]
+
+            # Skip cameras that would not see a single LP before paying for their render
+            if multi_camera and not self._camera_sees_plates(self.STAGE, cam_path):
+                continue
+
+            # 1) Select Camera
+            self.cam_suite.switch_camera(cam_path)
+
+            # The weather volume follows the camera
+            if multi_camera:
+                self._apply_weather(sample, cam_path)
+
+            # Just wait until the cam has switched
+            with self.metrics.timer("wait"):
+                await self.frame_suite.wait_frames(self.__ready_frames)
+
+            im_name = f"{stem}_cam{camera_sel}{ext}" if multi_camera else sample["im_name"]
+            with self.metrics.timer("ground_truth"):
+                frame = self._capture_ground_truth(sample, im_name, cam_path)
+
+            # No plate visible from this camera: nothing to annotate, so the render is not paid for
+            if not len(frame["annotations"]):
+                continue
+
+            spp = self._choose_spp(sample, frame)
 
-        # Just wait until the cam has switched a little
-        await asyncio.sleep(1)
+            # Recorded with the annotations of the frame
+            frame["annotations"]["Render_Mode"] = sample["rendermode"]
+            frame["annotations"]["SPP"] = spp
+            frame["annotations"]["Weather"] = self._sample_weather(sample)
+            if sample.get("sun") is not None:
+                frame["annotations"]["Sun_Azimuth"], frame["annotations"]["Sun_Elevation"] = sample["sun"]
 
-        # 4) Generate LPs for all vehicles
+            # Switch render mode/SPP before waiting, so the renderer converges with the capture settings
+            self.cap_suite.render_suite.apply_capture_profile(rendermode=sample["rendermode"], spp=spp)
+
+            # Capture delay: wait until the renderer has converged on the new scene state
+            with self.metrics.timer("wait"):
+                await self.frame_suite.wait_until_ready(
+                    sample["rendermode"], n_frames=self.__ready_frames, total_spp=spp
+                )
+
+            capture_start = self.metrics.start()
+
+            # The scene may only change once the frame has been grabbed, so both modes wait for it here
+            if self.__capture_mode == "buffer":
+                # Take respective screenshot into memory; encoding happens in the write stage
+                frame["pixels"] = await self.cap_suite.take_screenshot_to_buffer_async(
+                    use_custom_camera=False,
+                    resolution=self.__resolution,
+                    rendermode=sample["rendermode"],
+                    spp=spp,
+                    timeout=self.frame_suite.timeout,
+                )
+            else:
+                # Take respective screenshot :D
+                capture = await self.cap_suite.take_screenshot_async(
+                    frame["image_path"],
+                    use_custom_camera=False,
+                    resolution=self.__resolution,
+                    rendermode=sample["rendermode"],
+                    spp=spp,
+                )
+                await capture.wait_for_result()
+
+            self.metrics.stop("capture", capture_start)
+
+            sample["frames"].append(frame)
+
+        self.frame_suite.end_sample()
+
+        return sample
+
+    def _choose_spp(self, sample, frame):
+        """Picks the SPP of a frame from its smallest visible plate, night and weather"""
+        if sample["rendermode"] != "PathTracing":
+            spp = self.__spp
+        else:
+            areas = plate_areas(frame["annotations"])
+
+            spp = self.spp_policy.choose(
+                min(areas) if areas else 0,
+                night=sample["show_lights"],
+                weather=self._sample_weather(sample),
+            )
+
+        return spp
+
+    def _capture_ground_truth(self, sample, im_name, cam_path):
+        """Computes the annotations of all vehicles as seen from the given camera"""
+        # Clear data so that the randomizer can append new data
+        self.clear_data()
+
+        # Annotate!
         save_name = ""
         for current_vehicle in range(len(self.VEHICLES)):
+            new_name = self._get_ground_truth(
+                sample["now_time"].strftime(self.__strf_datetime),
+                self.STAGE,
+                self.vehicle_registry[current_vehicle],
+                im_name,
+                self.LICENSE_PLATES[current_vehicle],
+                active_cam=cam_path,
+            )
+            if new_name is not None:
+                save_name = new_name
+
+        # Hand the annotations over to the annotate stage
+        frame = {
+            "image_path": f"{self.IM_PATH}/{save_name}",
+            "annotations": self.gen_df,
+            "pixels": None,
+            "encoded": None,
+        }
+        self.clear_data()
 
-            # Assign LP to select vehicle
-            lp = await asyncio.ensure_future(
-                self.generate_lp(im_name, current_vehicle, current_font=self.CURRENT_FONT,
-                                 randomize_font=self.randomize_font))
+        return frame
 
-            self.manip_suite.toggle_visibility(
-                self.STAGE, self.VEHICLES[current_vehicle] + "/Vehicle_Lights", is_visible=show_lights
-            )
+    async def write_sample(self, sample):
+        """Encode/write: hands the captured pixels to the encoder pool (waits only if the pool is full)"""
+        # Frames without plates and near-duplicates of kept frames are neither written nor annotated
+        with self.metrics.timer("dedup"):
+            sample["frames"] = self.dedup_filter.select(sample["frames"])
 
-            self.LICENSE_PLATES[current_vehicle] = lp
+        for frame in sample["frames"]:
+            if frame["pixels"] is not None:
+                frame["encoded"] = await self.encoder.submit(frame["pixels"], frame["image_path"])
+                frame["pixels"] = None
 
-            # Annotate!
-            if save:
-                new_name = self._get_ground_truth(
-                    now_time.strftime(self.__strf_datetime),
-                    self.STAGE,
-                    self.VEHICLES[current_vehicle],
-                    im_name,
-                    self.LICENSE_PLATES[current_vehicle],
-                )
-                if new_name is not None:
-                    save_name = new_name
+        return sample
 
-        # Capture delay
-        await asyncio.sleep(1)
+    def annotate_sample(self, sample):
+        """Annotate: appends the annotations of every captured frame to the CSV of the day"""
+        for frame in sample["frames"]:
+            # Only reference images that have been written
+            if frame["encoded"] is not None:
+                frame["encoded"].result()
+
+        annotation_start = self.metrics.start()
 
-        if save:
+        for frame in sample["frames"]:
             # Save LPs in dedicated path
-            self.save_annotations(now_time.strftime(self.__strf_date), annotations_path=self.DATA_PATH)
+            self.save_annotations(
+                sample["now_time"].strftime(self.__strf_date),
+                annotations_path=self.DATA_PATH,
+                df=frame["annotations"],
+            )
 
-            # Clear data so we don't keep old annotations
-            self.clear_data()
+        # Commit the sample only once its images and annotations are on disk
+        if self.manifest is not None and sample["index"] is not None:
+            self.manifest.commit(
+                sample["index"],
+                sample["seed"],
+                [os.path.basename(frame["image_path"]) for frame in sample["frames"]],
+                [row for frame in sample["frames"] for row in frame["annotations"].to_dict("records")],
+            )
 
-            # Take respective screenshot :D
-            await self.cap_suite.take_screenshot_async(
-                f"{self.IM_PATH}/{save_name}",
-                use_custom_camera=False,
-                resolution=self.__resolution,
-                rendermode=rendermode,
-                spp=self.__spp,
+        self.metrics.stop("annotation_write", annotation_start)
+        self.metrics.count_sample()
+
+        if self._progress is not None:
+            self._progress.update(1)
+
+        return sample
+
+    async def create_synthetic_data(
+        self, synthetic_samples, rendermode="PathTracing", start_index=0, seed=None, resume=None
+    ):
+        """
+        Generates `synthetic_samples` samples, numbered from `start_index` (e.g. the first index of a shard).
+        With `resume`, samples already committed to the manifest of the save directory are skipped.
+        """
+        seed = self.__sdg_seed if seed is None else seed
+        resume = self.__sdg_resume if resume is None else resume
+
+        self.frame_suite.reset_stats()
+        self.spp_policy.reset_stats()
+        self.dedup_filter.reset()
+
+        # Mixed runs schedule the render mode per sample; otherwise every sample uses `rendermode`
+        self.rendermode_scheduler = None
+        if self.__rendermode_mix is not None:
+            self.rendermode_scheduler = RenderModeScheduler(
+                pathtracing_ratio=self.__rendermode_mix,
+                block_size=RENDERMODE_BLOCK,
+                pathtracing_at_night=RENDERMODE_PT_AT_NIGHT,
+                pathtracing_weather=RENDERMODE_PT_WEATHER,
             )
+        self.metrics.reset()
+        self.metrics.export_dir = self.__save_dir
+        self.tracer.clear()
+        self.cache_manager.start()
+
+        # Create the output directories once per run
+        self.cap_suite.reset_output_dirs()
+        self._annotation_files = set()
+        self.cap_suite.ensure_dir(self.IM_PATH)
+        self.cap_suite.ensure_dir(self.DATA_PATH)
+
+        self.manifest = SampleManifest(Path(self.__save_dir, "manifest.jsonl"), sync_every=MANIFEST_SYNC_EVERY)
+        if resume and self.manifest.load():
+            self._drop_uncommitted_annotations()
+        elif os.path.exists(self.manifest.path):
+            os.remove(self.manifest.path)
+
+        indices = self.manifest.missing(start_index, start_index + synthetic_samples)
+        if len(indices) < synthetic_samples:
+            print(
+                f"Resuming: skipping {synthetic_samples - len(indices)} of {synthetic_samples} samples already "
+                f"committed to {self.manifest.path}."
+            )
+
+        # Plan sample i+1 and write sample i-1 while sample i renders; the USD stage holds one sample at a time
+        pipeline = PipelineSuite(
+            [
+                PipelineStage("plan", self.plan_sample, threaded=True),
+                PipelineStage("author", self.author_sample, acquire="scene"),
+                PipelineStage("capture", self.capture_sample, release="scene"),
+                PipelineStage("write", self.write_sample),
+                PipelineStage("annotate", self.annotate_sample, threaded=True),
+            ],
+            queue_size=self.__pipeline_queue_size,
+            tracer=self.tracer,
+        )
+
+        # Frame file extension follows the encoder format (Kit file captures are always PNG)
+        ext = self.encoder.extension if self.__capture_mode == "buffer" else ".png"
+
+        # Unseeded runs draw the sample seeds from a generator of their own: plan_sample reseeds the global one
+        seed_rng = random.Random()
 
-    async def create_synthetic_data(self, synthetic_samples, rendermode="PathTracing"):
-        for i in tqdm(range(synthetic_samples), desc=f"Generating Plates", file=sys.stdout):
-            await asyncio.ensure_future(
-                self.randomize_scene(im_name=(str(i).zfill(8) + ".png"), rendermode=rendermode, save=True)
+        samples = (
+            self._new_sample(
+                str(i).zfill(8) + ext,
+                rendermode=rendermode,
+                save=True,
+                index=i,
+                seed=(seed + i) % 2**32 if seed is not None else seed_rng.getrandbits(32),
             )
+            for i in indices
+        )
+
+        self._progress = tqdm(total=len(indices), desc=f"Generating Plates", file=sys.stdout)
+        try:
+            await pipeline.run(samples)
+            await self.encoder.flush()
+        finally:
+            self._progress.close()
+            self._progress = None
+            self.manifest.close()
+            self.metrics.export()
+            self.tracer.save(Path(self.__save_dir, "trace.json"))
+            self.cache_manager.stop()
+
+        pipeline.print_report()
+        print(f"Image encoding: {self.encoder.get_stats()}")
+        print(f"Renderer wait times (s): {self.frame_suite.get_stats()}")
+        print(f"OV cache: {self.cache_manager.get_stats()}")
+        print(f"SPP per frame: {self.spp_policy.get_stats()}")
+        print(f"Near-duplicate frames: {self.dedup_filter.get_stats()}")
+        print(f"Prim/attribute handles: {get_registry().get_stats()}")
+        print(f"Visibility: {self.visibility.get_stats()}")
+        if self.rendermode_scheduler is not None:
+            print(f"Render modes: {self.rendermode_scheduler.get_stats()}")
 
     def append_annotator(self, ts, im_name, fps, frame, obj_id, bbox2d, lp_text, lat, lon):
         """Appends LP information to the designated .csv file"""
@@ -684,19 +1329,64 @@ class LP_SDG_Control_Panel:
         )
         self.gen_df = pd.concat([self.gen_df, new_row], ignore_index=True)
 
-    def save_annotations(self, date, annotations_path):
-        """Saves the LP information to a selected annotation path"""
+    def save_annotations(self, date, annotations_path, df=None):
+        """Saves the LP information (default: the accumulated data) to a selected annotation path"""
+        if df is None:
+            df = self.gen_df
+
         # Create annotations path if it does not exist
-        if not os.path.exists(annotations_path):
-            os.mkdir(annotations_path)
+        self.cap_suite.ensure_dir(annotations_path)
+
+        csv_path = f"{annotations_path}/synth_veh_data_{str(date)}.csv"
+
+        # Every row has the same columns, in the order of the header (missing ones are left empty)
+        df = df.reindex(columns=ANNOTATION_COLUMNS)
+
+        # A file of the day started by an earlier run may have other columns; bring it in line before appending
+        if csv_path not in self._annotation_files and os.path.exists(csv_path):
+            self._upgrade_annotations(csv_path)
+            self._annotation_files.add(csv_path)
 
         # If .csv for that day exists, append to it, else create a new file
-        if os.path.exists(f"{annotations_path}/synth_veh_data_{str(date)}.csv"):
-            self.gen_df.to_csv(
-                f"{annotations_path}/synth_veh_data_{str(date)}.csv", header=False, index=False, mode="a+"
-            )
+        if csv_path in self._annotation_files:
+            df.to_csv(csv_path, header=False, index=False, mode="a+")
         else:
-            self.gen_df.to_csv(f"{annotations_path}/synth_veh_data_{str(date)}.csv", index=False)
+            df.to_csv(csv_path, index=False)
+
+        self._annotation_files.add(csv_path)
+
+    @staticmethod
+    def _read_annotations(csv_path):
+        """Reads an annotation CSV, also one whose rows have more columns than its header"""
+        with open(csv_path, newline="") as f:
+            header = next(csv.reader(f), [])
+
+        # Earlier versions appended new columns to existing files without rewriting the header
+        if header != ANNOTATION_COLUMNS and header == ANNOTATION_COLUMNS[: len(header)]:
+            return pd.read_csv(csv_path, header=None, skiprows=1, names=ANNOTATION_COLUMNS)
+
+        return pd.read_csv(csv_path)
+
+    def _upgrade_annotations(self, csv_path):
+        """Rewrites an annotation CSV with ANNOTATION_COLUMNS as its header"""
+        df = self._read_annotations(csv_path)
+        if list(df.columns) != ANNOTATION_COLUMNS:
+            df.reindex(columns=ANNOTATION_COLUMNS).to_csv(csv_path, index=False)
+            print(f"Upgraded the annotation columns of {csv_path}")
+
+    def _drop_uncommitted_annotations(self):
+        """Removes annotation rows of samples that crashed before being committed; they are generated again"""
+        committed = self.manifest.committed_images()
+
+        for csv_path in Path(self.DATA_PATH).glob("*.csv"):
+            df = self._read_annotations(csv_path)
+            if "Image" not in df.columns:
+                continue
+
+            keep = df["Image"].isin(committed)
+            if not keep.all():
+                df[keep].to_csv(csv_path, index=False)
+                print(f"Dropped {int((~keep).sum())} uncommitted annotation rows from {csv_path}")
 
     def clear_data(self):
         """Clears accumulated data"""
@@ -744,7 +1434,7 @@ class LP_SDG_Control_Panel:
                 self.VEHICLES[
                     self.current_vehicle] + "/Shared_Materials/Procedural_Scratches_material/Scratches_Procedural"
         )
-        object_path = self.VEHICLES[self.current_vehicle] + "/NumberPlateAsset_F/Damage_Scratches"
+        object_path = self.vehicle_registry[self.current_vehicle].front["scratches"]
         param_name = "opacity_threshold"
         param_value = 1 - (model.get_value_as_float() / 100)
 
@@ -755,7 +1445,7 @@ class LP_SDG_Control_Panel:
                 self.VEHICLES[self.current_vehicle]
                 + "/Shared_Materials/Procedural_Scratches_material_01/Scratches_Procedural"
         )
-        object_path = self.VEHICLES[self.current_vehicle] + "/NumberPlateAsset_R/Damage_Scratches"
+        object_path = self.vehicle_registry[self.current_vehicle].rear["scratches"]
         param_name = "opacity_threshold"
         param_value = 1 - (model.get_value_as_float() / 100)
 
@@ -763,7 +1453,7 @@ class LP_SDG_Control_Panel:
 
     def set_dirt_intensity_front(self, model):
         mat_path = self.VEHICLES[self.current_vehicle] + "/Shared_Materials/Procedural_Dirt_material/Dirt_Procedural_2"
-        object_path = self.VEHICLES[self.current_vehicle] + "/NumberPlateAsset_F/Damage_Dirt"
+        object_path = self.vehicle_registry[self.current_vehicle].front["dirt"]
         param_name = "opacity_threshold"
         param_value = 1 - (model.get_value_as_float() / 100)
 
@@ -773,7 +1463,7 @@ class LP_SDG_Control_Panel:
         mat_path = (
                 self.VEHICLES[self.current_vehicle] + "/Shared_Materials/Procedural_Dirt_material_01/Dirt_Procedural_2"
         )
-        object_path = self.VEHICLES[self.current_vehicle] + "/NumberPlateAsset_R/Damage_Dirt"
+        object_path = self.vehicle_registry[self.current_vehicle].rear["dirt"]
         param_name = "opacity_threshold"
         param_value = 1 - (model.get_value_as_float() / 100)
 
@@ -783,23 +1473,18 @@ class LP_SDG_Control_Panel:
         """Toggle if bounding boxes are on or off!"""
         show_bbox = model.get_value_as_bool()
 
-        if show_bbox == True:
-            for vehicle in self.VEHICLES:
-                self.manip_suite.toggle_visibility(self.STAGE, vehicle + "/BoundingBox", is_visible=show_bbox)
-
-        else:
-            for vehicle in self.VEHICLES:
-                self.manip_suite.toggle_visibility(self.STAGE, vehicle + "/BoundingBox", is_visible=show_bbox)
+        self.visibility.set_group("bounding_boxes", show_bbox)
+        self.visibility.commit(self.STAGE)
 
     def toggle_scene_lights(self, model):
         show_lights = model.get_value_as_bool()
-        [self.manip_suite.toggle_visibility(self.STAGE, light, is_visible=show_lights) for light in self.LIGHTS]
+        self.visibility.set_group("scene_lights", show_lights)
+        self.visibility.commit(self.STAGE)
 
     def toggle_vehicle_lights(self, model):
         toggle_light = model.get_value_as_bool()
-        self.manip_suite.toggle_visibility(
-            self.STAGE, self.VEHICLES[self.current_vehicle] + "/Vehicle_Lights", is_visible=toggle_light
-        )
+        self.visibility.set(self.vehicle_registry[self.current_vehicle].lights, toggle_light)
+        self.visibility.commit(self.STAGE)
 
     def toggle_resolution(self, model):
         self.__rendermode = "PathTracing" if model.get_value_as_int() == 1 else "RayTracedLighting"
@@ -814,6 +1499,7 @@ class LP_SDG_Control_Panel:
             prefix="/Root/Weather_Effect",
             position=(weather_pos[0], weather_pos[1], weather_pos[2]),
             weather_desc=self.WEATHER_OPTIONS[model.get_item_value_model().as_int],
+            volume=self.weather_volumes.get(str(self.cam_suite.get_current_cam())),
         )
 
     def set_lp_bg(self, model):
@@ -840,7 +1526,7 @@ class LP_SDG_Control_Panel:
         self.current_vehicle = curr_vehicle
 
         # Switch camera and create selection
-        self.cam_suite.switch_camera(self.VEHICLES[curr_vehicle] + f"/Follow_Camera")
+        self.cam_suite.switch_camera(self.vehicle_registry[curr_vehicle].follow_camera)
         self.SELECTION.set_selected_prim_paths([self.VEHICLES[curr_vehicle]], True)
 
     def generate_lp_on_current_vehicle(self):
@@ -865,7 +1551,7 @@ class LP_SDG_Control_Panel:
             self._get_ground_truth(
                 now_time.strftime(STRF_DATETIME),
                 self.STAGE,
-                self.VEHICLES[current_vehicle],
+                self.vehicle_registry[current_vehicle],
                 im_name,
                 self.LICENSE_PLATES[current_vehicle],
             )
@@ -879,7 +1565,8 @@ class LP_SDG_Control_Panel:
         self.clear_data()
 
         # Capture delay
-        await asyncio.sleep(1)
+        await self.frame_suite.wait_until_ready("PathTracing", n_frames=self.__ready_frames, total_spp=SPP)
+        self.frame_suite.end_sample()
 
         # Take respective screenshot :D
         await self.cap_suite.take_screenshot_async(
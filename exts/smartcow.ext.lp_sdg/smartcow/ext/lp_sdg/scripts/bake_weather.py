@@ -0,0 +1,40 @@
+"""
+Pre-simulates the weather effects of scene_utils/weather/ and stores settled particle snapshots in
+scene_utils/weather/baked/, where WeatherSuite picks them up instead of the live effects. Runs inside Kit:
+
+    kit --no-window --enable smartcow.ext.lp_sdg --exec "bake_weather.py [snapshots] [warmup_frames] [interval_frames]"
+
+Re-run it whenever an effect in scene_utils/weather/ changes; delete baked/<effect>.usd to go back to the live effect.
+"""
+import asyncio
+import os
+import sys
+import traceback
+
+import omni.kit.app
+
+import smartcow.ext.lp_sdg as lp_sdg
+from smartcow.ext.lp_sdg.custom_exts.weatherbakesuite import WeatherBaker
+from smartcow.ext.lp_sdg.custom_exts.weathersuite import WeatherSuite
+
+
+async def bake_and_quit(snapshots=8, warmup_frames=240, interval_frames=24):
+    weather_dir = os.path.join(os.path.dirname(os.path.abspath(lp_sdg.__file__)), "scene_utils", "weather")
+    exit_code = 0
+    try:
+        effects = WeatherSuite(path=weather_dir).get_bakeable_effects()
+        baker = WeatherBaker(
+            os.path.join(weather_dir, "baked"),
+            snapshots=snapshots,
+            warmup_frames=warmup_frames,
+            interval_frames=interval_frames,
+        )
+        await baker.bake(effects)
+    except Exception:
+        traceback.print_exc()
+        exit_code = 1
+
+    omni.kit.app.get_app().post_quit(exit_code)
+
+
+asyncio.ensure_future(bake_and_quit(*[int(arg) for arg in sys.argv[1:4]]))
@@ -0,0 +1,126 @@
+"""
+Compares the frame presets (EncoderPool.PRESETS) and plate texture presets (TextureWriter.PRESETS) by encode time
+and bytes written. Runs outside Kit:
+
+    python benchmark_formats.py --images ../synth_out/snapshots --frames 50
+    python benchmark_formats.py --resolution 1280 720        # synthetic frames
+
+Real frames give representative sizes; synthetic frames (gradients, shapes and noise) are only a rough stand-in.
+"""
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# custom_exts is imported as a plain package so that omni/Kit are not needed
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from custom_exts.encodesuite import EncoderPool, TextureWriter  # noqa: E402
+
+
+def load_frames(images, n_frames):
+    paths = sorted(glob.glob(os.path.join(images, "*.png")) + glob.glob(os.path.join(images, "*.jpg")))[:n_frames]
+    if not paths:
+        raise FileNotFoundError(f"No .png/.jpg frames in {images}")
+    # Captures arrive as RGBA buffers
+    return [cv2.cvtColor(cv2.imread(p, cv2.IMREAD_COLOR), cv2.COLOR_BGR2RGBA) for p in paths]
+
+
+def synthetic_frames(width, height, n_frames, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for _ in range(n_frames):
+        x = np.linspace(0, 255, width, dtype=np.float32)
+        y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+        base = np.dstack([(x + y) / 2, x * np.ones_like(y), y * np.ones_like(x)]).astype(np.float32)
+
+        for _ in range(20):
+            x0, y0 = rng.integers(0, width), rng.integers(0, height)
+            x1, y1 = x0 + rng.integers(20, width // 4), y0 + rng.integers(10, height // 4)
+            color = [float(c) for c in rng.integers(0, 255, 3)]
+            cv2.rectangle(base, (int(x0), int(y0)), (int(x1), int(y1)), color, -1)
+
+        # Path-tracing noise
+        base += rng.normal(0, 6, base.shape).astype(np.float32)
+        rgb = np.clip(base, 0, 255).astype(np.uint8)
+        frames.append(np.dstack([rgb, np.full((height, width), 255, np.uint8)]))
+    return frames
+
+
+def synthetic_plate(width=500, height=500):
+    src = Image.new("RGB", (width, height), color=(190, 190, 190))
+    arr = np.array(src)
+    cv2.putText(arr, "AB 12 CD 345", (20, height // 2), cv2.FONT_HERSHEY_SIMPLEX, 2.0, (0, 0, 0), 6)
+    gray = cv2.cvtColor(arr, cv2.COLOR_RGB2GRAY).astype(np.float64)
+    zy, zx = np.gradient(gray)
+    normal = np.dstack((-zx, -zy, np.ones_like(gray)))
+    normal /= np.linalg.norm(normal, axis=2, keepdims=True)
+    normal = ((normal + 1) / 2 * 255).astype(np.uint8)
+    return Image.fromarray(arr), Image.fromarray(normal)
+
+
+def bench_frames(frames, out_dir, presets):
+    results = []
+    for preset in presets:
+        encoder = EncoderPool.from_preset(preset, workers=1)
+        t0 = time.perf_counter()
+        nbytes = sum(
+            encoder.encode(frame, os.path.join(out_dir, f"{preset}_{i}{encoder.extension}"))
+            for i, frame in enumerate(frames)
+        )
+        elapsed = time.perf_counter() - t0
+        results.append((preset, elapsed / len(frames), nbytes / len(frames)))
+    return results
+
+
+def bench_textures(out_dir, repeats, presets):
+    diffuse, normals = synthetic_plate()
+    results = []
+    for preset in presets:
+        writer = TextureWriter(preset)
+        t0 = time.perf_counter()
+        nbytes = sum(writer.save(diffuse, normals, os.path.join(out_dir, f"{preset}_{i}_")) for i in range(repeats))
+        elapsed = time.perf_counter() - t0
+        results.append((preset, elapsed / repeats, nbytes / repeats))
+    return results
+
+
+def print_table(title, results):
+    print(f"\n{title}")
+    print(f"  {'preset':<14} {'encode ms':>10} {'KB/item':>10} {'items/s':>9}")
+    for preset, seconds, nbytes in results:
+        print(f"  {preset:<14} {seconds * 1000:>10.1f} {nbytes / 1024:>10.1f} {1 / seconds if seconds else 0:>9.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark LP-SDG output formats")
+    parser.add_argument("--images", default=None, help="directory of captured frames (default: synthetic frames)")
+    parser.add_argument("--frames", type=int, default=20, help="number of frames per preset")
+    parser.add_argument("--resolution", type=int, nargs=2, default=(1280, 720), help="synthetic frame size")
+    parser.add_argument("--presets", nargs="*", default=list(EncoderPool.PRESETS), help="frame presets to compare")
+    args = parser.parse_args(argv)
+
+    if args.images:
+        frames = load_frames(args.images, args.frames)
+    else:
+        frames = synthetic_frames(args.resolution[0], args.resolution[1], args.frames)
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        height, width = frames[0].shape[:2]
+        print_table(f"Frames ({len(frames)} x {width}x{height})", bench_frames(frames, out_dir, args.presets))
+        print_table(
+            "Plate textures (diffuse + normal map)",
+            bench_textures(out_dir, args.frames, list(TextureWriter.PRESETS)),
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
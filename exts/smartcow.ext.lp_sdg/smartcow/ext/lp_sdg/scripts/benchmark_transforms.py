@@ -0,0 +1,100 @@
+"""
+Compares the single transform setters of ManipulationSuite (set_translation/set_rotation/set_scale per object)
+with the batched set_transforms on hundreds of objects. Runs inside Kit:
+
+    kit --no-window --enable smartcow.ext.lp_sdg --exec "benchmark_transforms.py [objects] [rounds] [--context]"
+
+--context moves the objects on the stage of the Kit USD context (with its listeners attached) instead of an
+in-memory stage.
+"""
+import sys
+import time
+import traceback
+
+import numpy as np
+import omni.kit.app
+import omni.usd
+from pxr import Gf, Usd, UsdGeom
+
+from smartcow.ext.lp_sdg.custom_exts.manipulationsuite import ManipulationSuite
+
+
+def populate(stage, n_objects):
+    """Xforms with a cube each, like vehicles/props referenced into the scene"""
+    paths = []
+    UsdGeom.Xform.Define(stage, "/World")
+    for i in range(n_objects):
+        path = f"/World/object_{i:04d}"
+        xform = UsdGeom.Xform.Define(stage, path)
+        UsdGeom.XformCommonAPI(xform).SetXformVectors(
+            Gf.Vec3d(0, 0, 0), Gf.Vec3f(0, 0, 0), Gf.Vec3f(1, 1, 1), Gf.Vec3f(0, 0, 0),
+            UsdGeom.XformCommonAPI.RotationOrderXYZ, Usd.TimeCode.Default(),
+        )
+        UsdGeom.Cube.Define(stage, f"{path}/mesh")
+        paths.append(path)
+    return paths
+
+
+def random_transforms(rng, n_objects):
+    translations = rng.uniform(-5000, 5000, (n_objects, 3))
+    rotations = rng.uniform(-180, 180, (n_objects, 3))
+    scales = rng.uniform(0.5, 2.0, (n_objects, 3))
+    return translations, rotations, scales
+
+
+def run(n_objects=500, rounds=20, use_context=False):
+    if use_context:
+        omni.usd.get_context().new_stage()
+        stage = omni.usd.get_context().get_stage()
+    else:
+        stage = Usd.Stage.CreateInMemory()
+
+    paths = populate(stage, n_objects)
+    manip = ManipulationSuite()
+    rng = np.random.default_rng(0)
+    rounds_values = [random_transforms(rng, n_objects) for _ in range(rounds)]
+
+    start = time.perf_counter()
+    for translations, rotations, scales in rounds_values:
+        for path, t, r, s in zip(paths, translations, rotations, scales):
+            manip.set_translation(stage, path, t.tolist())
+            manip.set_rotation(stage, path, r.tolist())
+            manip.set_scale(stage, path, s.tolist())
+    single = (time.perf_counter() - start) / rounds
+
+    start = time.perf_counter()
+    manip.set_transforms(stage, paths, *rounds_values[0])
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for translations, rotations, scales in rounds_values:
+        manip.set_transforms(stage, paths, translations, rotations, scales)
+    batched = (time.perf_counter() - start) / rounds
+
+    # Both paths must leave the same values behind
+    translations, rotations, scales = rounds_values[-1]
+    for i in (0, n_objects // 2, n_objects - 1):
+        assert np.allclose(manip.get_translation(stage, paths[i]), translations[i])
+        assert np.allclose(manip.get_rotation(stage, paths[i]), rotations[i], atol=1e-3)
+        assert np.allclose(manip.get_scale(stage, paths[i]), scales[i], atol=1e-5)
+
+    print(f"\n{n_objects} objects x 3 ops, mean of {rounds} rounds ({'Kit context' if use_context else 'in-memory'} stage)")
+    print(f"{'single setters':<24} {single * 1000:>10.2f} ms")
+    print(f"{'set_transforms (cold)':<24} {cold * 1000:>10.2f} ms")
+    print(f"{'set_transforms':<24} {batched * 1000:>10.2f} ms   {single / batched:>6.1f}x")
+    print(f"Xform ops: {manip.get_stats()}")
+
+
+def main():
+    exit_code = 0
+    try:
+        args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+        run(*[int(arg) for arg in args[:2]], use_context="--context" in sys.argv)
+    except Exception:
+        traceback.print_exc()
+        exit_code = 1
+
+    omni.kit.app.get_app().post_quit(exit_code)
+
+
+main()
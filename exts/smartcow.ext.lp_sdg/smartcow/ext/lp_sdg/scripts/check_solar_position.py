@@ -0,0 +1,58 @@
+"""
+Checks custom_exts/solarsuite.py against reference ephemeris values (NREL SPA, apparent elevation) without Kit:
+
+    python check_solar_position.py
+
+Exits non-zero if any position is off by more than the tolerance.
+"""
+import os
+import sys
+
+import numpy as np
+
+# custom_exts is imported as a plain package so that omni/Kit are not needed
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from custom_exts.solarsuite import SolarPosition, solar_position  # noqa: E402
+
+# UTC time, latitude, longitude, azimuth, elevation
+REFERENCE = [
+    ("2024-06-21 10:00", 35.91517, 14.495217, 127.705, 71.386),
+    ("2024-12-21 07:30", 35.91517, 14.495217, 131.716, 12.689),
+    ("2024-03-20 16:45", 35.91517, 14.495217, 266.615, 5.200),
+    ("2023-09-01 05:10", 40.1792, 44.4991, 105.106, 29.630),
+    ("2023-01-15 23:00", -33.8688, 151.2093, 84.712, 47.483),
+    ("2025-07-04 18:00", 40.7128, -74.006, 219.432, 68.158),
+    ("2022-06-21 12:00", 64.1466, -21.9426, 149.349, 46.721),
+    ("2030-11-11 03:20", 28.6139, 77.209, 128.144, 24.159),
+]
+
+TOLERANCE = 0.1  # degrees
+
+
+def main():
+    times = np.array([np.datetime64(t) for t, *_ in REFERENCE])
+    lats = np.array([r[1] for r in REFERENCE])
+    lons = np.array([r[2] for r in REFERENCE])
+    azimuths, elevations = solar_position(lats, lons, times)
+
+    solar = SolarPosition()
+    failed = 0
+    print(f"{'UTC time':<18} {'lat':>9} {'lon':>10} {'d_azimuth':>10} {'d_elevation':>12}")
+    for (t, lat, lon, ref_az, ref_el), az, el in zip(REFERENCE, azimuths, elevations):
+        d_az = abs((az - ref_az + 180.0) % 360.0 - 180.0)
+        d_el = abs(el - ref_el)
+        ok = d_az <= TOLERANCE and d_el <= TOLERANCE
+
+        # The cached scalar path must agree with the vectorized one
+        ok = ok and np.allclose(solar.position(lat, lon, np.datetime64(t)), (az, el), atol=0.01)
+
+        failed += not ok
+        print(f"{t:<18} {lat:>9.4f} {lon:>10.4f} {d_az:>10.4f} {d_el:>12.4f} {'' if ok else 'FAILED'}")
+
+    print(f"\n{len(REFERENCE) - failed}/{len(REFERENCE)} within {TOLERANCE} degrees")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+"""
+Headless generation from a job file. Starts Kit with the job set as an extension setting, so the extension runs it
+at startup instead of building the LP-SDG window:
+
+    python run_job.py /data/job.json --kit "/path/to/kit app.kit"
+
+Quits with the status code of Kit: 0 on success, 1 if the run failed and 2 if the job file is invalid. See
+smartcow/ext/lp_sdg/headless.py for the job format.
+"""
+import argparse
+import os
+import shlex
+import subprocess
+import sys
+
+# Kit setting the extension reads the job file from at startup (see headless.JOB_SPEC_SETTING; this script runs
+# outside Kit, so it cannot import the extension)
+JOB_SPEC_SETTING = "/exts/smartcow.ext.lp_sdg/job_spec"
+
+
+def build_command(kit, spec_path):
+    return shlex.split(kit) + [
+        "--no-window",
+        "--enable",
+        "smartcow.ext.lp_sdg",
+        f"--{JOB_SPEC_SETTING}={os.path.abspath(spec_path)}",
+    ]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run an LP-SDG job file in a headless Kit")
+    parser.add_argument("job", help="JSON job file")
+    parser.add_argument("--kit", default="kit", help="Kit executable (and app/ext-folder arguments)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    return subprocess.call(build_command(args.kit, args.job))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
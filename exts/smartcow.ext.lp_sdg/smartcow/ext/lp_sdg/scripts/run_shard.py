@@ -0,0 +1,61 @@
+"""
+Headless worker for a single dataset shard. Runs inside Kit:
+
+    kit --no-window --enable smartcow.ext.lp_sdg --exec "run_shard.py --start 0 --end 1000 --out /data/shard_000"
+
+Generates samples [start, end) into the given output directory and quits Kit with a non-zero code on failure.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import traceback
+
+import numpy as np
+import omni.kit.app
+
+from smartcow.ext.lp_sdg.lp_sdg_control_panel import LP_SDG_Control_Panel
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Generate one shard of an LP-SDG dataset")
+    parser.add_argument("--start", type=int, required=True, help="first (global) sample index")
+    parser.add_argument("--end", type=int, required=True, help="last (global) sample index, exclusive")
+    parser.add_argument("--out", required=True, help="shard output directory")
+    parser.add_argument("--seed", type=int, default=None, help="run seed; sample i uses seed + i")
+    return parser.parse_args(argv)
+
+
+async def run_shard(start, end, out_dir, seed=None):
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+
+    # A restarted worker resumes from the manifest of its shard
+    panel = LP_SDG_Control_Panel()
+
+    # Keep everything this worker writes inside its shard, including the plate textures
+    panel.save_dir = out_dir
+    panel.plate_tex_path = os.path.join(out_dir, "plate_textures", "")
+    os.makedirs(panel.plate_tex_path, exist_ok=True)
+
+    await panel.initialize(block=True)
+    await panel.create_synthetic_data(
+        end - start, rendermode=panel.rendermode, start_index=start, seed=seed, resume=True
+    )
+
+
+async def main(argv):
+    exit_code = 0
+    try:
+        args = parse_args(argv)
+        await run_shard(args.start, args.end, args.out, seed=args.seed)
+    except BaseException:
+        traceback.print_exc()
+        exit_code = 1
+
+    omni.kit.app.get_app().post_quit(exit_code)
+
+
+asyncio.ensure_future(main(sys.argv[1:]))
@@ -0,0 +1,274 @@
+"""
+Splits an LP-SDG job into disjoint sample ranges, runs one headless Kit worker per range (locally or over ssh on
+several render nodes), supervises them and merges the shards into a single dataset.
+
+    python shard_launcher.py --samples 5000 --shards 4 --out /data/run_01 --kit "/path/to/kit app.kit"
+    python shard_launcher.py --samples 20000 --shards 8 --hosts node1,node2 --out /shared/run_02 --kit ...
+
+Any other worker (e.g. a stand-in script in tests) can be used through --worker-cmd; the placeholders
+{start}, {end}, {shard}, {out_dir} and {seed} are filled in per shard.
+"""
+import argparse
+import glob
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+# Worker script executed inside Kit
+RUN_SHARD_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "run_shard.py")
+
+DEFAULT_WORKER_CMD = (
+    '{kit} --no-window --enable smartcow.ext.lp_sdg '
+    '--exec "{script} --start {start} --end {end} --out {out_dir} --seed {seed}"'
+)
+
+
+def split_ranges(samples, shards):
+    """Splits [0, samples) into `shards` contiguous, disjoint and (almost) equally sized ranges"""
+    shards = max(1, min(shards, samples))
+    size, rest = divmod(samples, shards)
+
+    ranges = []
+    start = 0
+    for i in range(shards):
+        end = start + size + (1 if i < rest else 0)
+        ranges.append((start, end))
+        start = end
+
+    return ranges
+
+
+class Shard:
+    """A range of samples generated by a single worker"""
+
+    def __init__(self, index, start, end, out_dir, seed, host=None):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.out_dir = out_dir
+        self.seed = seed
+        self.host = host
+
+        self.process = None
+        self.attempts = 0
+        self.returncode = None
+
+    @property
+    def done(self):
+        return self.returncode == 0
+
+
+class ShardLauncher:
+    """Starts, supervises and retries the workers of all shards"""
+
+    def __init__(
+        self,
+        samples,
+        shards,
+        out_dir,
+        worker_cmd=DEFAULT_WORKER_CMD,
+        kit="kit",
+        hosts=None,
+        seed=0,
+        max_retries=1,
+        poll_interval=5.0,
+    ):
+        self.samples = samples
+        self.out_dir = os.path.abspath(out_dir)
+        self.worker_cmd = worker_cmd
+        self.kit = kit
+        self.hosts = hosts or []
+        self.max_retries = max_retries
+        self.poll_interval = poll_interval
+
+        self.shards = [
+            Shard(
+                i,
+                start,
+                end,
+                os.path.join(self.out_dir, "shards", f"shard_{i:03d}"),
+                seed,
+                host=self.hosts[i % len(self.hosts)] if self.hosts else None,
+            )
+            for i, (start, end) in enumerate(split_ranges(samples, shards))
+        ]
+
+    def build_command(self, shard):
+        cmd = self.worker_cmd.format(
+            kit=self.kit,
+            script=RUN_SHARD_SCRIPT,
+            start=shard.start,
+            end=shard.end,
+            shard=shard.index,
+            out_dir=shard.out_dir,
+            seed=shard.seed,
+        )
+
+        # Remote workers get the whole command line through ssh
+        if shard.host and shard.host not in ("localhost", "127.0.0.1"):
+            return ["ssh", shard.host, cmd]
+        return shlex.split(cmd)
+
+    def launch(self, shard):
+        os.makedirs(shard.out_dir, exist_ok=True)
+        shard.attempts += 1
+        shard.returncode = None
+
+        log = open(os.path.join(shard.out_dir, f"worker_{shard.attempts}.log"), "w")
+        shard.process = subprocess.Popen(self.build_command(shard), stdout=log, stderr=subprocess.STDOUT)
+        shard.process.log = log
+
+        where = shard.host or "localhost"
+        print(f"Shard {shard.index}: samples [{shard.start}, {shard.end}) on {where} (attempt {shard.attempts})")
+
+    def supervise(self):
+        """Runs all workers to completion, restarting failed ones; returns True if every shard succeeded"""
+        for shard in self.shards:
+            self.launch(shard)
+
+        running = list(self.shards)
+        while running:
+            time.sleep(self.poll_interval)
+
+            for shard in list(running):
+                code = shard.process.poll()
+                if code is None:
+                    continue
+
+                shard.process.log.close()
+                shard.returncode = code
+
+                if code == 0:
+                    print(f"Shard {shard.index} finished.")
+                    running.remove(shard)
+                elif shard.attempts <= self.max_retries:
+                    print(f"Shard {shard.index} failed with code {code}; restarting.")
+                    self.launch(shard)
+                else:
+                    print(f"Shard {shard.index} failed with code {code}; giving up.")
+                    running.remove(shard)
+
+        return all(shard.done for shard in self.shards)
+
+    def terminate(self):
+        for shard in self.shards:
+            if shard.process is not None and shard.process.poll() is None:
+                shard.process.terminate()
+
+    def merge(self, move=True):
+        return merge_shards([shard.out_dir for shard in self.shards], self.out_dir, move=move)
+
+
+def merge_shards(shard_dirs, out_dir, move=True):
+    """
+    Merges the `snapshots` and `data` folders of every shard into `out_dir`.
+    Image names are kept (shards use global sample indices); a name that still collides with another shard's gets the
+    shard prefix and the annotations are rewritten accordingly. The merged annotation files are written whole, so
+    merging again (e.g. after a --copy merge) replaces the previous result instead of adding to it; moved shard
+    annotations are removed once merged. Returns the number of merged images.
+    """
+    im_out = os.path.join(out_dir, "snapshots")
+    data_out = os.path.join(out_dir, "data")
+    os.makedirs(im_out, exist_ok=True)
+    os.makedirs(data_out, exist_ok=True)
+
+    transfer = shutil.move if move else shutil.copy2
+    merged_images = 0
+    annotations = {}
+    # Image names taken by the shards merged so far; names in `out_dir` from an earlier merge are overwritten
+    claimed = set()
+    shard_csvs = []
+
+    for shard_index, shard_dir in enumerate(shard_dirs):
+        renamed = {}
+
+        for im_path in sorted(glob.glob(os.path.join(shard_dir, "snapshots", "*"))):
+            if not os.path.isfile(im_path):
+                continue
+
+            name = os.path.basename(im_path)
+            if name in claimed:
+                renamed[name] = f"s{shard_index:03d}_{name}"
+                name = renamed[name]
+            claimed.add(name)
+
+            transfer(im_path, os.path.join(im_out, name))
+            merged_images += 1
+
+        for csv_path in sorted(glob.glob(os.path.join(shard_dir, "data", "*.csv"))):
+            df = pd.read_csv(csv_path)
+            if renamed and "Image" in df.columns:
+                df["Image"] = df["Image"].map(lambda n: renamed.get(n, n))
+            annotations.setdefault(os.path.basename(csv_path), []).append(df)
+            shard_csvs.append(csv_path)
+
+    # One annotation file per day, like a single-process run
+    for csv_name, frames in annotations.items():
+        # Shards are concatenated in order, so the rows stay sorted by global sample index
+        df = pd.concat(frames, ignore_index=True)
+        df.to_csv(os.path.join(data_out, csv_name), index=False)
+
+    # Like the images, moved annotations leave the shards (only once the merged files are written)
+    if move:
+        for csv_path in shard_csvs:
+            os.remove(csv_path)
+
+    print(f"Merged {merged_images} images and {len(annotations)} annotation file(s) into {out_dir}")
+
+    return merged_images
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run an LP-SDG job over several headless Kit workers")
+    parser.add_argument("--samples", type=int, required=True, help="total number of samples")
+    parser.add_argument("--shards", type=int, default=1, help="number of workers / shards")
+    parser.add_argument("--out", required=True, help="output directory of the merged dataset")
+    parser.add_argument("--kit", default="kit", help="Kit executable (and app/ext-folder arguments)")
+    parser.add_argument("--hosts", default="", help="comma separated render nodes; shards are spread over them")
+    parser.add_argument("--worker-cmd", default=DEFAULT_WORKER_CMD, help="worker command template")
+    parser.add_argument("--seed", type=int, default=0, help="run seed; sample i uses seed + i in every shard")
+    parser.add_argument("--retries", type=int, default=1, help="restarts per failed shard")
+    parser.add_argument("--poll", type=float, default=5.0, help="supervision interval in seconds")
+    parser.add_argument("--copy", action="store_true", help="copy shard outputs instead of moving them")
+    parser.add_argument("--no-merge", action="store_true", help="keep the shards, do not merge")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    launcher = ShardLauncher(
+        args.samples,
+        args.shards,
+        args.out,
+        worker_cmd=args.worker_cmd,
+        kit=args.kit,
+        hosts=[h for h in args.hosts.split(",") if h],
+        seed=args.seed,
+        max_retries=args.retries,
+        poll_interval=args.poll,
+    )
+
+    try:
+        ok = launcher.supervise()
+    except KeyboardInterrupt:
+        launcher.terminate()
+        raise
+
+    if not ok:
+        print("Not all shards succeeded; leaving the shards unmerged.")
+        return 1
+
+    if not args.no_merge:
+        launcher.merge(move=not args.copy)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,18 +7,136 @@ RESOLUTION = (1280, 720)  # 1080P Resolution default
 # Number of Samples Per Pixel for PathTracing
 SPP = 128  # default: 1024
 
+# Adaptive SPP: PathTracing frames get the smallest of SPP_LEVELS that renders their smallest plate as cleanly as
+# SPP_BASE renders a SPP_REFERENCE_AREA pixel plate in daylight; night and weather make frames harder (see samplingsuite.py)
+ADAPTIVE_SPP = True  # default: True (False: always SPP)
+SPP_LEVELS = (16, 32, 64, 128, 256)
+SPP_BASE = 32  # default: 32
+SPP_REFERENCE_AREA = 2000.0  # default: 2000.0 (pixels)
+SPP_NIGHT_FACTOR = 2.0  # default: 2.0
+SPP_WEATHER_FACTORS = {"rain": 1.4, "snow": 1.4, "storm": 1.6}
+
+# Mixed render modes: share of samples rendered with PathTracing, the rest with RayTracedLighting (None: RENDERMODE only)
+# Modes are scheduled in blocks of RENDERMODE_BLOCK consecutive samples; night and the listed weather are always path traced
+RENDERMODE_MIX = None  # default: None (e.g. 0.3)
+RENDERMODE_BLOCK = 16  # default: 16
+RENDERMODE_PT_AT_NIGHT = True  # default: True
+RENDERMODE_PT_WEATHER = ("rain", "snow", "storm")
+
+# Number of app updates to wait after switching cameras (RayTracedLighting also waits this long before capture)
+READY_FRAMES = 2  # default: 2
+
+# Maximum number of seconds to wait for the renderer before capturing anyway
+READY_TIMEOUT = 10.0  # default: 10.0
+
+# Cameras captured per scene state: 1 = one random camera, 0 = every camera, N = a random subset of N cameras
+# With more than one camera, cameras that see no readable LP are skipped before rendering
+CAMERAS_PER_SCENE = 1  # default: 1
+
+# How frames are captured: "buffer" (grab pixels, encode on worker threads) or "file" (Kit writes the file)
+CAPTURE_MODE = "buffer"  # default: "buffer"
+
+# Output image format ("png", "jpg", "webp", "npy") and its PNG compression level / JPEG+WebP quality
+IMAGE_FORMAT = "png"  # default: "png"
+IMAGE_COMPRESSION = 3  # default: 3
+IMAGE_QUALITY = 95  # default: 95
+
+# Or one of the named presets of EncoderPool.PRESETS ("png_fast", "png", "png_small", "jpeg_hq", "webp", "webp_lossless",
+# "npy"); overrides the three settings above
+IMAGE_PRESET = None  # default: None
+
+# Plate texture format, one of TextureWriter.PRESETS ("png", "png_fast", "png_raw", "jpeg"); normal maps stay lossless
+PLATE_TEXTURE_PRESET = "png_fast"  # default: "png_fast"
+
+# Near-duplicate frames (perceptual hash within DEDUP_MAX_DISTANCE of 64 bits of a kept frame) are dropped before
+# encoding and annotation (buffer captures only). DEDUP_REGION hashes the crop around the frame's "plates" or the
+# whole "frame", with the plates masked out (their texts are drawn per sample); the fixed ALPR cameras share most
+# of their background, so whole frames differ in few bits
+DEDUP_ENABLED = True  # default: True
+DEDUP_MAX_DISTANCE = 4  # default: 4
+DEDUP_REGION = "plates"  # default: "plates"
+
+# Image encoding workers and maximum number of captured frames held in memory
+ENCODER_WORKERS = 4  # default: 4
+ENCODER_MAX_PENDING = 8  # default: 8
+
+# Number of samples that may wait between two stages of the generation pipeline
+PIPELINE_QUEUE_SIZE = 2  # default: 2
+
 # Framerate of vehicles; switch this to 60 once new anims are imported
 FPS = 24.0  # default: 24.0
 
 # Number of Samples to Generate
 SDG_SAMPLES = 5000  # default: 5000
 
+# Seed of a run: sample i is generated with seed SDG_SEED + i (None = a random seed per sample, still recorded)
+SDG_SEED = None  # default: None
+
+# Continue an interrupted run from its sample manifest instead of overwriting it (samples already committed are
+# skipped, so a finished run generates nothing again)
+SDG_RESUME = False  # default: False
+
+# Checkpoint (fsync) the sample manifest every N committed samples
+MANIFEST_SYNC_EVERY = 1  # default: 1
+
+# Omniverse cache kept below a size budget by a background thread (least recently used files are evicted first)
+OV_CACHE_PATH = "~/.cache/ov"
+OV_CACHE_MAX_SIZE_MB = 20000  # default: 20000
+OV_CACHE_MAX_AGE_HOURS = None  # default: None (no age limit)
+OV_CACHE_SCAN_INTERVAL = 60.0  # default: 60.0 (seconds)
+
+# Per-stage latency histograms and throughput, written to <save dir>/metrics.json and metrics.prom
+METRICS_ENABLED = False  # default: False
+METRICS_EXPORT_INTERVAL = 30.0  # default: 30.0 (seconds)
+
+# Chrome trace of the generation loop (<save dir>/trace.json); keeps the last TRACE_CAPACITY events
+TRACE_ENABLED = False  # default: False
+TRACE_CAPACITY = 200000  # default: 200000
+
 # Length of Video (in minutes)
 SDG_RECORD_LENGTH = 5  # default: 5
 
 # How to render the scene (RayTracedLighting VS PathTracing)
 RENDERMODE = "PathTracing"  # default: "PathTracing"
 
+# Weather API lookups are cached per location (~1 km) for WEATHER_CACHE_TTL seconds and never block a sample; a failed
+# lookup is retried after WEATHER_ERROR_TTL seconds. With WEATHER_RECORDED_PATH (a JSON file of recorded responses,
+# relative to the extension) no network is used.
+WEATHER_API_KEY = None  # default: None
+WEATHER_API_URL = "https://api.openweathermap.org/data/2.5/onecall"
+WEATHER_RECORDED_PATH = None  # default: None (use the API)
+WEATHER_CACHE_TTL = 600.0  # default: 600.0 (seconds)
+WEATHER_ERROR_TTL = 30.0  # default: 30.0 (seconds)
+WEATHER_API_TIMEOUT = 5.0  # default: 5.0 (seconds)
+
+# Per-sample weather: probabilities of "sun", "rain", "snow", "storm" and "dust" and the range of the effect
+# intensity (None = the weather only changes from the UI). Effects are preloaded, so switching is cheap. Baked effects
+# (scene_utils/weather/baked/) keep the intensity they were baked with; the range only applies to live effects.
+WEATHER_PROBABILITIES = None  # default: None
+WEATHER_INTENSITY_RANGE = (0.5, 1.0)  # default: (0.5, 1.0)
+
+# Historical weather records of the deployment sites (CSV/Parquet with lat, lon, timestamp in local time, weather;
+# relative to the extension). When set, each sample draws a record of the site at LAT/LON, so weather and time of
+# day follow their real joint distribution (overrides WEATHER_PROBABILITIES and SOLAR_RANDOM_TIME)
+WEATHER_SCENARIOS_PATH = None  # default: None
+
+# Center the active weather effect on the frustum of the capturing camera (up to the LP readability distance) instead
+# of a world-fixed position; its emitter source is resized to enclose the frustum and its emitter rate scaled by the
+# volume ratio, so particles keep their size and density
+WEATHER_FOLLOW_CAMERA = True  # default: True
+
+# Analytic sun: orients SUN_LIGHT_PATH (None = the first distant light of the stage) from the sun position at the
+# location; SUN_NORTH_OFFSET turns the stage's north (+Y, or -Z on Y-up stages) clockwise to true north, and
+# SOLAR_UTC_OFFSET is the local time zone (None = estimated from LON). SOLAR_RANDOM_TIME draws the time of day per sample.
+SUN_LIGHT_PATH = None  # default: None
+SUN_NORTH_OFFSET = 0.0  # default: 0.0 (degrees)
+SOLAR_UTC_OFFSET = None  # default: None
+SOLAR_RANDOM_TIME = False  # default: False
+
+# Night (scene and vehicle lights on, night SPP/render mode) once the sun is below this elevation; without an analytic
+# sun, night is 21:00-06:59
+NIGHT_SUN_ELEVATION = 0.0  # default: 0.0 (degrees)
+
 # LATITUDE of DT Location
 LAT = 35.915170377962724
 
@@ -43,6 +161,9 @@ FONT_PATH = "scene_utils/fonts"
 # Indian Regions Data Path
 RTO_DATA_PATH = "scene_utils/regions.txt"
 
+# Vehicle classes and their bounding box corrections
+VEHICLE_CLASSES_PATH = "scene_utils/vehicle_classes.csv"
+
 # Generated License Plate Texture paths
 PLATE_TEX_PATH = "scene_utils/generated/"
 
@@ -0,0 +1,107 @@
+"""
+Frame selection of the write stage. Runs outside Kit:
+
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+import cv2
+import numpy as np
+import pandas as pd
+
+# custom_exts is imported as a plain package so that omni/Kit are not needed
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from custom_exts.dedupsuite import DuplicateFilter  # noqa: E402
+
+
+def make_frame(pixels, plates=()):
+    """A captured frame as the capture stage hands it over; `plates` are (LP_Text, x1, y1, x2, y2)"""
+    annotations = pd.DataFrame(plates, columns=["LP_Text", "x1", "y1", "x2", "y2"])
+    name = annotations["LP_Text"].iloc[0] if len(annotations) else ""
+    return {"image_path": f"images/{name}", "annotations": annotations, "pixels": pixels, "encoded": None}
+
+
+def gradient(width=320, height=240, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 255, width)[None, :] * np.ones((height, 1))
+    pixels = np.clip(x + rng.normal(0, 40, (height, width)), 0, 255).astype(np.uint8)
+    return np.dstack([pixels] * 3 + [np.full((height, width), 255, np.uint8)])
+
+
+def with_plate(pixels, box, seed):
+    """The frame with a plate rendered into `box` (x1, y1, x2, y2), its "text" a glyph pattern drawn from `seed`"""
+    x1, y1, x2, y2 = box
+    pixels = pixels.copy()
+    glyphs = np.random.default_rng(seed).integers(0, 2, (2, 8)).astype(np.uint8) * 255
+    pixels[y1:y2, x1:x2, :3] = cv2.resize(glyphs, (x2 - x1, y2 - y1), interpolation=cv2.INTER_NEAREST)[..., None]
+    return pixels
+
+
+class TestFrameSelection(unittest.TestCase):
+    def test_frame_without_plates_is_dropped(self):
+        dedup = DuplicateFilter()
+        frames = [make_frame(gradient()), make_frame(gradient(seed=1), [("MH12AB1234", 40, 40, 200, 90)])]
+
+        kept = dedup.select(frames)
+
+        self.assertEqual([frame["image_path"] for frame in kept], ["images/MH12AB1234"])
+        # The plate-less frame never reached the hash index
+        self.assertEqual(dedup.get_stats()["checked"], 1)
+
+    def test_frame_without_plates_is_dropped_when_disabled(self):
+        dedup = DuplicateFilter(enabled=False)
+        self.assertEqual(dedup.select([make_frame(gradient())]), [])
+
+    def test_identical_frame_is_dropped(self):
+        dedup = DuplicateFilter()
+        plates = [("MH12AB1234", 40, 40, 200, 90)]
+
+        kept = dedup.select([make_frame(gradient(), plates), make_frame(gradient(), plates)])
+
+        self.assertEqual(len(kept), 1)
+        self.assertEqual(dedup.get_stats()["rejected"], 1)
+
+    def test_same_scene_with_other_plate_text_is_dropped(self):
+        dedup = DuplicateFilter()
+        box = (120, 100, 200, 125)
+        scene = gradient()
+
+        kept = dedup.select(
+            [
+                make_frame(with_plate(scene, box, seed=1), [("MH12AB1234", *box)]),
+                make_frame(with_plate(scene, box, seed=2), [("KA01XY9876", *box)]),
+            ]
+        )
+
+        self.assertEqual([frame["image_path"] for frame in kept], ["images/MH12AB1234"])
+        self.assertEqual(dedup.get_stats()["rejected"], 1)
+
+    def test_other_scene_is_kept(self):
+        dedup = DuplicateFilter()
+        box = (120, 100, 200, 125)
+
+        kept = dedup.select(
+            [
+                make_frame(with_plate(gradient(), box, seed=1), [("MH12AB1234", *box)]),
+                make_frame(with_plate(gradient()[:, ::-1], box, seed=1), [("MH12AB1234", *box)]),
+            ]
+        )
+
+        self.assertEqual(len(kept), 2)
+
+    def test_captured_pixels_are_not_masked(self):
+        dedup = DuplicateFilter()
+        box = (120, 100, 200, 125)
+        pixels = with_plate(gradient(), box, seed=1)
+        original = pixels.copy()
+
+        dedup.select([make_frame(pixels, [("MH12AB1234", *box)])])
+
+        np.testing.assert_array_equal(pixels, original)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+"""
+Readiness waits of FrameSuite, driven by a fake app loop, renderer and clock. Runs outside Kit:
+
+    python -m unittest discover -s tests
+"""
+import asyncio
+import os
+import sys
+import unittest
+
+# custom_exts is imported as a plain package so that omni/Kit are not needed
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from custom_exts.framesuite import FrameSuite  # noqa: E402
+
+
+class FakeApp:
+    """App loop whose every update takes `frame_time` seconds and renders `spp` subframes"""
+
+    def __init__(self, frame_time=0.05, spp=4, reset_at=None):
+        self.now = 0.0
+        self.frame_time = frame_time
+        self.spp = spp
+        self.reset_at = reset_at  # update after which the renderer restarts accumulating
+        self.updates = 0
+        self.subframes = 0
+
+    async def next_update_async(self):
+        self.updates += 1
+        self.now += self.frame_time
+        self.subframes = 0 if self.updates == self.reset_at else self.subframes + self.spp
+
+    def clock(self):
+        return self.now
+
+
+class FakeSettings:
+    def __init__(self, values):
+        self.values = values
+
+    def get(self, path):
+        return self.values.get(path)
+
+
+def make_suite(app, subframe_fn=None, timeout=10.0, spp=4, total_spp=64):
+    settings = FakeSettings({"/rtx/pathtracing/spp": spp, "/rtx/pathtracing/totalSpp": total_spp})
+    return FrameSuite(
+        update_fn=app.next_update_async,
+        settings=settings,
+        subframe_fn=subframe_fn or (lambda: app.subframes),
+        timeout=timeout,
+        clock=app.clock,
+    )
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class TestWaitSubframes(unittest.TestCase):
+    def test_waits_for_renderer_subframes(self):
+        app = FakeApp(spp=4)
+        suite = make_suite(app, total_spp=64)
+
+        waited = run(suite.wait_subframes())
+
+        self.assertEqual(app.updates, 16)
+        self.assertAlmostEqual(waited, 16 * app.frame_time)
+
+    def test_renderer_count_beats_estimate(self):
+        # The renderer only accumulates 2 subframes per update although /rtx/pathtracing/spp says 4
+        app = FakeApp(spp=2)
+        suite = make_suite(app, spp=4)
+
+        run(suite.wait_subframes(total_spp=32))
+
+        self.assertEqual(app.updates, 16)
+
+    def test_accumulation_reset_restarts_the_wait(self):
+        app = FakeApp(spp=4, reset_at=5)
+        suite = make_suite(app)
+
+        run(suite.wait_subframes(total_spp=32))
+
+        self.assertEqual(app.updates, 5 + 8)
+
+    def test_timeout(self):
+        app = FakeApp(frame_time=0.5)
+        suite = make_suite(app, subframe_fn=lambda: 0, timeout=2.0)
+
+        waited = run(suite.wait_subframes(total_spp=64))
+
+        self.assertLessEqual(waited, 2.0 + app.frame_time)
+        self.assertEqual(suite.timeouts, 1)
+
+    def test_estimate_without_renderer_count(self):
+        app = FakeApp()
+        suite = make_suite(app, subframe_fn=lambda: None, spp=8)
+
+        run(suite.wait_subframes(total_spp=64))
+
+        self.assertEqual(app.updates, 8)
+        self.assertTrue(suite.get_stats()["estimated_subframes"])
+
+    def test_estimate_is_reported_every_run(self):
+        app = FakeApp()
+        suite = make_suite(app, subframe_fn=lambda: None)
+
+        run(suite.wait_subframes(total_spp=8))
+        # A new run starts with fresh stats, and warns again if it has to estimate
+        suite.reset_stats()
+        self.assertFalse(suite.get_stats()["estimated_subframes"])
+
+        run(suite.wait_subframes(total_spp=8))
+        self.assertTrue(suite.get_stats()["estimated_subframes"])
+
+
+class TestWaitUntilReady(unittest.TestCase):
+    def test_raster_modes_wait_frames(self):
+        app = FakeApp()
+        suite = make_suite(app)
+
+        run(suite.wait_until_ready("RayTracedLighting", n_frames=3))
+
+        self.assertEqual(app.updates, 3)
+
+    def test_waits_are_recorded_per_sample(self):
+        app = FakeApp(frame_time=0.1)
+        suite = make_suite(app)
+
+        run(suite.wait_frames(2))
+        # The scene changed: the renderer starts accumulating again
+        app.subframes = 0
+        run(suite.wait_until_ready("PathTracing", total_spp=8))
+        self.assertAlmostEqual(suite.end_sample(), 0.4)
+
+        run(suite.wait_frames(1))
+        suite.end_sample()
+
+        stats = suite.get_stats()
+        self.assertEqual(stats["samples"], 2)
+        self.assertAlmostEqual(stats["max"], 0.4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Night detection and its effect on the SPP and render mode of a sample. Runs outside Kit:
+
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# custom_exts is imported as a plain package so that omni/Kit are not needed
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from custom_exts.samplingsuite import RenderModeScheduler, SppPolicy  # noqa: E402
+from custom_exts.solarsuite import is_night, solar_position  # noqa: E402
+
+# Malta (UTC+2 in summer)
+LAT, LON = 35.91517, 14.495217
+
+
+def sample_night(utc_time):
+    """show_lights of a sample planned at `utc_time`, as plan_sample derives it"""
+    _, elevation = solar_position(LAT, LON, np.datetime64(utc_time))
+    return is_night(None, float(elevation))
+
+
+class TestNight(unittest.TestCase):
+    def test_night_follows_the_sun(self):
+        self.assertTrue(sample_night("2024-06-21 22:00"))  # local midnight
+        self.assertTrue(sample_night("2024-12-21 17:00"))  # winter evening, after sunset
+        self.assertFalse(sample_night("2024-06-21 10:00"))
+        self.assertFalse(sample_night("2024-06-21 16:30"))  # summer evening, sun still up
+
+    def test_night_by_hour_without_sun(self):
+        self.assertTrue(is_night(23))
+        self.assertTrue(is_night(3))
+        self.assertFalse(is_night(12))
+        self.assertFalse(is_night(20))
+
+
+class TestNightSample(unittest.TestCase):
+    def test_night_sample_gets_more_spp(self):
+        policy = SppPolicy(night_factor=2.0)
+        night = sample_night("2024-06-21 22:00")
+
+        self.assertGreater(policy.choose(2000.0, night=night), policy.choose(2000.0, night=False))
+
+    def test_night_sample_is_path_traced(self):
+        # No block is path traced by the ratio alone
+        scheduler = RenderModeScheduler(pathtracing_ratio=0.0, pathtracing_at_night=True)
+        night = sample_night("2024-06-21 22:00")
+
+        self.assertEqual(scheduler.assign(0, night=night), RenderModeScheduler.PATH_TRACING)
+        self.assertEqual(scheduler.assign(1, night=False), RenderModeScheduler.RAY_TRACED_LIGHTING)
+        self.assertEqual(scheduler.get_stats()["forced_pathtracing"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
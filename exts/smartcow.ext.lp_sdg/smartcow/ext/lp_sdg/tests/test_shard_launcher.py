@@ -0,0 +1,115 @@
+"""
+Sharded runs with a stand-in worker in place of Kit (through --worker-cmd), and the merge of their shards. Runs
+outside Kit:
+
+    python -m unittest discover -s tests
+"""
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import pandas as pd
+
+# The launcher runs outside Kit and is imported as a plain script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from shard_launcher import main, merge_shards  # noqa: E402
+
+# Writes samples [start, end) of a shard like a Kit worker does: one image and one annotation row per sample.
+# With --fail-once, the first attempt of every shard fails
+STAND_IN_WORKER = '''
+import argparse, csv, os, sys
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--start", type=int)
+parser.add_argument("--end", type=int)
+parser.add_argument("--out")
+parser.add_argument("--fail-once", action="store_true")
+args = parser.parse_args()
+
+marker = os.path.join(args.out, "attempted")
+if args.fail_once and not os.path.exists(marker):
+    open(marker, "w").close()
+    sys.exit(1)
+
+os.makedirs(os.path.join(args.out, "snapshots"), exist_ok=True)
+os.makedirs(os.path.join(args.out, "data"), exist_ok=True)
+with open(os.path.join(args.out, "data", "synth_veh_data_2024-06-21.csv"), "w", newline="") as f:
+    writer = csv.writer(f)
+    writer.writerow(["Image", "LP_Text"])
+    for i in range(args.start, args.end):
+        name = str(i).zfill(8) + ".png"
+        with open(os.path.join(args.out, "snapshots", name), "w") as im:
+            im.write(name)
+        writer.writerow([name, f"MH{i:02d}AB1234"])
+'''
+
+
+class TestShardLauncher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+        self.worker = os.path.join(self.tmp, "worker.py")
+        with open(self.worker, "w") as f:
+            f.write(STAND_IN_WORKER)
+        self.out = os.path.join(self.tmp, "run")
+
+    def launch(self, *extra, worker_args=""):
+        worker_cmd = f"{sys.executable} {self.worker} --start {{start}} --end {{end}} --out {{out_dir}} {worker_args}"
+        argv = ["--samples", "10", "--shards", "3", "--out", self.out, "--worker-cmd", worker_cmd, "--poll", "0.05"]
+        return main(argv + list(extra))
+
+    def merged(self):
+        images = sorted(os.path.basename(p) for p in glob.glob(os.path.join(self.out, "snapshots", "*")))
+        df = pd.read_csv(os.path.join(self.out, "data", "synth_veh_data_2024-06-21.csv"))
+        return images, df
+
+    def test_run_and_merge(self):
+        self.assertEqual(self.launch(), 0)
+
+        images, df = self.merged()
+        expected = [str(i).zfill(8) + ".png" for i in range(10)]
+        self.assertEqual(images, expected)
+        # One file per day, rows in global sample order
+        self.assertEqual(list(df["Image"]), expected)
+
+    def test_merge_again_replaces_the_result(self):
+        self.assertEqual(self.launch("--copy"), 0)
+        shard_dirs = sorted(glob.glob(os.path.join(self.out, "shards", "shard_*")))
+
+        # The shards were copied, so they can be merged again
+        self.assertEqual(merge_shards(shard_dirs, self.out, move=False), 10)
+
+        images, df = self.merged()
+        self.assertEqual(len(images), 10)
+        self.assertEqual(len(df), 10)
+        self.assertFalse(df["Image"].duplicated().any())
+
+    def test_merge_again_after_move_keeps_the_result(self):
+        self.assertEqual(self.launch(), 0)
+        shard_dirs = sorted(glob.glob(os.path.join(self.out, "shards", "shard_*")))
+
+        self.assertEqual(merge_shards(shard_dirs, self.out, move=True), 0)
+
+        images, df = self.merged()
+        self.assertEqual(len(images), 10)
+        self.assertEqual(len(df), 10)
+
+    def test_failed_worker_is_restarted(self):
+        self.assertEqual(self.launch(worker_args="--fail-once"), 0)
+
+        images, df = self.merged()
+        self.assertEqual(len(images), 10)
+        self.assertEqual(len(df), 10)
+
+    def test_failed_shard_is_not_merged(self):
+        self.assertEqual(self.launch("--retries", "0", worker_args="--fail-once"), 1)
+        self.assertFalse(os.path.exists(os.path.join(self.out, "snapshots")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+"""
+Weather lookups over recorded and stand-in backends. Runs outside Kit:
+
+    python -m unittest discover -s tests
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+# custom_exts is imported as a plain package so that omni/Kit are not needed
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from custom_exts.weatherapisuite import RecordedWeatherBackend, WeatherClient, describe  # noqa: E402
+
+
+def response(description):
+    return {"current": {"weather": [{"description": description}]}}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class BlockingBackend:
+    """Backend whose requests wait until `release` is set; counts the requests it received"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = 0
+
+    def fetch(self, lat, lon):
+        self.calls += 1
+        self.release.wait(5.0)
+        return response("light rain")
+
+
+class FailingBackend:
+    def __init__(self):
+        self.calls = 0
+        self.fail = True
+
+    def fetch(self, lat, lon):
+        self.calls += 1
+        if self.fail:
+            raise IOError("Weather API returned HTTP 503")
+        return response("clear sky")
+
+
+class TestRecordedWeatherBackend(unittest.TestCase):
+    def record(self, data):
+        f = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+        with f:
+            json.dump(data, f)
+        self.addCleanup(os.remove, f.name)
+        return f.name
+
+    def test_single_response_for_every_location(self):
+        backend = RecordedWeatherBackend(self.record(response("snow")))
+
+        self.assertEqual(describe(backend.fetch(35.9, 14.5)), "snow")
+        self.assertEqual(describe(backend.fetch(-10.0, 100.0)), "snow")
+
+    def test_responses_by_location(self):
+        path = self.record({"35.92,14.5": response("light rain"), "default": response("clear sky")})
+        backend = RecordedWeatherBackend(path)
+
+        # Matched after rounding to 2 decimals
+        self.assertEqual(describe(backend.fetch(35.91517, 14.495217)), "light rain")
+        self.assertEqual(describe(backend.fetch(48.85, 2.35)), "clear sky")
+
+    def test_unknown_location_without_default(self):
+        backend = RecordedWeatherBackend(self.record({"35.92,14.5": response("light rain")}))
+
+        with self.assertRaises(KeyError):
+            backend.fetch(48.85, 2.35)
+
+    def test_lookup_through_the_client(self):
+        client = WeatherClient(RecordedWeatherBackend(self.record(response("haze"))))
+        self.addCleanup(client.close)
+
+        self.assertEqual(describe(client.get(35.9, 14.5, timeout=5.0)), "haze")
+        self.assertEqual(describe(client.peek(35.9, 14.5)), "haze")
+        self.assertEqual(client.get_stats()["hit_rate"], 0.5)
+
+
+class TestWeatherClient(unittest.TestCase):
+    def test_concurrent_lookups_share_one_request(self):
+        backend = BlockingBackend()
+        client = WeatherClient(backend)
+        self.addCleanup(client.close)
+
+        first = client.get_future(35.9, 14.5)
+        second = client.get_future(35.9, 14.5)
+        # Peeking a location in flight neither waits nor sends another request
+        self.assertIsNone(client.peek(35.9, 14.5))
+        backend.release.set()
+
+        self.assertIs(first, second)
+        self.assertEqual(describe(first.result(5.0)), "light rain")
+        self.assertEqual(backend.calls, 1)
+
+    def test_failed_lookup_backs_off(self):
+        clock = FakeClock()
+        backend = FailingBackend()
+        client = WeatherClient(backend, error_ttl=30.0, clock=clock)
+        self.addCleanup(client.close)
+
+        with self.assertRaises(IOError):
+            client.get(35.9, 14.5, timeout=5.0)
+
+        # Within the backoff: failures come from the cache, no request is sent
+        self.assertIsNone(client.peek(35.9, 14.5))
+        with self.assertRaises(IOError):
+            client.get(35.9, 14.5, timeout=5.0)
+        self.assertEqual(backend.calls, 1)
+
+        # After it: the location is looked up again
+        backend.fail = False
+        clock.now = 31.0
+        self.assertEqual(describe(client.get(35.9, 14.5, timeout=5.0)), "clear sky")
+        self.assertEqual(backend.calls, 2)
+        self.assertEqual(client.get_stats()["failed_locations"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()